@@ -0,0 +1,11 @@
+# attention/__init__.py
+# 웹캠 집중도 분석(하품/졸음) 공용 로직 — pages/main.py, attention_YOLO.py 에서 함께 사용
+from .window import YawnDrowsyWindow
+from .state import AttentionState
+from .worker import InferenceWorker, Detection
+from .scheduler import AdaptiveScheduler
+from .roi import FaceRoiTracker
+from .machine import FatigueStateMachine, build_machine
+
+__all__ = ["YawnDrowsyWindow", "AttentionState", "InferenceWorker", "Detection", "AdaptiveScheduler", "FaceRoiTracker",
+           "FatigueStateMachine", "build_machine"]
@@ -0,0 +1,284 @@
+# attention/backends.py
+# -*- coding: utf-8 -*-
+"""
+집중도 모델 추론 백엔드.
+
+공부방 키오스크에는 GPU 가 없어서 Ultralytics/PyTorch 전체를 올리는 대신
+ONNX Runtime(또는 OpenVINO)로 바로 돌릴 수 있게 한다.
+
+  - export_onnx()      : best.pt → best.onnx (옵션: INT8 동적 양자화)
+  - load_detector(path): 확장자로 백엔드 선택 (.pt / .onnx / .xml)
+
+모든 백엔드는 같은 인터페이스를 가진다.
+    det.predict(img_bgr, imgsz=640, conf=0.45, iou=0.5, classes=(2, 3), max_det=10)
+      -> [(x1, y1, x2, y2, conf, cls_id), ...]   # 원본 이미지 좌표
+    det.predict_batch([img, ...], ...) -> [[box, ...], ...]  # 한 번의 forward (batcher.py)
+    det.names -> {cls_id: name}
+"""
+import ast
+import os
+
+import cv2
+import numpy as np
+
+
+# ---------- 전/후처리(YOLOv8 head 기준) ----------
+def letterbox(img, size: int, color=(114, 114, 114)):
+    """비율 유지 리사이즈 + 정사각형 패딩. (blob, scale, (pad_x, pad_y)) 반환."""
+    h, w = img.shape[:2]
+    r = min(size / h, size / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    px, py = (size - nw) / 2.0, (size - nh) / 2.0
+    if (nw, nh) != (w, h):
+        img = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(py - 0.1)), int(round(py + 0.1))
+    left, right = int(round(px - 0.1)), int(round(px + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    # BGR→RGB, HWC→CHW, 0~1
+    blob = np.ascontiguousarray(img[:, :, ::-1].transpose(2, 0, 1), dtype=np.float32)[None] / 255.0
+    return blob, r, (left, top)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_th: float) -> list[int]:
+    """그리디 NMS (boxes: xyxy)."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = int(order[0])
+        keep.append(i)
+        if order.size == 1:
+            break
+        rest = order[1:]
+        xx1 = np.maximum(x1[i], x1[rest]); yy1 = np.maximum(y1[i], y1[rest])
+        xx2 = np.minimum(x2[i], x2[rest]); yy2 = np.minimum(y2[i], y2[rest])
+        inter = (xx2 - xx1).clip(0) * (yy2 - yy1).clip(0)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_th]
+    return keep
+
+
+def postprocess(out: np.ndarray, scale: float, pad, orig_shape, conf: float, iou: float,
+                classes=None, max_det: int = 10):
+    """
+    YOLOv8 출력 (1, 4 + nc, N) → 원본 좌표 박스 목록.
+    Ultralytics 와 같은 순서: 최고 점수 클래스 선택 → classes 필터 → 클래스별 NMS.
+    """
+    pred = out[0].T                                   # (N, 4 + nc)
+    cls_scores = pred[:, 4:]
+    cls_ids = cls_scores.argmax(1)
+    confs = cls_scores[np.arange(len(pred)), cls_ids]
+    mask = confs >= conf
+    if classes is not None:
+        mask &= np.isin(cls_ids, np.asarray(classes))
+    if not mask.any():
+        return []
+    pred, cls_ids, confs = pred[mask], cls_ids[mask], confs[mask]
+
+    xy, wh = pred[:, :2], pred[:, 2:4]
+    boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1)
+    # 클래스별 NMS: 클래스마다 좌표를 멀리 띄워 한 번에 처리
+    offs = cls_ids[:, None].astype(np.float32) * 7680.0
+    keep = nms(boxes + offs, confs, iou)[:max_det]
+
+    boxes = boxes[keep]
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / scale
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / scale
+    h, w = orig_shape[:2]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+    return [(int(b[0]), int(b[1]), int(b[2]), int(b[3]), float(confs[k]), int(cls_ids[k]))
+            for b, k in zip(boxes, keep)]
+
+
+# ---------- 백엔드 ----------
+class UltralyticsDetector:
+    """기존 .pt 경로 (Ultralytics/PyTorch)."""
+    backend = "ultralytics"
+
+    def __init__(self, path: str):
+        from ultralytics import YOLO
+        self.model = YOLO(path)
+        self.names = dict(getattr(self.model, "names", {}) or {})
+
+    def predict(self, img, imgsz=640, conf=0.45, iou=0.5, classes=None, max_det=10):
+        results = self.model.predict(
+            img, conf=conf, iou=iou, imgsz=imgsz,
+            classes=list(classes) if classes is not None else None,
+            verbose=False, max_det=max_det, agnostic_nms=False,
+        )[0]
+        return self._to_boxes(results)
+
+    def predict_batch(self, imgs, imgsz=640, conf=0.45, iou=0.5, classes=None, max_det=10):
+        results = self.model.predict(
+            list(imgs), conf=conf, iou=iou, imgsz=imgsz,
+            classes=list(classes) if classes is not None else None,
+            verbose=False, max_det=max_det, agnostic_nms=False,
+        )
+        return [self._to_boxes(r) for r in results]
+
+    @staticmethod
+    def _to_boxes(results):
+        if results.boxes is None:
+            return []
+        return [(int(x1), int(y1), int(x2), int(y2), float(c), int(k))
+                for x1, y1, x2, y2, c, k in results.boxes.data.tolist()]
+
+
+class _RuntimeDetector:
+    """ONNX/OpenVINO 공통: letterbox → 추론 → NMS (Ultralytics import 없음)."""
+    backend = "runtime"
+    names: dict = {}
+    fixed_imgsz: int | None = None
+    fixed_batch: int | None = None          # 정적 배치 크기로 내보낸 모델(보통 1)
+
+    def _forward(self, blob: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict(self, img, imgsz=640, conf=0.45, iou=0.5, classes=None, max_det=10):
+        if self.fixed_imgsz:
+            imgsz = self.fixed_imgsz        # 정적 shape 로 내보낸 모델
+        blob, scale, pad = letterbox(img, int(imgsz))
+        out = self._forward(blob)
+        return postprocess(out, scale, pad, img.shape, conf, iou, classes, max_det)
+
+    def predict_batch(self, imgs, imgsz=640, conf=0.45, iou=0.5, classes=None, max_det=10):
+        if self.fixed_batch == 1:
+            return [self.predict(im, imgsz, conf, iou, classes, max_det) for im in imgs]
+        if self.fixed_imgsz:
+            imgsz = self.fixed_imgsz
+        preps = [letterbox(im, int(imgsz)) for im in imgs]
+        step = self.fixed_batch or len(preps)
+        results = []
+        for s in range(0, len(preps), step):
+            chunk = preps[s:s + step]
+            blob = np.concatenate([p[0] for p in chunk], axis=0)
+            if self.fixed_batch and len(chunk) < step:   # 정적 배치: 빈 자리는 0 으로 채움
+                blob = np.concatenate([blob, np.zeros((step - len(chunk), *blob.shape[1:]), blob.dtype)])
+            out = self._forward(blob)
+            for k, (_, scale, pad) in enumerate(chunk):
+                results.append(postprocess(out[k:k + 1], scale, pad, imgs[s + k].shape,
+                                           conf, iou, classes, max_det))
+        return results
+
+
+def _parse_names(raw) -> dict:
+    if isinstance(raw, dict):
+        return {int(k): str(v) for k, v in raw.items()}
+    try:
+        return {int(k): str(v) for k, v in ast.literal_eval(raw).items()}
+    except Exception:
+        return {}
+
+
+class OnnxDetector(_RuntimeDetector):
+    backend = "onnxruntime"
+
+    def __init__(self, path: str, providers=None, threads: int | None = None):
+        import onnxruntime as ort
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            so.intra_op_num_threads = int(threads)
+        self.sess = ort.InferenceSession(path, sess_options=so,
+                                         providers=providers or ["CPUExecutionProvider"])
+        inp = self.sess.get_inputs()[0]
+        self._input_name = inp.name
+        # 동적 shape 면 문자열/None, 정적이면 정수
+        side = inp.shape[2] if len(inp.shape) == 4 else None
+        self.fixed_imgsz = side if isinstance(side, int) else None
+        batch = inp.shape[0] if len(inp.shape) == 4 else None
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        meta = self.sess.get_modelmeta().custom_metadata_map or {}
+        self.names = _parse_names(meta.get("names", "{}"))
+
+    def _forward(self, blob):
+        return self.sess.run(None, {self._input_name: blob})[0]
+
+
+class OpenVinoDetector(_RuntimeDetector):
+    backend = "openvino"
+
+    def __init__(self, path: str, device: str = "CPU"):
+        import openvino as ov
+        core = ov.Core()
+        model = core.read_model(path)
+        shape = model.inputs[0].get_partial_shape()
+        self.fixed_imgsz = shape[2].get_length() if shape[2].is_static else None
+        self.fixed_batch = shape[0].get_length() if shape[0].is_static else None
+        self.compiled = core.compile_model(model, device)
+        self._out = self.compiled.output(0)
+        # Ultralytics 가 같은 폴더에 metadata.yaml 을 남김
+        meta = os.path.join(os.path.dirname(path), "metadata.yaml")
+        self.names = {}
+        if os.path.exists(meta):
+            try:
+                import yaml
+                with open(meta, "r", encoding="utf-8") as f:
+                    self.names = _parse_names((yaml.safe_load(f) or {}).get("names", {}))
+            except Exception:
+                pass
+
+    def _forward(self, blob):
+        return self.compiled([blob])[self._out]
+
+
+def load_detector(path: str, backend: str = "auto"):
+    """
+    path 확장자(또는 backend 지정)로 백엔드 선택.
+      .pt → Ultralytics / .onnx → ONNX Runtime / .xml(OpenVINO IR) → OpenVINO
+    """
+    if backend == "auto":
+        ext = os.path.splitext(path)[1].lower()
+        backend = {".onnx": "onnxruntime", ".xml": "openvino"}.get(ext, "ultralytics")
+    if backend == "onnxruntime":
+        return OnnxDetector(path)
+    if backend == "openvino":
+        return OpenVinoDetector(path)
+    return UltralyticsDetector(path)
+
+
+# ---------- 내보내기 ----------
+def export_onnx(pt_path: str, imgsz: int = 640, dynamic: bool = True, int8: bool = False,
+                opset: int = 12) -> str:
+    """
+    .pt → .onnx (Ultralytics export). dynamic=True 면 스케줄러/ROI 가
+    640/480/320 을 오갈 수 있도록 입력 크기를 열어 둔다.
+    int8=True 면 가중치 INT8 동적 양자화본(*_int8.onnx)을 추가로 만들고 그 경로를 반환.
+    """
+    from ultralytics import YOLO
+    onnx_path = YOLO(pt_path).export(format="onnx", imgsz=imgsz, dynamic=dynamic,
+                                     simplify=True, opset=opset)
+    if not int8:
+        return str(onnx_path)
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    q_path = os.path.splitext(str(onnx_path))[0] + "_int8.onnx"
+    quantize_dynamic(str(onnx_path), q_path, weight_type=QuantType.QUInt8)
+    return q_path
+
+
+def export_openvino(pt_path: str, imgsz: int = 640, int8: bool = False) -> str:
+    """.pt → OpenVINO IR 폴더. 반환값은 .xml 경로."""
+    from ultralytics import YOLO
+    out_dir = YOLO(pt_path).export(format="openvino", imgsz=imgsz, int8=int8)
+    for fn in os.listdir(out_dir):
+        if fn.endswith(".xml"):
+            return os.path.join(out_dir, fn)
+    return str(out_dir)
+
+
+if __name__ == "__main__":
+    # python -m attention.backends runs/detect/train24-mixtrain/weights/best.pt [--int8] [--openvino]
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("weights")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--int8", action="store_true")
+    ap.add_argument("--openvino", action="store_true")
+    ap.add_argument("--static", action="store_true", help="입력 크기 고정(동적 shape 끄기)")
+    args = ap.parse_args()
+    if args.openvino:
+        print(export_openvino(args.weights, args.imgsz, args.int8))
+    else:
+        print(export_onnx(args.weights, args.imgsz, dynamic=not args.static, int8=args.int8))
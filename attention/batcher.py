@@ -0,0 +1,192 @@
+# attention/batcher.py
+# -*- coding: utf-8 -*-
+"""
+여러 공부 세션이 함께 쓰는 배치 추론기.
+
+Streamlit 세션들은 한 프로세스 안의 스레드라서 st.cache_resource 로 감지기 하나를 공유한다.
+세션마다 1장씩 predict 를 부르면 30명 이상일 때 호출당 고정 비용(전처리/세션 실행/파이썬
+오버헤드)만으로 CPU 가 찬다. BatchedDetector 는 감지기와 같은 predict() 를 제공하면서
+요청을 큐에 모아 짧은 대기(max_wait_ms) 안에 들어온 프레임을 한 번의 forward 로 처리하고
+결과를 각 호출자에게 돌려준다.
+
+- 입력 크기/임계값이 같은 요청끼리만 묶는다(ROI 320 / 전체 프레임 640 등은 따로).
+- 최근 1초 안에 요청한 스트림이 모두 모이면 기다리지 않고 바로 실행
+  → 세션이 1개면 대기 지연이 없다.
+- 실제 모델 호출은 배치 스레드 하나에서만 일어난다(세션 간 동시 호출 경합 없음).
+- predict() 의 벽시계 시간에는 큐 대기와 다른 세션 프레임의 forward 가 섞인다. 세션의 적응형
+  스케줄러에는 last_timing()["forward_ms"](묶음 forward 시간 / 묶음 크기)를 넘기고,
+  대기 시간(wait_ms)은 따로 통계로만 본다.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+ACTIVE_WINDOW_S = 1.0
+
+
+class _Request:
+    __slots__ = ("img", "key", "stream", "t_submit", "done", "result", "error", "forward_ms", "wait_ms")
+
+    def __init__(self, img, key, stream):
+        self.img = img
+        self.key = key
+        self.stream = stream
+        self.t_submit = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.forward_ms = 0.0
+        self.wait_ms = 0.0
+
+
+class BatchedDetector:
+    """
+    - detector   : backends.load_detector() 결과 (predict_batch 가 없으면 1장씩 반복)
+    - max_batch  : 한 번에 묶을 최대 프레임 수
+    - max_wait_ms: 첫 요청 이후 다른 스트림을 기다리는 최대 시간
+    """
+
+    def __init__(self, detector, max_batch: int = 16, max_wait_ms: float = 8.0, timeout_s: float = 10.0):
+        self.detector = detector
+        self.names = getattr(detector, "names", {})
+        self.backend = f"batched:{getattr(detector, 'backend', '?')}"
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.timeout_s = float(timeout_s)
+
+        self._cond = threading.Condition()
+        self._queue: deque[_Request] = deque()
+        self._last_seen: dict = {}          # stream → 마지막 요청 시각
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="attention-batcher", daemon=True)
+
+        self.requests = 0
+        self.batches = 0
+        self.forwards = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self._wait_ms = deque(maxlen=512)
+        self._batch_ms = deque(maxlen=512)
+        self._forward_ms = deque(maxlen=512)
+        self._tls = threading.local()       # 호출 스레드별 마지막 요청 시간
+
+    # ---------- 수명 ----------
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    # ---------- 호출자(세션 워커 스레드) ----------
+    def predict(self, img, imgsz=640, conf=0.45, iou=0.5, classes=None, max_det=10, stream=None):
+        """감지기 predict 와 같은 시그니처. 배치가 끝날 때까지 블록."""
+        key = (int(imgsz), float(conf), float(iou), tuple(classes) if classes is not None else None, int(max_det))
+        req = _Request(img, key, stream if stream is not None else threading.get_ident())
+        with self._cond:
+            self.requests += 1
+            self._last_seen[req.stream] = req.t_submit
+            self._queue.append(req)
+            self._cond.notify()
+        if not req.done.wait(self.timeout_s):
+            raise TimeoutError("batched inference timed out")
+        self._tls.timing = {"forward_ms": req.forward_ms, "wait_ms": req.wait_ms}
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def last_timing(self) -> dict | None:
+        """이 스레드의 마지막 predict: {"forward_ms": 이 프레임 몫의 forward, "wait_ms": 큐 대기}"""
+        return getattr(self._tls, "timing", None)
+
+    # ---------- 배치 스레드 ----------
+    def _active_streams(self, now: float) -> int:
+        stale = [s for s, ts in self._last_seen.items() if now - ts > ACTIVE_WINDOW_S]
+        for s in stale:
+            del self._last_seen[s]
+        return max(1, len(self._last_seen))
+
+    def _collect(self) -> list[_Request]:
+        with self._cond:
+            while not self._queue and not self._stop.is_set():
+                self._cond.wait(0.5)
+            if self._stop.is_set():
+                return []
+            deadline = self._queue[0].t_submit + self.max_wait_s
+            while len(self._queue) < self.max_batch and not self._stop.is_set():
+                now = time.perf_counter()
+                if len(self._queue) >= self._active_streams(now) or now >= deadline:
+                    break
+                self._cond.wait(deadline - now)
+            n = min(self.max_batch, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            groups: dict = {}
+            for r in batch:
+                groups.setdefault(r.key, []).append(r)
+            for key, reqs in groups.items():
+                self._forward(key, reqs)
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self._batch_ms.append((time.perf_counter() - t0) * 1000.0)
+            for r in batch:
+                r.wait_ms = (t0 - r.t_submit) * 1000.0
+                self._wait_ms.append(r.wait_ms)
+                self._forward_ms.append(r.forward_ms)
+                r.done.set()
+
+    def _forward(self, key, reqs: list[_Request]):
+        imgsz, conf, iou, classes, max_det = key
+        imgs = [r.img for r in reqs]
+        t0 = time.perf_counter()
+        try:
+            fn = getattr(self.detector, "predict_batch", None)
+            if fn is not None and len(imgs) > 1:
+                outs = fn(imgs, imgsz=imgsz, conf=conf, iou=iou, classes=classes, max_det=max_det)
+            else:
+                outs = [self.detector.predict(im, imgsz=imgsz, conf=conf, iou=iou, classes=classes,
+                                              max_det=max_det) for im in imgs]
+            self.forwards += 1
+            per = (time.perf_counter() - t0) * 1000.0 / len(reqs)
+            for r, o in zip(reqs, outs):
+                r.result = o
+                r.forward_ms = per
+        except Exception as e:
+            self.errors += 1
+            for r in reqs:
+                r.error = e
+
+    # ---------- 통계 ----------
+    def stats(self) -> dict:
+        wait = np.asarray(self._wait_ms) if self._wait_ms else np.zeros(1)
+        bms = np.asarray(self._batch_ms) if self._batch_ms else np.zeros(1)
+        fms = np.asarray(self._forward_ms) if self._forward_ms else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "forwards": self.forwards,
+            "errors": self.errors,
+            "avg_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "active_streams": len(self._last_seen),
+            "wait_ms_p50": round(float(np.percentile(wait, 50)), 2),
+            "batch_ms_p50": round(float(np.percentile(bms, 50)), 2),
+            "forward_ms_p50": round(float(np.percentile(fms, 50)), 2),
+        }
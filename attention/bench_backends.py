@@ -0,0 +1,100 @@
+# attention/bench_backends.py
+# 실행: python -m attention.bench_backends --video clip.mp4 \
+#         --pt runs/detect/train24-mixtrain/weights/best.pt \
+#         --onnx runs/detect/train24-mixtrain/weights/best.onnx [--onnx ..._int8.onnx] [--openvino .../best.xml]
+"""
+녹화 클립으로 .pt(기준) 대비 다른 백엔드의 지연과 감지 일치도를 비교한다.
+
+일치도
+  - 프레임 판정 일치: (하품 여부, 졸음 여부) 가 기준과 같은 프레임 비율
+  - 박스 재현율     : 기준 박스 중 같은 클래스 IoU>=0.5 박스가 있는 비율
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from .backends import load_detector
+
+YAWN_CLASS_INDEX = 2
+DROWSY_CLASS_INDEX = 3
+CLASSES = (YAWN_CLASS_INDEX, DROWSY_CLASS_INDEX)
+
+
+def read_frames(path: str, limit: int):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ok, f = cap.read()
+        if not ok:
+            break
+        frames.append(f)
+    cap.release()
+    return frames
+
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    ua = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / ua if ua > 0 else 0.0
+
+
+def run(det, frames, imgsz, conf, iou, warmup=5):
+    for f in frames[:warmup]:
+        det.predict(f, imgsz=imgsz, conf=conf, iou=iou, classes=CLASSES)
+    lat, outs = [], []
+    for f in frames:
+        t0 = time.perf_counter()
+        outs.append(det.predict(f, imgsz=imgsz, conf=conf, iou=iou, classes=CLASSES))
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    return np.asarray(lat), outs
+
+
+def agreement(ref, other):
+    same, hit, total = 0, 0, 0
+    for r, o in zip(ref, other):
+        flags_r = ({b[5] for b in r} & {YAWN_CLASS_INDEX}, {b[5] for b in r} & {DROWSY_CLASS_INDEX})
+        flags_o = ({b[5] for b in o} & {YAWN_CLASS_INDEX}, {b[5] for b in o} & {DROWSY_CLASS_INDEX})
+        same += flags_r == flags_o
+        for rb in r:
+            total += 1
+            hit += any(ob[5] == rb[5] and _iou(rb, ob) >= 0.5 for ob in o)
+    n = max(1, len(ref))
+    return same / n, (hit / total if total else 1.0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--video", required=True)
+    ap.add_argument("--pt", required=True)
+    ap.add_argument("--onnx", action="append", default=[])
+    ap.add_argument("--openvino", action="append", default=[])
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--conf", type=float, default=0.45)
+    ap.add_argument("--iou", type=float, default=0.5)
+    args = ap.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit(f"프레임을 읽지 못했습니다: {args.video}")
+    print(f"clip={args.video} frames={len(frames)} size={frames[0].shape[1]}x{frames[0].shape[0]} imgsz={args.imgsz}")
+
+    targets = [("pt", args.pt)] + [("onnx", p) for p in args.onnx] + [("openvino", p) for p in args.openvino]
+    ref = None
+    print(f"{'backend':<12} {'model':<40} {'p50 ms':>8} {'p95 ms':>8} {'fps':>7} {'frame agree':>12} {'box recall':>11}")
+    for kind, path in targets:
+        det = load_detector(path)
+        lat, outs = run(det, frames, args.imgsz, args.conf, args.iou)
+        if ref is None:
+            ref = outs
+        fa, br = agreement(ref, outs)
+        print(f"{det.backend:<12} {path[-40:]:<40} {np.percentile(lat, 50):>8.1f} {np.percentile(lat, 95):>8.1f} "
+              f"{1000.0 / lat.mean():>7.1f} {fa * 100:>11.1f}% {br * 100:>10.1f}%")
+
+
+if __name__ == "__main__":
+    main()
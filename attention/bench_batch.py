@@ -0,0 +1,107 @@
+# attention/bench_batch.py
+# 실행: python -m attention.bench_batch --model runs/detect/train24-mixtrain/weights/best.onnx \
+#         [--streams 1,8,32] [--seconds 10] [--imgsz 320] [--video clip.mp4]
+"""
+동시 스트림 수(1 / 8 / 32)별로 공유 감지기 처리량을 비교한다.
+
+  serial : 지금 구조. 세션들이 감지기 하나를 공유하고 1장씩 predict (동시 호출은 락으로 직렬화)
+  batched: BatchedDetector 로 묶어서 한 번의 forward
+
+각 스트림은 실제 세션 워커처럼 "추론 → 결과 받으면 다음 프레임" 을 반복한다.
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from .backends import load_detector
+from .batcher import BatchedDetector
+
+CLASSES = (2, 3)
+
+
+def synthetic_frames(n: int, video: str | None = None, shape=(720, 1280, 3)):
+    if video:
+        from .bench_backends import read_frames
+        frames = read_frames(video, n)
+        if frames:
+            return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, shape, dtype=np.uint8) for _ in range(n)]
+
+
+class _Serial:
+    def __init__(self, det):
+        self.det = det
+        self.lock = threading.Lock()
+
+    def predict(self, img, **kw):
+        with self.lock:
+            return self.det.predict(img, **kw)
+
+
+def run_streams(predictor, n_streams: int, frames, seconds: float, imgsz: int, conf: float):
+    stop = threading.Event()
+    lat = [[] for _ in range(n_streams)]
+
+    def loop(k):
+        i = k
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            predictor.predict(frames[i % len(frames)], imgsz=imgsz, conf=conf, iou=0.5,
+                              classes=CLASSES, max_det=10)
+            lat[k].append((time.perf_counter() - t0) * 1000.0)
+            i += n_streams
+
+    threads = [threading.Thread(target=loop, args=(k,), daemon=True) for k in range(n_streams)]
+    t_start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t_start
+    all_lat = np.concatenate([np.asarray(x) for x in lat if x]) if any(lat) else np.zeros(1)
+    total = sum(len(x) for x in lat)
+    return {
+        "fps": total / wall,
+        "per_stream_fps": total / wall / n_streams,
+        "p50": float(np.percentile(all_lat, 50)),
+        "p95": float(np.percentile(all_lat, 95)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--streams", default="1,8,32")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--imgsz", type=int, default=320)
+    ap.add_argument("--conf", type=float, default=0.45)
+    ap.add_argument("--max-batch", type=int, default=16)
+    ap.add_argument("--max-wait-ms", type=float, default=8.0)
+    ap.add_argument("--video", default=None)
+    args = ap.parse_args()
+
+    det = load_detector(args.model)
+    frames = synthetic_frames(64, args.video)
+    for f in frames[:3]:
+        det.predict(f, imgsz=args.imgsz, conf=args.conf, classes=CLASSES)   # 워밍업
+
+    print(f"model={args.model} backend={det.backend} imgsz={args.imgsz} seconds={args.seconds:g} "
+          f"max_batch={args.max_batch} max_wait_ms={args.max_wait_ms:g}")
+    print(f"{'streams':>7} {'mode':<8} {'total fps':>10} {'fps/stream':>11} {'p50 ms':>8} {'p95 ms':>8} {'avg batch':>10}")
+    for n in (int(x) for x in args.streams.split(",")):
+        r = run_streams(_Serial(det), n, frames, args.seconds, args.imgsz, args.conf)
+        print(f"{n:>7} {'serial':<8} {r['fps']:>10.1f} {r['per_stream_fps']:>11.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {1:>10}")
+        b = BatchedDetector(det, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms).start()
+        r = run_streams(b, n, frames, args.seconds, args.imgsz, args.conf)
+        b.stop()
+        print(f"{n:>7} {'batched':<8} {r['fps']:>10.1f} {r['per_stream_fps']:>11.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+              f"{b.stats()['avg_batch']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# attention/bench_overlay.py
+# 실행: python -m attention.bench_overlay [--video clip.mp4] [--frames 300]
+"""
+콜백 화면 출력 경로의 프레임당 시간/메모리 할당 비교.
+
+  legacy : 원본에 그리기 + 워커용 사본 + cv2.resize 새 배열 (이전 pages/main.py)
+  reuse  : FrameRenderer (dst= 버퍼 재사용, 축소본에만 그리기, 사본 없음)
+  focus  : FrameRenderer(draw=False) — 집중 모드, 축소만
+
+할당량은 tracemalloc 으로 잰 프레임당 numpy/OpenCV 배열 할당 합계.
+(av.VideoFrame 변환은 세 경로 모두 같아서 제외)
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from .overlay import FrameRenderer
+
+DISP_W, DISP_H = 720, 405
+BOXES = [(500, 200, 780, 520, 0.87, 2), (520, 210, 770, 500, 0.51, 3)]
+NAMES = {2: "yawn", 3: "drowsy"}
+
+
+def load_frames(video: str | None, n: int, shape=(720, 1280, 3)):
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < n:
+            ok, f = cap.read()
+            if not ok:
+                break
+            frames.append(f)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        base = rng.integers(0, 255, shape, dtype=np.uint8)
+        frames = [np.roll(base, i, axis=1) for i in range(min(n, 30))]
+    return frames
+
+
+def legacy(img, submit):
+    submit(img.copy())
+    for x1, y1, x2, y2, conf, cls_id in BOXES:
+        color = (0, 0, 255) if cls_id == 2 else (255, 255, 0)
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(img, f"{NAMES[cls_id]} {conf:.2f}", (x1, max(20, y1 - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    cv2.putText(img, "Status: Yawning", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+    cv2.putText(img, "Attention: 93", (30, 90), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
+    return cv2.resize(img, (DISP_W, DISP_H), interpolation=cv2.INTER_AREA)
+
+
+def measure(fn, frames, n):
+    # 워밍업
+    for f in frames[:5]:
+        fn(f.copy())
+    work = [f.copy() for f in frames]     # 원본 훼손 방지(legacy 는 img 위에 그림)
+    t_total, alloc_total = 0.0, 0
+    tracemalloc.start()
+    for i in range(n):
+        img = work[i % len(work)]
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        fn(img)
+        t_total += time.perf_counter() - t0
+        alloc_total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return t_total / n * 1000.0, alloc_total / n / 1024.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--video", default=None)
+    ap.add_argument("--frames", type=int, default=300)
+    args = ap.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    h, w = frames[0].shape[:2]
+    sink = []
+    submit = lambda f: sink.__setitem__(slice(None), [f])   # 워커 우편함(마지막 1장만 보관)
+    r = FrameRenderer(DISP_W, DISP_H)
+    cases = [
+        ("legacy", lambda img: legacy(img, submit)),
+        ("reuse", lambda img: (submit(img), r.render(img, BOXES, "Yawning", 93, NAMES))),
+        ("focus", lambda img: (submit(img), r.render(img, draw=False))),
+    ]
+    print(f"source={args.video or 'synthetic'} {w}x{h} → {DISP_W}x{DISP_H} frames={args.frames}")
+    print(f"{'path':<8} {'ms/frame':>9} {'KiB alloc/frame':>16}")
+    for name, fn in cases:
+        ms, kib = measure(fn, frames, args.frames)
+        print(f"{name:<8} {ms:>9.3f} {kib:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# attention/bench_window.py
+# 실행: python -m attention.bench_window [--frames 20000]
+"""
+YawnDrowsyWindow 마이크로 벤치마크 + 기존 deque 구현과의 판정 대조.
+
+3초 하품 윈도우 / 2초 졸음 윈도우를 30/60/120fps 로 환산한 크기에서
+프레임당 처리 시간(µs)을 비교하고, 모든 프레임에서 (yawning, sleeping)
+판정이 기존 pages/main.py 로직과 같은지 확인한다.
+"""
+import argparse
+import random
+import time
+from collections import deque
+
+from .window import YawnDrowsyWindow
+
+THRESHOLD_ON, THRESHOLD_OFF = 0.45, 0.35
+
+
+class _LegacyWindow:
+    """pages/main.py 의 기존(프레임당 O(window)) 계산을 그대로 옮긴 참조 구현."""
+
+    def __init__(self, window_size, drowsy_frames, min_yawn_frames):
+        self.yawn_window = deque(maxlen=window_size)
+        self.weights = [i / window_size for i in range(1, window_size + 1)]
+        self.drowsy_window = deque(maxlen=drowsy_frames)
+        self.min_yawn_duration = min_yawn_frames
+
+    def step(self, is_yawning, is_drowsy, yawning_now):
+        self.yawn_window.append(is_yawning)
+        self.drowsy_window.append(is_drowsy)
+        weights = self.weights
+        weighted_sum = sum(w for yawning, w in zip(self.yawn_window, weights) if yawning)
+        weighted_ratio = weighted_sum / (sum(weights) if sum(weights) else 1.0)
+        continuous_count = 0
+        for status in reversed(self.yawn_window):
+            if status: continuous_count += 1
+            else: break
+
+        if (not yawning_now and weighted_ratio > THRESHOLD_ON and continuous_count > self.min_yawn_duration):
+            new_yawning = True
+        elif (yawning_now and weighted_ratio > THRESHOLD_OFF and continuous_count > self.min_yawn_duration):
+            new_yawning = True
+        else:
+            new_yawning = False
+
+        drowsy_frames = self.drowsy_window.maxlen or 1
+        new_sleeping = (sum(self.drowsy_window) >= int(drowsy_frames * 0.8))
+        return new_yawning, new_sleeping
+
+
+def _synthetic_stream(n, seed):
+    """하품/졸음 구간이 섞인 현실적인 감지 시퀀스(구간 길이 랜덤)."""
+    rnd = random.Random(seed)
+    out = []
+    y = d = False
+    while len(out) < n:
+        y = rnd.random() < 0.35
+        d = rnd.random() < 0.25
+        run = rnd.randint(1, 150)
+        for _ in range(run):
+            # 구간 내부에도 약간의 오검출/미검출 노이즈
+            out.append((y ^ (rnd.random() < 0.05), d ^ (rnd.random() < 0.05)))
+    return out[:n]
+
+
+def _run(impl_step, stream):
+    yawning = False
+    decisions = []
+    t0 = time.perf_counter()
+    for is_y, is_d in stream:
+        ny, ns = impl_step(is_y, is_d, yawning)
+        yawning = ny
+        decisions.append((ny, ns))
+    return (time.perf_counter() - t0), decisions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    stream = _synthetic_stream(args.frames, args.seed)
+    print(f"frames={len(stream)}")
+    print(f"{'fps':>5} {'W':>5} {'D':>5} {'legacy µs/f':>12} {'ring µs/f':>10} {'speedup':>8}  match")
+    for fps in (30, 60, 120):
+        W, D = fps * 3, fps * 2
+        min_frames = int(fps * 0.9)
+        legacy = _LegacyWindow(W, D, min_frames)
+        ring = YawnDrowsyWindow(W, D, min_frames, THRESHOLD_ON, THRESHOLD_OFF)
+
+        def ring_step(is_y, is_d, yawning_now):
+            ring.push(is_y, is_d)
+            return ring.decide(yawning_now)
+
+        t_legacy, d_legacy = _run(legacy.step, stream)
+        t_ring, d_ring = _run(ring_step, stream)
+        mismatch = sum(1 for a, b in zip(d_legacy, d_ring) if a != b)
+        n = len(stream)
+        print(f"{fps:>5} {W:>5} {D:>5} {t_legacy / n * 1e6:>12.2f} {t_ring / n * 1e6:>10.2f} "
+              f"{t_legacy / max(t_ring, 1e-12):>7.1f}x  {'OK' if mismatch == 0 else f'MISMATCH({mismatch})'}")
+
+
+if __name__ == "__main__":
+    main()
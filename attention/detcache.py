@@ -0,0 +1,113 @@
+# attention/detcache.py
+"""
+프레임별 감지 결과 캐시(.npz, 열 단위 저장).
+
+YOLO 는 한 번만 돌려 결과를 저장하고(python -m attention.replay clip.mp4 --record dets.npz),
+임계값/디바운스/윈도우 길이 실험은 저장된 결과로 상태 머신만 재생한다(attention.sweep).
+
+파일 구성 (N = 프레임 수, M = 전체 박스 수)
+  t         float64[N]    영상 내 시각(초)
+  infer_ms  float32[N]    기록 당시 추론 시간
+  offsets   int64[N+1]    프레임 i 의 박스 = [offsets[i], offsets[i+1])
+  xyxy      int32[M, 4]
+  conf      float32[M]
+  cls       int16[M]
+  meta      JSON 문자열   fps, source, model, imgsz, conf ...
+"""
+import json
+
+import numpy as np
+
+YAWN_CLASS_INDEX = 2
+DROWSY_CLASS_INDEX = 3
+
+
+class DetectionRecorder:
+    """detect_stream 결과를 흘려보내면서 열 단위 버퍼에 모은다."""
+
+    def __init__(self, fps: float, **meta):
+        self.meta = {"fps": float(fps), **meta}
+        self._t: list[float] = []
+        self._infer: list[float] = []
+        self._counts: list[int] = []
+        self._boxes: list[tuple] = []
+
+    @property
+    def frames(self) -> int:
+        return len(self._t)
+
+    @property
+    def boxes(self) -> int:
+        return len(self._boxes)
+
+    def add(self, t: float, boxes, infer_ms: float | None = None):
+        self._t.append(float(t))
+        self._infer.append(float(infer_ms) if infer_ms is not None else np.nan)
+        self._counts.append(len(boxes))
+        self._boxes.extend(boxes)
+
+    def tap(self, stream):
+        """(t, boxes, 추론 ms) 스트림을 그대로 넘기면서 기록."""
+        for t, boxes, infer_ms in stream:
+            self.add(t, boxes, infer_ms)
+            yield t, boxes, infer_ms
+
+    def save(self, path: str):
+        b = np.asarray(self._boxes, dtype=np.float64).reshape(-1, 6)
+        offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+        np.cumsum(self._counts, out=offsets[1:])
+        np.savez_compressed(
+            path,
+            t=np.asarray(self._t, dtype=np.float64),
+            infer_ms=np.asarray(self._infer, dtype=np.float32),
+            offsets=offsets,
+            xyxy=b[:, :4].astype(np.int32),
+            conf=b[:, 4].astype(np.float32),
+            cls=b[:, 5].astype(np.int16),
+            meta=np.array(json.dumps(self.meta, ensure_ascii=False)),
+        )
+
+
+class DetectionCache:
+    """저장된 감지 결과. 재생용 하품/졸음 플래그는 신뢰도 기준(min_conf)별로 벡터 연산으로 만든다."""
+
+    def __init__(self, t, infer_ms, offsets, xyxy, conf, cls, meta: dict):
+        self.t = t
+        self.infer_ms = infer_ms
+        self.offsets = offsets
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.meta = meta
+
+    @classmethod
+    def load(cls, path: str) -> "DetectionCache":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["t"], z["infer_ms"], z["offsets"], z["xyxy"], z["conf"], z["cls"],
+                       json.loads(str(z["meta"])))
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @property
+    def fps(self) -> float:
+        return float(self.meta.get("fps", 30.0))
+
+    def boxes(self, i: int) -> list[tuple]:
+        s, e = self.offsets[i], self.offsets[i + 1]
+        return [(*map(int, self.xyxy[k]), float(self.conf[k]), int(self.cls[k])) for k in range(s, e)]
+
+    def flags(self, min_conf: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+        """프레임별 (하품 여부, 졸음 여부) bool 배열."""
+        frame_of_box = np.repeat(np.arange(len(self.t)), np.diff(self.offsets))
+        keep = self.conf >= min_conf
+        yawn = np.zeros(len(self.t), dtype=bool)
+        drowsy = np.zeros(len(self.t), dtype=bool)
+        yawn[frame_of_box[keep & (self.cls == YAWN_CLASS_INDEX)]] = True
+        drowsy[frame_of_box[keep & (self.cls == DROWSY_CLASS_INDEX)]] = True
+        return yawn, drowsy
+
+    def flag_stream(self, min_conf: float = 0.0):
+        """run_machine 입력 형식 (t, 하품, 졸음, 추론 ms=None) 반복자."""
+        yawn, drowsy = self.flags(min_conf)
+        return zip(self.t.tolist(), yawn.tolist(), drowsy.tolist(), [None] * len(self.t))
@@ -0,0 +1,292 @@
+# attention/journal.py
+# -*- coding: utf-8 -*-
+"""
+하품/졸음 이벤트 로컬 저널 + 백그라운드 업로더.
+
+기존 flush_events() 는 Streamlit 스크립트 스레드에서 5초 타임아웃으로 직접 POST 하고,
+실패하면 print 만 남긴 채 메모리 목록이 계속 커졌다(탭이 죽으면 전부 유실).
+
+  EventJournal : SQLite(WAL) 추가 전용 저널. 이벤트마다 클라이언트 event_id(uuid) 부여
+  EventUploader: 데몬 스레드가 미전송 이벤트를 세션별로 묶어
+                 /study/sessions/{session_id}/events/bulk 로 전송
+                 - 열 단위(평행 배열) 본문, msgpack 이 있으면 msgpack 아니면 JSON
+                 - 큰 JSON 배치는 gzip(Content-Encoding: gzip)
+                 - 네트워크/5xx 실패는 지수 백오프로 재시도
+                 - 서버가 event_id 로 중복 제거 → 재전송해도 한 번만 저장
+UI 스레드는 저널에 쓰고 업로더를 깨우기만 한다(네트워크 대기 없음).
+프로세스가 재시작되면 업로더가 저널에 남은 미전송 이벤트부터 보낸다.
+"""
+import gzip
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+
+try:
+    import msgpack
+except ImportError:     # 선택 의존성: 없으면 JSON(+gzip)
+    msgpack = None
+
+PENDING, SENT, DEAD = 0, 1, -1
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def to_columns(events) -> dict:
+    """
+    (kind, 이벤트 dict) 목록 → /events/bulk 열 단위 본문.
+    timestamp 문자열(로컬 시각)은 epoch 초로 바꿔 서버의 문자열 파싱을 없앤다.
+    """
+    cols = {"event_id": [], "kind": [], "type": [], "ts": [], "attention": [], "yawn_weight": []}
+    for kind, ev in events:
+        cols["event_id"].append(ev["event_id"])
+        cols["kind"].append(kind)
+        cols["type"].append(ev["type"])
+        ts = ev.get("ts")
+        if ts is None:
+            ts = time.mktime(time.strptime(ev["timestamp"], TS_FORMAT))
+        cols["ts"].append(float(ts))
+        cols["attention"].append(ev.get("attention_score"))
+        cols["yawn_weight"].append(ev.get("avg_yawn_duration"))
+    return cols
+
+
+def encode_body(cols: dict, gzip_min_bytes: int = 4096, use_msgpack: bool = True) -> tuple[bytes, dict]:
+    """본문 bytes 와 헤더. msgpack 은 이미 작아서 압축하지 않음."""
+    if use_msgpack and msgpack is not None:
+        return msgpack.packb(cols, use_bin_type=True), {"Content-Type": "application/x-msgpack"}
+    body = json.dumps(cols, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if len(body) >= gzip_min_bytes:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+class EventJournal:
+    """세션별 이벤트 저널(SQLite). 여러 스레드에서 써도 되도록 연결 하나를 락으로 보호."""
+
+    def __init__(self, path: str):
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                event_id   TEXT NOT NULL UNIQUE,
+                kind       TEXT NOT NULL,          -- yawn / sleep
+                payload    TEXT NOT NULL,          -- 이벤트 JSON(event_id 포함)
+                created    REAL NOT NULL,
+                state      INTEGER NOT NULL DEFAULT 0,
+                attempts   INTEGER NOT NULL DEFAULT 0,
+                next_try   REAL NOT NULL DEFAULT 0,
+                error      TEXT
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_events_pending ON events(state, next_try, seq)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---------- 쓰기(UI 스레드) ----------
+    def append(self, session_id: str, kind: str, events: list[dict]) -> list[str]:
+        """이벤트에 event_id 를 붙여 저장하고 id 목록 반환."""
+        now = time.time()
+        rows, ids = [], []
+        for ev in events:
+            ev = dict(ev)
+            ev.setdefault("event_id", uuid.uuid4().hex)
+            ids.append(ev["event_id"])
+            rows.append((str(session_id), ev["event_id"], kind, json.dumps(ev, ensure_ascii=False), now))
+        if rows:
+            with self._lock:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO events(session_id, event_id, kind, payload, created) VALUES (?,?,?,?,?)",
+                    rows)
+                self._db.execute("COMMIT")
+        return ids
+
+    # ---------- 업로더 ----------
+    def pending(self, limit: int = 500, now: float | None = None) -> list[tuple]:
+        """(seq, session_id, kind, payload, attempts) 목록. 재시도 시각이 지난 것만."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._db.execute(
+                "SELECT seq, session_id, kind, payload, attempts FROM events "
+                "WHERE state = ? AND next_try <= ? ORDER BY seq LIMIT ?",
+                (PENDING, now, int(limit))).fetchall()
+
+    def _update(self, sql: str, params, seqs):
+        if not seqs:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(sql, [(*params, s) for s in seqs])
+            self._db.execute("COMMIT")
+
+    def mark_sent(self, seqs):
+        self._update("UPDATE events SET state = ?, error = NULL WHERE seq = ?", (SENT,), seqs)
+
+    def mark_dead(self, seqs, error: str):
+        self._update("UPDATE events SET state = ?, error = ? WHERE seq = ?", (DEAD, error[:500]), seqs)
+
+    def defer(self, seqs, next_try: float, error: str):
+        self._update("UPDATE events SET attempts = attempts + 1, next_try = ?, error = ? WHERE seq = ?",
+                     (next_try, error[:500]), seqs)
+
+    def counts(self, session_id: str | None = None) -> dict:
+        sql = "SELECT state, COUNT(*) FROM events"
+        args = ()
+        if session_id is not None:
+            sql += " WHERE session_id = ?"
+            args = (str(session_id),)
+        with self._lock:
+            rows = dict(self._db.execute(sql + " GROUP BY state", args).fetchall())
+        return {"pending": rows.get(PENDING, 0), "sent": rows.get(SENT, 0), "dead": rows.get(DEAD, 0)}
+
+    def prune(self, older_than_s: float = 7 * 24 * 3600):
+        """전송 완료된 오래된 행 삭제."""
+        with self._lock:
+            self._db.execute("DELETE FROM events WHERE state = ? AND created < ?",
+                             (SENT, time.time() - older_than_s))
+
+
+class EventUploader:
+    """
+    - base_url      : 백엔드 주소
+    - batch_size    : 한 번에 읽을 최대 이벤트 수
+    - interval_s    : 깨우지 않아도 저널을 확인하는 주기
+    - gzip_min_bytes: 본문이 이보다 크면 gzip 압축
+    """
+
+    def __init__(self, journal: EventJournal, base_url: str, batch_size: int = 500,
+                 interval_s: float = 2.0, timeout_s: float = 5.0, gzip_min_bytes: int = 4096,
+                 base_backoff_s: float = 1.0, max_backoff_s: float = 60.0, http=None):
+        self.journal = journal
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = int(batch_size)
+        self.interval_s = float(interval_s)
+        self.timeout_s = float(timeout_s)
+        self.gzip_min_bytes = int(gzip_min_bytes)
+        self.base_backoff_s = float(base_backoff_s)
+        self.max_backoff_s = float(max_backoff_s)
+        self.http = http or requests.Session()
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="attention-uploader", daemon=True)
+
+        self.posts = 0
+        self.sent = 0
+        self.duplicates = 0
+        self.failures = 0
+        self.dead = 0
+        self.last_error = None
+
+    # ---------- 수명 ----------
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def notify(self):
+        """새 이벤트가 저널에 들어왔음을 알림(즉시 반환)."""
+        self._wake.set()
+
+    # ---------- 전송 ----------
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            try:
+                while self.flush_once() and not self._stop.is_set():
+                    pass
+            except Exception as e:          # 업로더 스레드는 죽지 않게
+                self.last_error = repr(e)
+
+    def flush_once(self, now: float | None = None) -> int:
+        """미전송 이벤트 한 묶음 전송 시도. 전송 성공 건수 반환(0 이면 더 보낼 게 없거나 실패)."""
+        rows = self.journal.pending(self.batch_size, now)
+        by_session: dict[str, list] = {}
+        for row in rows:
+            by_session.setdefault(row[1], []).append(row)
+        done = 0
+        for sid, srows in by_session.items():
+            done += self._post(sid, srows)
+        return done
+
+    def _backoff(self, attempts: int) -> float:
+        d = min(self.max_backoff_s, self.base_backoff_s * (2 ** attempts))
+        return d * (0.5 + random.random() * 0.5)
+
+    def _post(self, session_id: str, rows) -> int:
+        seqs = [r[0] for r in rows]
+        try:
+            cols = to_columns((kind, json.loads(ev)) for _, _, kind, ev, _ in rows)
+        except (KeyError, ValueError) as e:
+            self.dead += len(seqs)
+            self.journal.mark_dead(seqs, f"encode: {e!r}")
+            return 0
+        body, headers = encode_body(cols, self.gzip_min_bytes)
+
+        self.posts += 1
+        attempts = max(r[4] for r in rows)
+        try:
+            r = self.http.post(f"{self.base_url}/study/sessions/{session_id}/events/bulk",
+                               data=body, headers=headers, timeout=self.timeout_s)
+        except requests.exceptions.RequestException as e:
+            self._fail(seqs, attempts, repr(e))
+            return 0
+        if r.status_code < 300:
+            try:
+                self.duplicates += int(r.json().get("duplicates", 0))
+            except ValueError:
+                pass
+            self.journal.mark_sent(seqs)
+            self.sent += len(seqs)
+            return len(seqs)
+        if r.status_code in (400, 404, 422):
+            # 세션 없음/형식 오류 → 재시도해도 같음
+            self.dead += len(seqs)
+            self.last_error = f"{r.status_code} {r.text[:200]}"
+            self.journal.mark_dead(seqs, self.last_error)
+            return 0
+        self._fail(seqs, attempts, f"{r.status_code} {r.text[:200]}")
+        return 0
+
+    def _fail(self, seqs, attempts: int, error: str):
+        self.failures += 1
+        self.last_error = error
+        self.journal.defer(seqs, time.time() + self._backoff(attempts), error)
+
+    def stats(self) -> dict:
+        return {
+            "posts": self.posts,
+            "sent": self.sent,
+            "duplicates": self.duplicates,
+            "failures": self.failures,
+            "dead": self.dead,
+            "last_error": self.last_error,
+            **{f"journal_{k}": v for k, v in self.journal.counts().items()},
+        }
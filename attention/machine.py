@@ -0,0 +1,128 @@
+# attention/machine.py
+# -*- coding: utf-8 -*-
+"""
+하품/졸음 상태 머신 (pages/main.py 의 set_state 로직).
+
+감지 결과 1건 → 윈도우 갱신 → 히스테리시스 판정 → 디바운스된 상태 전이 →
+yawn_events / sleep_events 기록. 시각(now)을 인자로 받을 수 있어서
+웹캠 없이 녹화 영상/캐시된 감지 결과로 똑같이 재생할 수 있다.
+"""
+import time
+from datetime import datetime
+
+from .state import AttentionState
+from .window import YawnDrowsyWindow
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class FatigueStateMachine:
+    """
+    - window     : YawnDrowsyWindow (프레임 단위 판정)
+    - attention  : AttentionState (이벤트 목록 + 점수 카운터)
+    - debounce_sec: 상태 전이 최소 간격
+    윈도우 길이는 초 단위(window_seconds / drowsy_seconds / min_yawn_sec)로 들고 있다가
+    rescale(fps) 로 프레임 수를 다시 맞춘다.
+    """
+
+    def __init__(self, window: YawnDrowsyWindow, attention: AttentionState,
+                 window_seconds: float, drowsy_seconds: float, min_yawn_sec: float,
+                 fps: float, debounce_sec: float = 0.3, avg_yawn_duration: float = 1.0):
+        self.window = window
+        self.attention = attention
+        self.window_seconds = float(window_seconds)
+        self.drowsy_seconds = float(drowsy_seconds)
+        self.min_yawn_sec = float(min_yawn_sec)
+        self.fps = float(fps)
+        self.debounce_sec = float(debounce_sec)
+
+        self.yawning = False
+        self.sleeping = False
+        self.yawn_start_time = None
+        self.sleep_start_time = None
+        self.durations: list[float] = []
+        self.avg_yawn_duration = float(avg_yawn_duration)
+        self.last_status_change = 0.0
+        self.fatigue_bump = 0          # UI 가 읽고 0 으로 되돌림
+
+    # ---------- 윈도우 길이 ----------
+    def frames(self, seconds: float, fps: float | None = None) -> int:
+        return max(1, int(round((fps or self.fps) * seconds)))
+
+    def rescale(self, fps: float):
+        """감지 속도(fps)가 바뀌었을 때 초 단위 설정을 프레임 수로 다시 환산."""
+        self.fps = float(fps)
+        self.window.resize(self.frames(self.window_seconds), self.frames(self.drowsy_seconds),
+                           self.frames(self.min_yawn_sec))
+
+    @property
+    def min_yawn_frames(self) -> int:
+        return self.window.min_yawn_frames
+
+    # ---------- 한 스텝 ----------
+    def score(self) -> int:
+        return self.attention.score
+
+    def step(self, is_yawning: bool, is_drowsy: bool, now: float | None = None) -> bool:
+        """감지 결과 1건 반영. 상태가 바뀌었으면 True."""
+        self.window.push(is_yawning, is_drowsy)
+        new_yawning, new_sleeping = self.window.decide(self.yawning)
+        return self.set_state(new_yawning, new_sleeping, self.score(), now)
+
+    def set_state(self, new_yawning: bool, new_sleeping: bool, attention_on_event: int,
+                  now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        if now - self.last_status_change < self.debounce_sec:
+            return False
+        changed = (self.yawning != new_yawning) or (self.sleeping != new_sleeping)
+        if not changed:
+            return False
+        self.last_status_change = now
+        stamp = datetime.fromtimestamp(now).strftime(TS_FORMAT)
+
+        if not self.yawning and new_yawning:
+            self.yawn_start_time = now
+            self.attention.add_yawn_event({"type": "start", "timestamp": stamp})
+        elif self.yawning and not new_yawning:
+            if self.yawn_start_time:
+                duration = now - self.yawn_start_time
+                self.durations.append(duration)
+                self.yawn_start_time = None
+                if self.durations:
+                    self.avg_yawn_duration = sum(self.durations) / len(self.durations)
+            self.attention.add_yawn_event({
+                "type": "yawn_end",
+                "timestamp": stamp,
+                "avg_yawn_duration": round(self.avg_yawn_duration, 2),
+                "attention_score": attention_on_event
+            })
+
+        if not self.sleeping and new_sleeping:
+            self.sleep_start_time = now
+            self.attention.add_sleep_event({"type": "start", "timestamp": stamp})
+        elif self.sleeping and not new_sleeping:
+            self.attention.add_sleep_event({
+                "type": "drowys_end",
+                "timestamp": stamp,
+                "attention_score": attention_on_event
+            })
+            self.sleep_start_time = None
+
+        self.yawning = new_yawning
+        self.sleeping = new_sleeping
+        if self.yawning or self.sleeping:
+            self.fatigue_bump += 1
+        return True
+
+
+def build_machine(fps: float, avg_yawn: float = 1.0, threshold_on: float = 0.45,
+                  threshold_off: float = 0.35, window_seconds: float = 3, drowsy_seconds: float = 2,
+                  debounce_sec: float = 0.3, base_attention: int = 100) -> FatigueStateMachine:
+    """pages/main.py 와 같은 기본값으로 상태 머신 생성 (오프라인 재생/벤치마크 공용)."""
+    min_yawn_sec = max(0.6, min(avg_yawn * 0.9, 2.0))
+    window = YawnDrowsyWindow(int(fps * window_seconds), int(fps * drowsy_seconds),
+                              int(fps * min_yawn_sec),
+                              threshold_on=threshold_on, threshold_off=threshold_off)
+    return FatigueStateMachine(window, AttentionState(base=base_attention),
+                               window_seconds, drowsy_seconds, min_yawn_sec, fps,
+                               debounce_sec=debounce_sec, avg_yawn_duration=avg_yawn)
@@ -0,0 +1,55 @@
+# attention/overlay.py
+# -*- coding: utf-8 -*-
+"""
+WebRTC 콜백의 화면 출력 경로.
+
+기존에는 1280x720 원본에 박스/글자를 그리고(워커에 넘길 사본 1장 추가)
+cv2.resize 로 새 배열을 만들어 반환했다. FrameRenderer 는
+  - 표시 크기 버퍼를 미리 잡아 두고 cv2.resize(dst=) 로 그 안에 축소
+  - 박스/상태 글자는 축소된 이미지에만 그림(원본은 건드리지 않음 → 워커에 사본 불필요)
+  - draw=False(집중 모드)면 축소만 하고 아무것도 그리지 않음
+av.VideoFrame.from_ndarray 가 프레임 데이터를 복사하므로 버퍼 하나를 계속 재사용해도 안전하다.
+"""
+import cv2
+import numpy as np
+
+YAWN_CLASS_INDEX = 2
+DROWSY_CLASS_INDEX = 3
+CLASS_COLORS = {YAWN_CLASS_INDEX: (0, 0, 255), DROWSY_CLASS_INDEX: (255, 255, 0)}
+STATUS_COLORS = {"Yawning": (0, 0, 255), "Sleeping": (255, 255, 0), "Awake": (0, 255, 0)}
+
+
+class FrameRenderer:
+    """원본 프레임 → 표시 크기 프레임(+오버레이). 콜백 스레드 하나에서만 호출."""
+
+    def __init__(self, disp_w: int, disp_h: int):
+        self.disp_w, self.disp_h = int(disp_w), int(disp_h)
+        self._buf = np.empty((self.disp_h, self.disp_w, 3), dtype=np.uint8)
+        # 원본 1280x720 기준 글자 크기(1.2/0.6)를 표시 크기에 맞게 줄여 둔다
+        k = self.disp_h / 720.0
+        self._status_scale, self._status_thick = 1.2 * k, max(1, int(round(3 * k)))
+        self._label_scale, self._label_thick = 0.6 * k, max(1, int(round(2 * k)))
+        self._status_org = (int(30 * k), int(50 * k))
+        self._attn_org = (int(30 * k), int(90 * k))
+
+    def render(self, img: np.ndarray, boxes=(), status: str = "Awake", attention: int = 100,
+               names: dict | None = None, draw: bool = True, classes=(YAWN_CLASS_INDEX, DROWSY_CLASS_INDEX)):
+        buf = self._buf
+        cv2.resize(img, (self.disp_w, self.disp_h), dst=buf, interpolation=cv2.INTER_AREA)
+        if not draw:
+            return buf
+        sx, sy = self.disp_w / img.shape[1], self.disp_h / img.shape[0]
+        names = names or {}
+        for x1, y1, x2, y2, conf, cls_id in boxes:
+            if cls_id not in classes:
+                continue
+            color = CLASS_COLORS.get(cls_id, (0, 255, 0))
+            p1 = (int(x1 * sx), int(y1 * sy))
+            cv2.rectangle(buf, p1, (int(x2 * sx), int(y2 * sy)), color, max(1, self._label_thick))
+            cv2.putText(buf, f"{names.get(cls_id, str(cls_id))} {conf:.2f}", (p1[0], max(14, p1[1] - 6)),
+                        cv2.FONT_HERSHEY_SIMPLEX, self._label_scale, color, self._label_thick)
+        cv2.putText(buf, f"Status: {status}", self._status_org, cv2.FONT_HERSHEY_SIMPLEX,
+                    self._status_scale, STATUS_COLORS.get(status, (0, 255, 0)), self._status_thick)
+        cv2.putText(buf, f"Attention: {attention}", self._attn_org, cv2.FONT_HERSHEY_SIMPLEX,
+                    self._status_scale, (255, 255, 255), self._status_thick)
+        return buf
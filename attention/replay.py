@@ -0,0 +1,195 @@
+# attention/replay.py
+# 실행: python -m attention.replay clip.mp4 [--model best.pt] [--json report.json]
+#       python -m attention.replay frames_dir/ --fps 30
+"""
+웹캠 없이 집중도 파이프라인을 돌려 보는 오프라인 재생 도구(회귀 벤치마크).
+
+영상 파일 또는 프레임 이미지 폴더를 pages/main.py 와 같은
+감지기 → 슬라이딩 윈도우 → 상태 머신에 통과시키고,
+  - 기록된 yawn_events / sleep_events (영상 내 시각 포함)
+  - 처리 속도(frames/sec), 프레임당 지연 p50/p95/p99
+를 보고한다. 임계값/모델/윈도우 로직을 바꿀 때마다 같은 클립으로 비교한다.
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .machine import FatigueStateMachine, build_machine
+
+YAWN_CLASS_INDEX = 2
+DROWSY_CLASS_INDEX = 3
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# ---------- 입력 ----------
+def iter_frames(source: str, fps: float | None = None, limit: int | None = None):
+    """(영상 내 시각(초), BGR 프레임) 을 순서대로 반환. 영상 파일/이미지 폴더 모두 지원."""
+    import cv2
+    if os.path.isdir(source):
+        files = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTS))
+        fps = fps or 30.0
+        for i, fn in enumerate(files[:limit] if limit else files):
+            img = cv2.imread(os.path.join(source, fn))
+            if img is not None:
+                yield i / fps, img
+        return
+    cap = cv2.VideoCapture(source)
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+    i = 0
+    while limit is None or i < limit:
+        ok, img = cap.read()
+        if not ok:
+            break
+        yield i / fps, img
+        i += 1
+    cap.release()
+
+
+def source_fps(source: str, default: float = 30.0) -> float:
+    if os.path.isdir(source):
+        return default
+    import cv2
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or default
+    cap.release()
+    return float(fps)
+
+
+# ---------- 결과 ----------
+@dataclass
+class ReplayResult:
+    frames: int = 0
+    wall_s: float = 0.0
+    infer_ms: list = field(default_factory=list)    # 감지기 추론 시간
+    step_ms: list = field(default_factory=list)     # 윈도우 + 상태 머신 시간
+    events: list = field(default_factory=list)      # {"t": 초, "kind": "yawn"/"sleep", "type": ...}
+    yawn_events: list = field(default_factory=list)
+    sleep_events: list = field(default_factory=list)
+    final_attention: int = 100
+
+    @staticmethod
+    def _pct(xs, q):
+        return float(np.percentile(xs, q)) if len(xs) else 0.0
+
+    def summary(self) -> dict:
+        total = [a + b for a, b in zip(self.infer_ms, self.step_ms)] if self.infer_ms else list(self.step_ms)
+        return {
+            "frames": self.frames,
+            "wall_s": round(self.wall_s, 3),
+            "fps": round(self.frames / self.wall_s, 1) if self.wall_s > 0 else 0.0,
+            "latency_ms": {q: round(self._pct(total, int(q[1:])), 3) for q in ("p50", "p95", "p99")},
+            "step_latency_ms": {q: round(self._pct(self.step_ms, int(q[1:])), 4) for q in ("p50", "p95", "p99")},
+            "yawn_count": sum(1 for e in self.yawn_events if e.get("type") == "yawn_end"),
+            "sleep_count": sum(1 for e in self.sleep_events if e.get("type") in ("end", "drowys_end")),
+            "final_attention": self.final_attention,
+        }
+
+
+# ---------- 재생 ----------
+def to_flags(stream):
+    """(t, boxes, 추론 ms) → (t, 하품 여부, 졸음 여부, 추론 ms)."""
+    for t, boxes, infer_ms in stream:
+        yield (t, any(b[5] == YAWN_CLASS_INDEX for b in boxes),
+               any(b[5] == DROWSY_CLASS_INDEX for b in boxes), infer_ms)
+
+
+def run_machine(stream, machine: FatigueStateMachine, t0: float | None = None,
+                result: ReplayResult | None = None) -> ReplayResult:
+    """
+    stream: (영상 내 시각(초), 하품 여부, 졸음 여부, 추론 ms 또는 None) 반복자.
+    상태 머신 시각은 t0 + 영상 시각을 사용(디바운스/하품 지속시간이 영상 기준으로 계산됨).
+    """
+    t0 = time.time() if t0 is None else t0
+    res = result or ReplayResult()
+    att = machine.attention
+    wall0 = time.perf_counter()
+    for t, is_y, is_d, infer_ms in stream:
+        ny, ns = len(att.yawn_events), len(att.sleep_events)
+        s0 = time.perf_counter()
+        machine.step(is_y, is_d, now=t0 + t)
+        res.step_ms.append((time.perf_counter() - s0) * 1000.0)
+        if infer_ms is not None:
+            res.infer_ms.append(infer_ms)
+        res.frames += 1
+        for ev in att.yawn_events[ny:]:
+            res.events.append({"t": round(t, 3), "kind": "yawn", "type": ev["type"]})
+        for ev in att.sleep_events[ns:]:
+            res.events.append({"t": round(t, 3), "kind": "sleep", "type": ev["type"]})
+    res.wall_s += time.perf_counter() - wall0
+    res.yawn_events = att.yawn_events
+    res.sleep_events = att.sleep_events
+    res.final_attention = att.score
+    return res
+
+
+def detect_stream(frames, detector, imgsz=640, conf=0.45, iou=0.5, classes=(YAWN_CLASS_INDEX, DROWSY_CLASS_INDEX)):
+    """프레임 반복자 → (t, boxes, 추론 ms) 반복자."""
+    for t, img in frames:
+        s0 = time.perf_counter()
+        boxes = detector.predict(img, imgsz=imgsz, conf=conf, iou=iou, classes=classes, max_det=10)
+        yield t, boxes, (time.perf_counter() - s0) * 1000.0
+
+
+def replay_source(source: str, detector, fps: float | None = None, avg_yawn: float = 1.0,
+                  imgsz: int = 640, conf: float = 0.45, limit: int | None = None,
+                  machine: FatigueStateMachine | None = None, recorder=None) -> ReplayResult:
+    """recorder(DetectionRecorder) 를 주면 프레임별 감지 결과를 함께 기록(→ attention.detcache)."""
+    fps = fps or source_fps(source)
+    machine = machine or build_machine(fps, avg_yawn=avg_yawn)
+    stream = detect_stream(iter_frames(source, fps, limit), detector, imgsz=imgsz, conf=conf)
+    if recorder is not None:
+        stream = recorder.tap(stream)
+    return run_machine(to_flags(stream), machine)
+
+
+def print_report(res: ReplayResult, label: str = ""):
+    s = res.summary()
+    print(f"== replay {label}".rstrip())
+    print(f"frames={s['frames']} wall={s['wall_s']}s fps={s['fps']}")
+    print("latency ms  p50={p50} p95={p95} p99={p99}".format(**s["latency_ms"]))
+    print("step ms     p50={p50} p95={p95} p99={p99}".format(**s["step_latency_ms"]))
+    print(f"yawn={s['yawn_count']} sleep={s['sleep_count']} final_attention={s['final_attention']}")
+    for ev in res.events:
+        print(f"  t={ev['t']:>8.2f}s  {ev['kind']:<5} {ev['type']}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("source", help="영상 파일 또는 프레임 이미지 폴더")
+    ap.add_argument("--model", default=os.getenv("ATTN_MODEL_PATH", "runs/detect/train24-mixtrain/weights/best.pt"))
+    ap.add_argument("--fps", type=float, default=None, help="프레임 폴더/영상 fps (기본: 영상 메타데이터, 폴더는 30)")
+    ap.add_argument("--avg-yawn", type=float, default=1.0, help="사용자 평균 하품 시간(초)")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--conf", type=float, default=0.45)
+    ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--json", default=None, help="결과를 JSON 으로 저장")
+    ap.add_argument("--record", default=None, help="프레임별 감지 결과를 .npz 로 저장(attention.sweep 입력)")
+    args = ap.parse_args()
+
+    from .backends import load_detector
+    detector = load_detector(args.model)
+    fps = args.fps or source_fps(args.source)
+    recorder = None
+    if args.record:
+        from .detcache import DetectionRecorder
+        recorder = DetectionRecorder(fps=fps, source=args.source, model=args.model,
+                                     imgsz=args.imgsz, conf=args.conf)
+    res = replay_source(args.source, detector, fps=fps, avg_yawn=args.avg_yawn,
+                        imgsz=args.imgsz, conf=args.conf, limit=args.limit, recorder=recorder)
+    print_report(res, args.source)
+    if recorder is not None:
+        recorder.save(args.record)
+        print(f"saved detections → {args.record} ({recorder.frames} frames, {recorder.boxes} boxes)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"source": args.source, "model": args.model, "summary": res.summary(),
+                       "events": res.events, "yawn_events": res.yawn_events,
+                       "sleep_events": res.sleep_events}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
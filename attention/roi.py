@@ -0,0 +1,107 @@
+# attention/roi.py
+# -*- coding: utf-8 -*-
+"""
+얼굴 영역(ROI) 크롭 추적기.
+
+노트북 앞 한 사람만 찍히는 환경에서는 하품/졸음 박스가 항상 얼굴 주변에만 뜬다.
+직전 감지 박스를 여유 있게 감싼 영역만 잘라 더 작은 imgsz 로 추론하고,
+N 번마다 또는 추적을 잃으면 전체 프레임으로 다시 찾는다.
+"""
+
+
+class FaceRoiTracker:
+    """
+    - pad        : 박스 크기 대비 사방 여유 비율
+    - min_side   : 크롭 최소 한 변(px) — 너무 작게 잘려 문맥을 잃지 않도록
+    - full_every : 크롭 추론 N 번마다 전체 프레임 1번
+    - max_misses : 크롭에서 연속 N 번 박스가 없으면 추적 해제
+    - smooth     : 박스 위치 EMA 계수(0 이면 최신값 그대로)
+    """
+
+    def __init__(self, pad: float = 0.6, min_side: int = 224, full_every: int = 30,
+                 max_misses: int = 3, smooth: float = 0.5):
+        self.pad = float(pad)
+        self.min_side = int(min_side)
+        self.full_every = int(full_every)
+        self.max_misses = int(max_misses)
+        self.smooth = float(smooth)
+
+        self._box = None            # 추적 중인 박스 (x1, y1, x2, y2) float
+        self._since_full = 0
+        self._misses = 0
+        self.full_passes = 0
+        self.crop_passes = 0
+        self.lost = 0
+
+    @property
+    def tracking(self) -> bool:
+        return self._box is not None
+
+    def reset(self):
+        self._box = None
+        self._since_full = 0
+        self._misses = 0
+
+    def next_roi(self, frame_shape) -> tuple[int, int, int, int] | None:
+        """이번 추론에 쓸 크롭 영역 (x0, y0, x1, y1). None 이면 전체 프레임."""
+        if self._box is None or self._since_full >= self.full_every:
+            return None
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = self._box
+        cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+        side = max(x2 - x1, y2 - y1) * (1.0 + 2.0 * self.pad)
+        side = min(max(side, self.min_side), w, h)
+        half = side / 2.0
+        # 프레임 밖으로 나가면 안쪽으로 밀어 넣기(크기 유지)
+        x0 = int(min(max(cx - half, 0), w - side))
+        y0 = int(min(max(cy - half, 0), h - side))
+        return x0, y0, int(x0 + side), int(y0 + side)
+
+    def update(self, boxes, roi):
+        """
+        추론 결과(프레임 좌표로 환산된 박스 목록) 반영.
+        boxes: [(x1, y1, x2, y2, ...), ...]
+        """
+        if roi is None:
+            self.full_passes += 1
+            self._since_full = 0
+        else:
+            self.crop_passes += 1
+            self._since_full += 1
+
+        if boxes:
+            ux1 = min(b[0] for b in boxes); uy1 = min(b[1] for b in boxes)
+            ux2 = max(b[2] for b in boxes); uy2 = max(b[3] for b in boxes)
+            new = (float(ux1), float(uy1), float(ux2), float(uy2))
+            if self._box is None or self.smooth <= 0:
+                self._box = new
+            else:
+                a = self.smooth
+                self._box = tuple(a * o + (1 - a) * n for o, n in zip(self._box, new))
+            self._misses = 0
+            return
+
+        self._misses += 1
+        if roi is None or self._misses >= self.max_misses:
+            if self._box is not None:
+                self.lost += 1
+            self._box = None
+            self._misses = 0
+
+    def stats(self) -> dict:
+        total = self.full_passes + self.crop_passes
+        return {
+            "tracking": self.tracking,
+            "full_passes": self.full_passes,
+            "crop_passes": self.crop_passes,
+            "crop_ratio": round(self.crop_passes / total, 3) if total else 0.0,
+            "lost": self.lost,
+        }
+
+
+def offset_boxes(boxes, roi):
+    """크롭 좌표 박스를 원본 프레임 좌표로 이동."""
+    if roi is None:
+        return list(boxes)
+    x0, y0 = roi[0], roi[1]
+    return [(b[0] + x0, b[1] + y0, b[2] + x0, b[3] + y0) + tuple(b[4:]) for b in boxes]
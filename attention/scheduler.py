@@ -0,0 +1,115 @@
+# attention/scheduler.py
+# -*- coding: utf-8 -*-
+"""
+추론 지연 기반 적응형 스케줄러.
+
+SKIP / IMGSZ 를 고정하면 CPU 전용 PC 에서는 매 프레임 640px 추론이 밀린다.
+측정한 추론 지연으로 (입력 크기, 프레임 스킵) 운영점을 골라
+"원본 프레임 1장당 추론 비용(= 지연 / skip)" 이 예산 안에 들도록 유지한다.
+또 실제 감지 결과가 들어오는 속도(det_fps)를 재서, 하품/졸음 윈도우를
+초 단위 설정 → 프레임 수로 다시 환산할 수 있게 한다.
+"""
+import time
+
+# 품질 높은 순서 → 가벼운 순서
+DEFAULT_LEVELS: tuple[tuple[int, int], ...] = (
+    (640, 1), (480, 1), (320, 1), (320, 2), (320, 3), (320, 4),
+)
+
+
+class AdaptiveScheduler:
+    """
+    - budget_ms  : 원본 프레임 1장당 허용 추론 비용(ms). 30fps 면 33ms
+    - levels     : (imgsz, skip) 운영점 목록(무거운 것 → 가벼운 것)
+    - patience   : 연속 몇 번 예산을 벗어나야 한 단계 내릴지
+    - cooldown_s : 단계 변경 후 다음 변경까지 최소 대기(초)
+    """
+
+    def __init__(self, budget_ms: float, levels=DEFAULT_LEVELS, start_level: int = 0,
+                 patience: int = 5, cooldown_s: float = 3.0, up_margin: float = 0.7):
+        self.budget_ms = float(budget_ms)
+        self.levels = tuple(levels)
+        self.level = max(0, min(int(start_level), len(self.levels) - 1))
+        self.patience = int(patience)
+        self.cooldown_s = float(cooldown_s)
+        self.up_margin = float(up_margin)
+
+        self.ema_latency_ms = 0.0
+        self.det_fps = 0.0                # 실제 감지 결과 도착 속도
+        self.changes = 0
+        self._over = 0
+        self._under = 0
+        self._samples = 0
+        self._last_change_ts = 0.0
+        self._last_det_ts = None
+
+    # ---------- 현재 운영점 ----------
+    @property
+    def imgsz(self) -> int:
+        return self.levels[self.level][0]
+
+    @property
+    def skip(self) -> int:
+        return self.levels[self.level][1]
+
+    def operating_point(self) -> dict:
+        return {
+            "level": self.level,
+            "imgsz": self.imgsz,
+            "skip": self.skip,
+            "ema_latency_ms": round(self.ema_latency_ms, 1),
+            "det_fps": round(self.det_fps, 1),
+            "budget_ms": round(self.budget_ms, 1),
+            "changes": self.changes,
+        }
+
+    # ---------- 측정 ----------
+    def _cost(self, latency_ms: float, level: int) -> float:
+        """현재 지연을 다른 운영점으로 환산한 프레임당 비용(입력 면적 비례 가정)."""
+        sz, skip = self.levels[level]
+        scaled = latency_ms * (sz / self.imgsz) ** 2
+        return scaled / skip
+
+    def record(self, latency_ms: float, now: float | None = None, imgsz: int | None = None) -> bool:
+        """
+        감지 결과 1건 반영. 운영점이 바뀌었으면 True.
+        imgsz: 그 추론에 실제로 쓴 입력 크기(얼굴 크롭 등으로 현재 운영점보다 작을 수 있음)
+               → 면적 비율로 현재 imgsz 기준 지연으로 환산해서 반영
+        """
+        now = time.time() if now is None else now
+        if imgsz and imgsz != self.imgsz:
+            latency_ms = latency_ms * (self.imgsz / imgsz) ** 2
+        self._samples += 1
+        a = 0.2
+        self.ema_latency_ms = latency_ms if self._samples == 1 else ((1 - a) * self.ema_latency_ms + a * latency_ms)
+        if self._last_det_ts is not None:
+            dt = max(1e-3, now - self._last_det_ts)
+            inst = 1.0 / dt
+            self.det_fps = inst if self.det_fps == 0.0 else (0.8 * self.det_fps + 0.2 * inst)
+        self._last_det_ts = now
+
+        cost = self._cost(self.ema_latency_ms, self.level)
+        if cost > self.budget_ms:
+            self._over += 1; self._under = 0
+        elif self.level > 0 and self._cost(self.ema_latency_ms, self.level - 1) < self.budget_ms * self.up_margin:
+            self._under += 1; self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if now - self._last_change_ts < self.cooldown_s:
+            return False
+        if self._over >= self.patience and self.level < len(self.levels) - 1:
+            return self._move(self.level + 1, now)
+        # 올릴 때는 더 보수적으로(patience 의 3배)
+        if self._under >= self.patience * 3 and self.level > 0:
+            return self._move(self.level - 1, now)
+        return False
+
+    def _move(self, level: int, now: float) -> bool:
+        # 입력 크기가 바뀌면 지연 추정치도 면적 비율로 옮겨 둔다
+        self.ema_latency_ms = self.ema_latency_ms * (self.levels[level][0] / self.imgsz) ** 2
+        self.level = level
+        self.changes += 1
+        self._over = self._under = 0
+        self._last_change_ts = now
+        return True
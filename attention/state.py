@@ -0,0 +1,50 @@
+# attention/state.py
+# -*- coding: utf-8 -*-
+"""
+집중도 점수 상태.
+
+기존에는 매 프레임 yawn_events / sleep_events 전체를 훑어
+yawn_end / drowys_end 개수를 셌다(세션이 길수록 느려짐).
+여기서는 이벤트를 추가하는 시점에 카운터를 올려 점수를 O(1) 로 계산한다.
+"""
+
+YAWN_END_TYPES = ("yawn_end",)
+SLEEP_END_TYPES = ("end", "drowys_end")   # 타이포(drowys) 포함 그대로
+
+
+class AttentionState:
+    """
+    하품/졸음 이벤트 목록 + 종료 이벤트 카운터.
+
+    score = base - sleep_penalty * 졸음 종료 수 - yawn_penalty * 하품 종료 수
+    (세션 시작 전부터 있던 이벤트는 세지 않는다 — 기존 initial_*_len 기준과 동일)
+    """
+
+    def __init__(self, yawn_events: list | None = None, sleep_events: list | None = None,
+                 base: int = 100, yawn_penalty: int = 2, sleep_penalty: int = 5):
+        self.yawn_events = yawn_events if yawn_events is not None else []
+        self.sleep_events = sleep_events if sleep_events is not None else []
+        self.base = int(base)
+        self.yawn_penalty = int(yawn_penalty)
+        self.sleep_penalty = int(sleep_penalty)
+        self.yawn_count = 0
+        self.sleep_count = 0
+
+    def add_yawn_event(self, ev: dict):
+        self.yawn_events.append(ev)
+        if ev.get("type") in YAWN_END_TYPES:
+            self.yawn_count += 1
+
+    def add_sleep_event(self, ev: dict):
+        self.sleep_events.append(ev)
+        if ev.get("type") in SLEEP_END_TYPES:
+            self.sleep_count += 1
+
+    @property
+    def raw_score(self) -> int:
+        return self.base - (self.sleep_penalty * self.sleep_count) - (self.yawn_penalty * self.yawn_count)
+
+    @property
+    def score(self) -> int:
+        """0~100 으로 자른 집중도."""
+        return max(0, min(100, self.raw_score))
@@ -0,0 +1,120 @@
+# attention/sweep.py
+# 실행: python -m attention.sweep dets.npz --on 0.35,0.45,0.55 --off 0.25,0.35 --debounce 0.2,0.3,0.5 \
+#         [--labels labels.json] [--csv sweep.csv]
+"""
+저장된 감지 결과(attention.detcache)로 상태 머신 파라미터 격자를 훑는다. YOLO 는 돌리지 않는다.
+
+labels.json (선택): 영상 내 실제 구간(초)
+  {"yawn": [[12.0, 14.5], ...], "sleep": [[40.0, 47.0], ...]}
+주면 조합마다 start 이벤트 기준 precision / recall / F1 을 계산해 F1 순으로 정렬한다.
+"""
+import argparse
+import csv
+import itertools
+import json
+import time
+
+from .detcache import DetectionCache
+from .machine import build_machine
+from .replay import run_machine
+
+
+def _floats(s: str) -> list[float]:
+    return [float(x) for x in s.split(",") if x.strip()]
+
+
+def match_events(events, intervals, kind: str, tol: float = 1.0) -> dict:
+    """start 이벤트가 실제 구간(±tol) 안에 있으면 적중. 구간당 1회만 인정."""
+    starts = [e["t"] for e in events if e["kind"] == kind and e["type"] == "start"]
+    hit_starts, hit_iv = 0, set()
+    for t in starts:
+        for k, (s, e) in enumerate(intervals):
+            if s - tol <= t <= e + tol:
+                hit_starts += 1
+                hit_iv.add(k)
+                break
+    p = hit_starts / len(starts) if starts else (1.0 if not intervals else 0.0)
+    r = len(hit_iv) / len(intervals) if intervals else 1.0
+    f1 = 2 * p * r / (p + r) if (p + r) else 0.0
+    return {"precision": round(p, 3), "recall": round(r, 3), "f1": round(f1, 3)}
+
+
+def sweep(cache: DetectionCache, grid: dict, labels: dict | None = None, tol: float = 1.0) -> list[dict]:
+    keys = list(grid)
+    rows = []
+    flag_cache = {}
+    for values in itertools.product(*(grid[k] for k in keys)):
+        p = dict(zip(keys, values))
+        if p["threshold_off"] > p["threshold_on"]:
+            continue
+        min_conf = p.pop("min_conf")
+        if min_conf not in flag_cache:
+            flag_cache[min_conf] = cache.flags(min_conf)
+        yawn, drowsy = flag_cache[min_conf]
+        machine = build_machine(cache.fps, **p)
+        stream = zip(cache.t.tolist(), yawn.tolist(), drowsy.tolist(), itertools.repeat(None))
+        res = run_machine(stream, machine, t0=0.0)
+        s = res.summary()
+        row = {**p, "min_conf": min_conf, "yawn_count": s["yawn_count"], "sleep_count": s["sleep_count"],
+               "final_attention": s["final_attention"], "fps": s["fps"]}
+        if labels is not None:
+            my = match_events(res.events, labels.get("yawn", []), "yawn", tol)
+            ms = match_events(res.events, labels.get("sleep", []), "sleep", tol)
+            row.update({f"yawn_{k}": v for k, v in my.items()})
+            row.update({f"sleep_{k}": v for k, v in ms.items()})
+            row["f1"] = round((my["f1"] + ms["f1"]) / 2, 3)
+        rows.append(row)
+    if labels is not None:
+        rows.sort(key=lambda r: r["f1"], reverse=True)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cache", help="attention.replay --record 로 만든 .npz")
+    ap.add_argument("--on", default="0.45", help="하품 켜짐 임계값 목록(쉼표 구분)")
+    ap.add_argument("--off", default="0.35", help="하품 꺼짐 임계값 목록")
+    ap.add_argument("--debounce", default="0.3", help="상태 전이 최소 간격(초) 목록")
+    ap.add_argument("--window-sec", default="3", help="하품 윈도우 길이(초) 목록")
+    ap.add_argument("--drowsy-sec", default="2", help="졸음 윈도우 길이(초) 목록")
+    ap.add_argument("--avg-yawn", default="1.0", help="사용자 평균 하품 시간(초) 목록")
+    ap.add_argument("--min-conf", default="0", help="박스 신뢰도 하한 목록(기록 당시 conf 이상만 의미 있음)")
+    ap.add_argument("--labels", default=None)
+    ap.add_argument("--tol", type=float, default=1.0, help="라벨 구간 허용 오차(초)")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--csv", default=None)
+    args = ap.parse_args()
+
+    cache = DetectionCache.load(args.cache)
+    labels = None
+    if args.labels:
+        with open(args.labels, encoding="utf-8") as f:
+            labels = json.load(f)
+    grid = {
+        "threshold_on": _floats(args.on),
+        "threshold_off": _floats(args.off),
+        "debounce_sec": _floats(args.debounce),
+        "window_seconds": _floats(args.window_sec),
+        "drowsy_seconds": _floats(args.drowsy_sec),
+        "avg_yawn": _floats(args.avg_yawn),
+        "min_conf": _floats(args.min_conf),
+    }
+    t0 = time.perf_counter()
+    rows = sweep(cache, grid, labels, args.tol)
+    dt = time.perf_counter() - t0
+    print(f"cache={args.cache} frames={len(cache)} fps={cache.fps:g} combos={len(rows)} "
+          f"elapsed={dt:.2f}s ({len(rows) * len(cache) / max(dt, 1e-9):,.0f} frames/s)")
+    if rows:
+        cols = list(rows[0])
+        print(" ".join(f"{c:>14}" for c in cols))
+        for r in rows[:args.top]:
+            print(" ".join(f"{r[c]:>14}" for c in cols))
+    if args.csv and rows:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
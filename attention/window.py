@@ -0,0 +1,154 @@
+# attention/window.py
+# -*- coding: utf-8 -*-
+"""
+하품/졸음 슬라이딩 윈도우 판정기.
+
+기존 콜백은 매 프레임 deque 전체를 돌면서
+  - 선형 가중치 합(sum(w for yawning, w in zip(window, weights) if yawning))
+  - 뒤에서부터 연속 하품 프레임 수(continuous_count)
+  - 졸음 프레임 수(sum(drowsy_window))
+를 다시 계산했다(O(window)). 여기서는 NumPy 링버퍼에 최근 비트를 보관하고
+위 세 값을 프레임당 O(1) 로 갱신한다.
+
+가중치 합은 정수(위치 1..n 의 합)로 유지하므로 누적 오차가 없다.
+가중치 i/W 의 float 합을 쓰던 기존 방식과 판정이 달라지려면
+threshold * W(W+1)/2 가 정수에 float 오차 이내로 붙어 있어야 하는데,
+현재 설정(W=90/180/360, 0.35/0.40/0.45)에서는 해당 사항이 없다.
+(python -m attention.bench_window 가 기존 구현과 판정을 프레임 단위로 대조)
+"""
+import numpy as np
+
+
+class YawnDrowsyWindow:
+    """
+    하품(선형 가중 + 연속 프레임) / 졸음(비율) 판정용 링버퍼.
+
+    - window_size      : 하품 윈도우 길이(프레임)  ex) 30fps * 3s = 90
+    - drowsy_frames    : 졸음 윈도우 길이(프레임)  ex) 30fps * 2s = 60
+    - min_yawn_frames  : 하품으로 인정할 최소 연속 프레임 수(초과해야 인정)
+    - threshold_on/off : 히스테리시스 임계값(하품 아님→하품 / 하품 유지)
+    - drowsy_ratio     : 졸음 윈도우에서 졸음 프레임 비율(기본 80%)
+    - drowsy_min_frames: 졸음 인정 최소 프레임 수를 직접 지정(없으면 int(drowsy_frames * ratio))
+    """
+
+    def __init__(self, window_size: int, drowsy_frames: int, min_yawn_frames: int,
+                 threshold_on: float = 0.45, threshold_off: float = 0.35,
+                 drowsy_ratio: float = 0.8, drowsy_min_frames: int | None = None):
+        self.threshold_on = float(threshold_on)
+        self.threshold_off = float(threshold_off)
+        self.min_yawn_frames = int(min_yawn_frames)
+        self.drowsy_ratio = float(drowsy_ratio)
+        self._drowsy_min_override = drowsy_min_frames
+        self._alloc(window_size, drowsy_frames)
+
+    # ---------- 내부 ----------
+    def _alloc(self, window_size: int, drowsy_frames: int):
+        self.window_size = max(1, int(window_size))
+        self.drowsy_frames = max(1, int(drowsy_frames))
+        if self._drowsy_min_override is not None:
+            self.drowsy_min_frames = int(self._drowsy_min_override)
+        else:
+            self.drowsy_min_frames = int(self.drowsy_frames * self.drowsy_ratio)
+
+        # 하품 링버퍼: 가장 오래된 값의 위치 = _y_head, 길이 = _y_len
+        self._y_buf = np.zeros(self.window_size, dtype=np.bool_)
+        self._y_head = 0
+        self._y_len = 0
+        self._y_count = 0          # 윈도우 내 하품 프레임 수
+        self._y_wsum = 0           # Σ (위치 1..n) * 하품여부  (정수)
+        self._y_run = 0            # 뒤에서부터 연속 하품 프레임 수(윈도우 길이로 상한)
+        self._w_total = self.window_size * (self.window_size + 1) // 2
+
+        # 졸음 링버퍼
+        self._d_buf = np.zeros(self.drowsy_frames, dtype=np.bool_)
+        self._d_head = 0
+        self._d_len = 0
+        self._d_count = 0
+
+    # ---------- 공개 API ----------
+    def reset(self):
+        self._alloc(self.window_size, self.drowsy_frames)
+
+    def push(self, is_yawning: bool, is_drowsy: bool):
+        """프레임 1장의 감지 결과를 윈도우에 추가(O(1))."""
+        self._push_yawn(1 if is_yawning else 0)
+        self._push_drowsy(1 if is_drowsy else 0)
+
+    def _push_yawn(self, y: int):
+        W = self.window_size
+        if self._y_len < W:
+            # 아직 윈도우가 덜 찼으면 새 값은 위치 n+1
+            self._y_buf[(self._y_head + self._y_len) % W] = y
+            self._y_len += 1
+            self._y_wsum += self._y_len * y
+            self._y_count += y
+        else:
+            # 가장 오래된 값 제거 → 남은 값들의 위치가 1씩 당겨짐(Σ 에서 count 만큼 감소)
+            old = int(self._y_buf[self._y_head])
+            self._y_wsum -= self._y_count
+            self._y_count -= old
+            self._y_buf[self._y_head] = y
+            self._y_head = (self._y_head + 1) % W
+            self._y_wsum += W * y
+            self._y_count += y
+        self._y_run = min(self._y_run + 1, self._y_len) if y else 0
+
+    def _push_drowsy(self, d: int):
+        D = self.drowsy_frames
+        if self._d_len < D:
+            self._d_buf[(self._d_head + self._d_len) % D] = d
+            self._d_len += 1
+        else:
+            self._d_count -= int(self._d_buf[self._d_head])
+            self._d_buf[self._d_head] = d
+            self._d_head = (self._d_head + 1) % D
+        self._d_count += d
+
+    @staticmethod
+    def _ordered(buf, head: int, length: int):
+        """링버퍼 내용을 오래된 순서로 반환."""
+        return buf[(head + np.arange(length)) % buf.size]
+
+    def resize(self, window_size: int, drowsy_frames: int, min_yawn_frames: int | None = None):
+        """
+        윈도우 길이 변경(감지 속도가 바뀌었을 때 초 단위 의미 유지용).
+        기존 값 중 새 길이에 들어가는 최근 부분만 다시 채운다.
+        """
+        if min_yawn_frames is not None:
+            self.min_yawn_frames = int(min_yawn_frames)
+        if int(window_size) == self.window_size and int(drowsy_frames) == self.drowsy_frames:
+            return
+        ys = self._ordered(self._y_buf, self._y_head, self._y_len)
+        ds = self._ordered(self._d_buf, self._d_head, self._d_len)
+        self._alloc(window_size, drowsy_frames)
+        for y in ys[-self.window_size:]:
+            self._push_yawn(int(y))
+        for d in ds[-self.drowsy_frames:]:
+            self._push_drowsy(int(d))
+
+    @property
+    def weighted_ratio(self) -> float:
+        """선형 가중 하품 비율 (윈도우가 덜 차도 분모는 전체 가중치 합)."""
+        return self._y_wsum / self._w_total
+
+    @property
+    def continuous_count(self) -> int:
+        return self._y_run
+
+    @property
+    def drowsy_count(self) -> int:
+        return self._d_count
+
+    def is_yawning(self, yawning_now: bool) -> bool:
+        """현재 상태(yawning_now) 기준 히스테리시스 하품 판정."""
+        if self._y_run <= self.min_yawn_frames:
+            return False
+        th = self.threshold_off if yawning_now else self.threshold_on
+        return self.weighted_ratio > th
+
+    def is_sleeping(self) -> bool:
+        return self._d_count >= self.drowsy_min_frames
+
+    def decide(self, yawning_now: bool) -> tuple[bool, bool]:
+        """(new_yawning, new_sleeping) 반환."""
+        return self.is_yawning(yawning_now), self.is_sleeping()
@@ -0,0 +1,127 @@
+# attention/worker.py
+# -*- coding: utf-8 -*-
+"""
+백그라운드 추론 워커.
+
+WebRTC 콜백 스레드에서 model.predict 를 직접 돌리면 추론이 느릴 때
+반환 프레임까지 같이 밀려 화면이 끊긴다. 워커는 단일 슬롯 우편함에서
+가장 최근 프레임 하나만 꺼내 추론하고(밀린 프레임은 버림), 결과를
+게시해 두면 콜백은 그 시점의 프레임 위에 마지막 결과를 덧그리기만 한다.
+
+infer_fn 은 박스 목록을 돌려주거나, (박스 목록, {"imgsz": 실제 입력 크기, "infer_ms": 이 프레임의
+순수 forward 시간}) 를 돌려줄 수 있다(배치 추론이면 latency_ms 에 큐 대기가 섞이므로).
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+# (x1, y1, x2, y2, conf, cls_id)
+Box = tuple[int, int, int, int, float, int]
+
+
+@dataclass
+class Detection:
+    seq: int                              # 추론한 프레임 번호(submit 순번)
+    boxes: list[Box] = field(default_factory=list)
+    latency_ms: float = 0.0               # 추론 소요 시간
+    frame_shape: tuple | None = None      # 추론한 프레임의 (h, w)
+    imgsz: int | None = None              # 실제로 쓴 모델 입력 크기(infer_fn 이 알려 준 경우)
+    infer_ms: float | None = None         # 큐 대기를 뺀 이 프레임 몫의 forward 시간(배치 추론)
+    done_ts: float = 0.0
+
+    def has_class(self, cls_id: int) -> bool:
+        return any(b[5] == cls_id for b in self.boxes)
+
+
+class InferenceWorker:
+    """
+    infer_fn(frame) -> list[Box] 를 별도 스레드에서 실행.
+
+    - submit(frame): 우편함에 넣기(이전 프레임이 아직 처리 전이면 버리고 dropped +1)
+    - latest()     : 가장 최근 게시된 Detection (없으면 None)
+    - stats()      : submitted / inferred / dropped / 지연(ms) 통계
+    """
+
+    def __init__(self, infer_fn, name: str = "attention-infer"):
+        self._infer_fn = infer_fn
+        self._cond = threading.Condition()
+        self._slot = None                 # (seq, frame)
+        self._latest: Detection | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        self.submitted = 0
+        self.inferred = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_latency_ms = 0.0
+        self._ema_latency_ms = 0.0
+
+    # ---------- 수명 ----------
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    # ---------- 생산자(콜백) ----------
+    def submit(self, frame) -> int:
+        with self._cond:
+            self.submitted += 1
+            if self._slot is not None:
+                self.dropped += 1         # 아직 안 꺼낸 이전 프레임은 폐기
+            self._slot = (self.submitted, frame)
+            self._cond.notify()
+            return self.submitted
+
+    def latest(self) -> Detection | None:
+        return self._latest
+
+    # ---------- 소비자(워커 스레드) ----------
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while self._slot is None and not self._stop.is_set():
+                    self._cond.wait(0.5)
+                if self._stop.is_set():
+                    return
+                seq, frame = self._slot
+                self._slot = None
+
+            t0 = time.perf_counter()
+            try:
+                out = self._infer_fn(frame)
+            except Exception as e:
+                self.errors += 1
+                print("inference worker error:", e)
+                continue
+            lat = (time.perf_counter() - t0) * 1000.0
+            boxes, info = out if isinstance(out, tuple) else (out, {})
+
+            self.inferred += 1
+            self.last_latency_ms = lat
+            self._ema_latency_ms = lat if self.inferred == 1 else (0.9 * self._ema_latency_ms + 0.1 * lat)
+            # 참조 교체 한 번으로 게시(콜백 쪽은 락 없이 읽음)
+            self._latest = Detection(seq=seq, boxes=list(boxes), latency_ms=lat,
+                                     frame_shape=tuple(frame.shape[:2]) if hasattr(frame, "shape") else None,
+                                     imgsz=info.get("imgsz"), infer_ms=info.get("infer_ms"), done_ts=time.time())
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "inferred": self.inferred,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_latency_ms": round(self.last_latency_ms, 1),
+            "avg_latency_ms": round(self._ema_latency_ms, 1),
+        }
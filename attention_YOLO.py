@@ -2,16 +2,18 @@ import cv2
 import time
 import json
 import os
-from collections import deque
+import math
 from datetime import datetime
-from ultralytics import YOLO
+from attention.window import YawnDrowsyWindow
+from attention.state import AttentionState
+from attention.backends import load_detector
 
 # 사용자 ID 기반 저장 파일
 USER_ID = "user01"
 USER_DATA_PATH = f"user_yawn_data_{USER_ID}.json"
 
-# YOLO 모델 로드
-model = YOLO("runs/detect/train24-mixtrain/weights/best.pt")
+# YOLO 모델 로드 (.pt / .onnx / OpenVINO .xml)
+model = load_detector(os.getenv("ATTN_MODEL_PATH", "runs/detect/train24-mixtrain/weights/best.pt"))
 YAWN_CLASS_INDEX = 2       # 하품 클래스 인덱스 (yawning)
 DROWSY_CLASS_INDEX = 3     # 졸음 클래스 인덱스 (drowsy eyes)
 
@@ -39,23 +41,19 @@ def save_user_data(data):
 user_data = load_user_data()
 yawn_events = user_data.get("yawn_events", [])
 sleep_events = user_data.get("sleep_events", [])
-# 세션 시작 시 인덱스 기준 저장
-initial_yawn_len = len(yawn_events)
-initial_sleep_len = len(sleep_events)
 BASE_ATTENTION = 100
+# 기존 이벤트 목록에 이어 붙이되, 점수 카운터는 이번 세션에 추가된 이벤트만 반영
+attention_state = AttentionState(yawn_events, sleep_events, base=BASE_ATTENTION)
 
 # 슬라이딩 윈도우 설정
 cap = cv2.VideoCapture(0)
 FPS = cap.get(cv2.CAP_PROP_FPS) or 30
 WINDOW_SECONDS = 3
 WINDOW_SIZE = int(FPS * WINDOW_SECONDS)
-yawn_window = deque(maxlen=WINDOW_SIZE)
-weights = [i / WINDOW_SIZE for i in range(1, WINDOW_SIZE + 1)]
 
 # 졸음 감지용 슬라이딩 윈도우
 DROWSY_SECONDS = 2
 DROWSY_FRAMES = int(FPS * DROWSY_SECONDS)
-drowsy_window = deque(maxlen=DROWSY_FRAMES)
 
 # 개인화된 감지 기준
 threshold_ratio = user_data["threshold_ratio"]
@@ -63,62 +61,50 @@ threshold_ratio = user_data["threshold_ratio"]
 dynamic_sec = max(0.5, min(user_data["avg_yawn_duration"] - 0.2, 2.5))  # 0.5초 이상 2.5초 이하
 user_data["min_duration_sec"] = dynamic_sec
 min_yawn_duration = int(FPS * dynamic_sec)
+# 히스테리시스 없이 단일 임계값(on == off), 졸음은 DROWSY_FRAMES * 0.8 이상
+window = YawnDrowsyWindow(WINDOW_SIZE, DROWSY_FRAMES, min_yawn_duration,
+                          threshold_on=threshold_ratio, threshold_off=threshold_ratio,
+                          drowsy_min_frames=math.ceil(DROWSY_FRAMES * 0.8))
 yawning = False
 sleeping = False
 yawn_start_time = None
 sleep_start_time = None
 durations = []
 
-def detect_yawn(result):
-    return any(int(box[5]) == YAWN_CLASS_INDEX for box in result.boxes.data)
+def detect_yawn(boxes):
+    return any(box[5] == YAWN_CLASS_INDEX for box in boxes)
 
-def detect_drowsy(result):
-    return any(int(box[5]) == DROWSY_CLASS_INDEX for box in result.boxes.data)
+def detect_drowsy(boxes):
+    return any(box[5] == DROWSY_CLASS_INDEX for box in boxes)
 
 while True:
     ret, frame = cap.read()
     if not ret:
         break
 
-    results = model.predict(frame, conf=0.5, verbose=False)[0]
+    results = model.predict(frame, conf=0.5, iou=0.7, max_det=300)
     is_yawning = detect_yawn(results)
     is_drowsy = detect_drowsy(results)
-    yawn_window.append(is_yawning)
-    drowsy_window.append(is_drowsy)
+    window.push(is_yawning, is_drowsy)
 
     # 바운딩박스 시각화
-    for box in results.boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        conf = float(box.conf[0])
-        cls_id = int(box.cls[0])
-        label = f"{model.names[cls_id]} {conf:.2f}"
+    for x1, y1, x2, y2, conf, cls_id in results:
+        label = f"{model.names.get(cls_id, str(cls_id))} {conf:.2f}"
         color = (0, 0, 255) if cls_id == YAWN_CLASS_INDEX else (255, 255, 0) if cls_id == DROWSY_CLASS_INDEX else (0, 255, 0)
         cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
         cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2) #제거해도 상관X 
         
     # 실시간 attention 계산은 새롭게 쌓인 이벤트만 대상으로 함
-    yawn_count = sum(1 for event in yawn_events[initial_yawn_len:] if event["type"] == "yawn_end")
-    sleep_count = sum(1 for event in sleep_events[initial_sleep_len:] if event["type"] in ["end", "drowys_end"])
-    attention_score = BASE_ATTENTION - (5 * sleep_count) - (2 * yawn_count)
+    attention_score = attention_state.raw_score
 
 
     # 하품 판단
-    weighted_sum = sum(w for yawning, w in zip(yawn_window, weights) if yawning)
-    weighted_ratio = weighted_sum / sum(weights)
-
-    continuous_count = 0
-    for status in reversed(yawn_window):
-        if status:
-            continuous_count += 1
-        else:
-            break
-
-    if weighted_ratio > threshold_ratio and continuous_count > min_yawn_duration:
+    if window.is_yawning(yawning):
         if not yawning:
             print("🟠 하품 시작")
             yawning = True
             yawn_start_time = time.time()
-            yawn_events.append({
+            attention_state.add_yawn_event({
                 "type": "start",
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
@@ -130,7 +116,7 @@ while True:
                 duration = time.time() - yawn_start_time
                 durations.append(duration)
                 yawn_start_time = None
-            yawn_events.append({
+            attention_state.add_yawn_event({
                 "type": "yawn_end",
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "avg_yawn_duration" : round((sum(durations) / len(durations)),2),
@@ -138,12 +124,12 @@ while True:
             })
 
     # 졸음 판단
-    if sum(drowsy_window) >= DROWSY_FRAMES * 0.8:
+    if window.is_sleeping():
         if not sleeping:
             print("🔴 졸음 감지됨")
             sleeping = True
             sleep_start_time = time.time()
-            sleep_events.append({
+            attention_state.add_sleep_event({
                 "type": "start",
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
@@ -152,7 +138,7 @@ while True:
             print("🟢 졸음 해제")
             sleeping = False
             if sleep_start_time:
-                sleep_events.append({
+                attention_state.add_sleep_event({
                     "type": "drowys_end",
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     "attention_score": attention_score
@@ -1,17 +1,25 @@
 # pages/main.py
 # -*- coding: utf-8 -*-
 import streamlit as st
+import streamlit.components.v1 as components
 from streamlit_webrtc import webrtc_streamer
 import av
 import cv2
 import os, json, time, base64
-from collections import deque
 from datetime import datetime
 import math
 from components.header import render_header
 import requests
 from components.auth import require_login
 from streamlit_autorefresh import st_autorefresh
+from attention.machine import build_machine
+from attention.worker import InferenceWorker
+from attention.scheduler import AdaptiveScheduler
+from attention.roi import FaceRoiTracker, offset_boxes
+from attention.backends import load_detector
+from attention.batcher import BatchedDetector
+from attention.overlay import FrameRenderer
+from attention.journal import EventJournal, EventUploader
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8080")
 require_login(BACKEND_URL)
@@ -27,13 +35,6 @@ if not USER_ID:
 # === 성능 튜닝(가급적 최상단) ===
 cv2.setNumThreads(1)   # OpenCV 내부 스레드 경합 줄이기
 
-# ===== YOLO =====
-try:
-    from ultralytics import YOLO
-except Exception as e:
-    st.error("⚠️ ultralytics( YOLO ) 모듈이 없습니다. 가상환경(파이썬3.10)에서 `pip install ultralytics opencv-python numpy<2` 후 다시 실행하세요.")
-    st.stop()
-
 # ===== 페이지/테마 세팅 =====
 if "dark_mode" not in st.session_state:
     st.session_state.dark_mode = st.session_state.user_data.get("dark_mode", False)
@@ -210,13 +211,25 @@ def ensure_session_started():
 ensure_session_started()
 
 # ======== YOLO 모델/상수 ========
-MODEL_PATH = "runs/detect/train24-mixtrain/weights/best.pt"
+# .pt(Ultralytics) / .onnx(ONNX Runtime) / .xml(OpenVINO) — 키오스크는 python -m attention.backends 로 내보낸 .onnx 사용
+MODEL_PATH = os.getenv("ATTN_MODEL_PATH", "runs/detect/train24-mixtrain/weights/best.pt")
 YAWN_CLASS_INDEX = 2       # 하품
 DROWSY_CLASS_INDEX = 3     # 졸음
 CONF_THRESH = 0.45
-IMGSZ = 640
-TARGET_FPS = 30
-SKIP = 1
+IMGSZ = 640                          # 시작 입력 크기(이후 스케줄러가 640→480→320 조정)
+TARGET_FPS = 30                      # 카메라 입력 fps 가정
+LATENCY_BUDGET_MS = 1000.0 / TARGET_FPS   # 원본 프레임 1장당 허용 추론 비용
+DEBOUNCE_SEC = 0.3                   # 상태 전이 디바운스
+USE_FACE_ROI = True                  # 직전 박스 주변 얼굴 영역만 잘라서 추론
+ROI_IMGSZ = 320                      # 얼굴 크롭 추론 입력 크기(전체 프레임은 스케줄러 값)
+ROI_FULL_EVERY = 30                  # 크롭 30번마다 전체 프레임 1번
+# 여러 세션이 감지기 하나를 공유 → 동시에 들어온 프레임을 묶어 한 번에 추론(1 이면 끔)
+BATCH_MAX = int(os.getenv("ATTN_BATCH_MAX", "16"))
+BATCH_WAIT_MS = float(os.getenv("ATTN_BATCH_WAIT_MS", "8"))
+# 하품/졸음 이벤트 로컬 저널(미전송분은 백그라운드 업로더가 재시도)
+JOURNAL_PATH = os.getenv("ATTN_JOURNAL_PATH", os.path.join(".cache", "event_journal.sqlite3"))
+# 공부 시간은 서버가 하트비트로 센다 → 화면 재실행은 이 주기로만(초 단위 표시는 브라우저에서 계속 흐름)
+HEARTBEAT_SEC = 15
 
 # 카메라 캡처 vs 화면 표시
 cam_cap_w, cam_cap_h   = 1280, 720
@@ -224,10 +237,18 @@ cam_disp_w, cam_disp_h = 720, 405   # 필요시 640x360/560x315 등으로 줄여
 
 @st.cache_resource(show_spinner=False)
 def load_model():
-    m = YOLO(MODEL_PATH)
-    return m
+    det = load_detector(MODEL_PATH)
+    if BATCH_MAX > 1:
+        return BatchedDetector(det, max_batch=BATCH_MAX, max_wait_ms=BATCH_WAIT_MS).start()
+    return det
 
-model = load_model()
+# ===== YOLO =====
+try:
+    model = load_model()
+except ImportError:
+    st.error("⚠️ 추론 백엔드 모듈이 없습니다. 가상환경(파이썬3.10)에서 `pip install ultralytics opencv-python numpy<2` "
+             "(ONNX 모델이면 `pip install onnxruntime`) 후 다시 실행하세요.")
+    st.stop()
 
 # ======== 세션 상태(분석용) ========
 # ===== 사용자 하품 가중치(평균 하품 시간) 불러오기 =====
@@ -244,46 +265,43 @@ def get_user_yawn_weight() -> float | None:
     return None
 
 if "analytics" not in st.session_state:
-    window_seconds = 3
-    window_size = int(TARGET_FPS * window_seconds)
-    drowsy_seconds = 2
-    drowsy_frames = int(TARGET_FPS * drowsy_seconds)
-
     if "user_yawn_weight" not in st.session_state:
         st.session_state.user_yawn_weight = get_user_yawn_weight()
     avg_base = float(st.session_state.user_yawn_weight or 1.0)
 
+    # 윈도우(3초/2초/최소 하품 시간)는 초 단위 → 감지 속도(fps)로 프레임 수 환산
+    # 히스테리시스 0.45/0.35, 디바운스 0.3초 (오프라인 재생 도구와 같은 상태 머신)
+    machine = build_machine(TARGET_FPS, avg_yawn=avg_base, threshold_on=0.45, threshold_off=0.35,
+                            window_seconds=3, drowsy_seconds=2, debounce_sec=DEBOUNCE_SEC)
+
     st.session_state.analytics = {
-        "yawn_events": [],
-        "sleep_events": [],
-        "initial_yawn_len": 0,
-        "initial_sleep_len": 0,
-        "BASE_ATTENTION": 100,
-        "yawn_window": deque(maxlen=window_size),
-        "weights": [i / window_size for i in range(1, window_size + 1)],
-        "drowsy_window": deque(maxlen=drowsy_frames),
+        "machine": machine,
+        # 이벤트 목록은 machine.attention 과 같은 리스트(추가 시 카운터 동시 갱신)
+        "attention": machine.attention,
+        "yawn_events": machine.attention.yawn_events,
+        "sleep_events": machine.attention.sleep_events,
+        "durations": machine.durations,
         "threshold_ratio": 0.4,
-        "avg_yawn_duration": avg_base,
-        "min_yawn_duration": int(TARGET_FPS * max(0.6, min(avg_base * 0.9, 2.0))),
-        "yawning": False,
-        "sleeping": False,
-        "yawn_start_time": None,
-        "sleep_start_time": None,
-        "durations": [],
+        "last_rescale_ts": 0.0,
+        # 추론 지연 기반 운영점(입력 크기/스킵) 선택
+        "scheduler": AdaptiveScheduler(LATENCY_BUDGET_MS,
+                                       start_level=0 if IMGSZ >= 640 else 1),
+        # 얼굴 ROI 추적(워커 스레드에서만 접근)
+        "roi": FaceRoiTracker(full_every=ROI_FULL_EVERY),
         "last_save_ts": 0.0,
         # 성능/안정
         "frame_idx": 0,
-        "last_status_change": 0.0,
+        # 백그라운드 추론 워커(콜백 최초 호출 시 생성) / 마지막으로 반영한 추론 번호
+        "worker": None,
+        "last_det_seq": 0,
         # 콜백→UI 전달 버퍼
         "latest_attention": 100,
-        "fatigue_bump": 0,
-        # 히스테리시스
-        "threshold_ratio_on": 0.45,
-        "threshold_ratio_off": 0.35,
-        # 백엔드 전송용 포인터
-        "last_flushed_yawn_len": 0,
-        "last_flushed_sleep_len": 0,
-        "last_flush_ts": 0.0,
+        # 표시 크기 출력 버퍼(재사용) / 오버레이 표시 여부(집중 모드면 False)
+        "renderer": FrameRenderer(cam_disp_w, cam_disp_h),
+        "overlay": True,
+        # 저널 기록 포인터(여기까지 저널에 씀 → 전송은 업로더 담당)
+        "last_journaled_yawn_len": 0,
+        "last_journaled_sleep_len": 0,
     }
 
 A = st.session_state.analytics
@@ -292,32 +310,32 @@ A = st.session_state.analytics
 if st.session_state.user_yawn_weight:
     A["durations"].append(st.session_state.user_yawn_weight)
 
+@st.cache_resource(show_spinner=False)
+def get_uploader() -> EventUploader:
+    # 프로세스당 1개(모든 세션 공유). 시작하면 이전 실행에서 못 보낸 이벤트부터 전송
+    journal = EventJournal(JOURNAL_PATH)
+    journal.prune()
+    return EventUploader(journal, BACKEND_URL).start()
+
 def flush_events(force: bool = False):
+    """새로 쌓인 이벤트를 로컬 저널에 기록하고 업로더를 깨움(네트워크 대기 없음)."""
     sid = st.session_state.get("study_session_id")
     if not sid:
         return
-    now_ts = time.time()
-    if not force and (now_ts - A["last_flush_ts"] < 5.0):
-        return
-
-    # 새로 쌓인 이벤트만 잘라서 보냄
-    ys = A["yawn_events"][A["last_flushed_yawn_len"]:]
-    ss = A["sleep_events"][A["last_flushed_sleep_len"]:]
-    if not ys and not ss and not force:
-        return
-
-    payload = {"yawn_events": ys, "sleep_events": ss}
-    try:
-        requests.post(
-            f"{BACKEND_URL}/study/sessions/{sid}/events/batch",
-            json=payload, timeout=5
-        ).raise_for_status()
-        A["last_flushed_yawn_len"] = len(A["yawn_events"])
-        A["last_flushed_sleep_len"] = len(A["sleep_events"])
-        A["last_flush_ts"] = now_ts
-    except requests.exceptions.RequestException as e:
-        # 실패 시 다음 주기 재시도
-        print("flush_events error:", e)
+    uploader = get_uploader()
+
+    # 새로 쌓인 이벤트만 잘라서 저널에 기록
+    ny, ns = len(A["yawn_events"]), len(A["sleep_events"])
+    ys = A["yawn_events"][A["last_journaled_yawn_len"]:ny]
+    ss = A["sleep_events"][A["last_journaled_sleep_len"]:ns]
+    if ys:
+        uploader.journal.append(sid, "yawn", ys)
+    if ss:
+        uploader.journal.append(sid, "sleep", ss)
+    A["last_journaled_yawn_len"] = ny
+    A["last_journaled_sleep_len"] = ns
+    if ys or ss or force:
+        uploader.notify()
 
 def finish_session():
     sid = st.session_state.get("study_session_id")
@@ -326,12 +344,16 @@ def finish_session():
     try:
         # 남은 이벤트 모두 밀어넣기
         flush_events(force=True)
+        if A.get("worker") is not None:
+            A["worker"].stop()
+            A["worker"] = None
 
         body = {
             "focus_score": float(st.session_state.get("focus_score", 0)),
-            "yawn_count": sum(1 for e in A["yawn_events"] if e.get("type") == "yawn_end"),
-            "avg_yawn": float(A.get("avg_yawn_duration") or 0),
+            "yawn_count": A["attention"].yawn_count,
+            "avg_yawn": float(A["machine"].avg_yawn_duration or 0),
             "sum_study_time": float(st.session_state.get("total_study_sec", 0.0)),
+            "operating_point": A["scheduler"].operating_point(),
         }
         requests.post(
             f"{BACKEND_URL}/study/sessions/finish/{USER_ID}/{sid}",
@@ -340,6 +362,46 @@ def finish_session():
     except requests.exceptions.RequestException as e:
         st.error(f"세션 종료 저장 실패: {e}")
 
+def send_heartbeat(active: bool):
+    """서버 공부 시간용 하트비트. 상태가 바뀌었거나 HEARTBEAT_SEC 가 지났을 때만 보냄(서버는 30초 단위로 합쳐 기록)."""
+    sid = st.session_state.get("study_session_id")
+    if not sid:
+        return
+    now = time.time()
+    last = st.session_state.get("last_heartbeat")    # (보낸 시각, active)
+    if last and last[1] == active and now - last[0] < HEARTBEAT_SEC - 1:
+        return
+    try:
+        requests.post(f"{BACKEND_URL}/study/sessions/{sid}/heartbeat",
+                      json={"active": bool(active)}, timeout=2).raise_for_status()
+        st.session_state.last_heartbeat = (now, active)
+    except requests.exceptions.RequestException as e:
+        print("heartbeat error:", e)     # 다음 재실행에서 다시 보냄
+
+def _live_clocks():
+    """data-sec 가 붙은 시계(span)를 브라우저에서 1초마다 갱신 — 스크립트 재실행 없이 표시만 흐르게."""
+    components.html("""
+    <script>
+    (function(){
+      const w = parent.window, doc = parent.document;
+      if (w.__studyClock) clearInterval(w.__studyClock);
+      const t0 = Date.now();
+      const pad = n => String(n).padStart(2, '0');
+      function tick(){
+        doc.querySelectorAll('[data-clock]').forEach(el => {
+          const base = +el.dataset.sec, dir = +el.dataset.dir, run = el.dataset.run === '1';
+          const el_s = run ? Math.floor((Date.now() - t0) / 1000) : 0;
+          const v = Math.max(0, base + dir * el_s);
+          const h = Math.floor(v / 3600), m = Math.floor((v % 3600) / 60), s = v % 60;
+          el.textContent = el.dataset.clock === 'hms' ? `${pad(h)}:${pad(m)}:${pad(s)}` : `${pad(Math.floor(v / 60))}:${pad(s)}`;
+        });
+      }
+      tick();
+      w.__studyClock = setInterval(tick, 1000);
+    })();
+    </script>
+    """, height=0)
+
 # ======== 뽀모도로/집중도 기본 ========
 if "start_camera" not in st.session_state:
     st.session_state.start_camera = True
@@ -476,131 +538,92 @@ def update_pomodoro():
             end_break()
 
 # ======== 감지 유틸 ========
-def detect_yawn(results):
-    for box in results.boxes.data.tolist():
-        if int(box[5]) == YAWN_CLASS_INDEX:
-            return True
-    return False
-
-def detect_drowsy(results):
-    for box in results.boxes.data.tolist():
-        if int(box[5]) == DROWSY_CLASS_INDEX:
-            return True
-    return False
-
-def compute_attention():
-    yawn_count = sum(1 for e in A["yawn_events"][A["initial_yawn_len"]:] if e["type"] == "yawn_end")
-    sleep_count = sum(1 for e in A["sleep_events"][A["initial_sleep_len"]:] if e["type"] in ["end", "drowys_end"])
-    return A["BASE_ATTENTION"] - (5 * sleep_count) - (2 * yawn_count)
-
-# --- 상태 전이 디바운스 ---
-DEBOUNCE_SEC = 0.3
-def set_state(new_yawning: bool, new_sleeping: bool, attention_on_event: int):
+def predict_boxes(img):
+    """
+    YOLO 추론 → ([(x1, y1, x2, y2, conf, cls_id), ...], {"imgsz": 실제 입력 크기, "infer_ms": forward 시간})
+    (워커 스레드에서 호출). 배치 추론이면 infer_ms 는 큐 대기·다른 세션 프레임을 뺀 이 프레임 몫.
+    얼굴 추적 중이면 여유를 둔 크롭만 작은 imgsz 로 추론하고 좌표를 원본 기준으로 되돌린다.
+    스케줄러는 imgsz 로 지연을 환산하므로 크롭 추론이 큰 운영점을 싸 보이게 만들지 않는다.
+    """
+    tracker = A["roi"]
+    roi = tracker.next_roi(img.shape) if USE_FACE_ROI else None
+    if roi is None:
+        src, imgsz = img, A["scheduler"].imgsz
+    else:
+        x0, y0, x1, y1 = roi
+        src, imgsz = img[y0:y1, x0:x1], min(A["scheduler"].imgsz, ROI_IMGSZ)
+
+    boxes = model.predict(
+        src,
+        imgsz=imgsz,
+        conf=CONF_THRESH,
+        iou=0.5,
+        # ROI 추적에는 얼굴 주변의 다른 클래스 박스도 필요 → 클래스 필터는 ROI 끌 때만
+        classes=None if USE_FACE_ROI else (YAWN_CLASS_INDEX, DROWSY_CLASS_INDEX),
+        max_det=10,
+    )
+    boxes = offset_boxes(boxes, roi)
+    if USE_FACE_ROI:
+        tracker.update(boxes, roi)
+    timing = model.last_timing() if isinstance(model, BatchedDetector) else None
+    return boxes, {"imgsz": imgsz, "infer_ms": timing["forward_ms"] if timing else None}
+
+def rescale_windows(force: bool = False):
+    """감지 속도가 바뀌면 하품/졸음 윈도우를 초 단위 설정에 맞춰 다시 환산."""
+    sched, M = A["scheduler"], A["machine"]
     now = time.time()
-    if now - A["last_status_change"] < DEBOUNCE_SEC:
+    if not force and now - A["last_rescale_ts"] < 2.0:
         return
-    changed = (A["yawning"] != new_yawning) or (A["sleeping"] != new_sleeping)
-    if not changed:
+    fps = sched.det_fps or float(TARGET_FPS)
+    if not force and abs(fps - M.fps) <= 0.2 * M.fps:
         return
-    A["last_status_change"] = now
-
-    if not A["yawning"] and new_yawning:
-        A["yawn_start_time"] = now
-        A["yawn_events"].append({"type": "start", "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
-    elif A["yawning"] and not new_yawning:
-        if A["yawn_start_time"]:
-            duration = now - A["yawn_start_time"]
-            A["durations"].append(duration)
-            A["yawn_start_time"] = None
-            if A["durations"]:
-                A["avg_yawn_duration"] = sum(A["durations"]) / len(A["durations"])
-        A["yawn_events"].append({
-            "type": "yawn_end",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "avg_yawn_duration": round(A["avg_yawn_duration"], 2),
-            "attention_score": attention_on_event
-        })
-
-    if not A["sleeping"] and new_sleeping:
-        A["sleep_start_time"] = now
-        A["sleep_events"].append({"type": "start", "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
-    elif A["sleeping"] and not new_sleeping:
-        A["sleep_events"].append({
-            "type": "drowys_end",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "attention_score": attention_on_event
-        })
-        A["sleep_start_time"] = None
-
-    A["yawning"] = new_yawning
-    A["sleeping"] = new_sleeping
-    if A["yawning"] or A["sleeping"]:
-        A["fatigue_bump"] += 1
+    A["last_rescale_ts"] = now
+    M.rescale(fps)
+
+def get_worker() -> InferenceWorker:
+    w = A.get("worker")
+    if w is None or not w.alive:
+        w = InferenceWorker(predict_boxes).start()
+        A["worker"] = w
+    return w
+
+def compute_attention():
+    # 이벤트 추가 시점에 갱신된 카운터로 O(1) 계산
+    return A["attention"].raw_score
 
 # ======== WebRTC 콜백(YOLO 추론) ========
 def video_frame_callback(frame: av.VideoFrame) -> av.VideoFrame:
     img = frame.to_ndarray(format="bgr24")
     A["frame_idx"] += 1
-    run_infer = (A["frame_idx"] % SKIP == 0)
-
-    if run_infer:
-        results = model.predict(
-            img,
-            conf=CONF_THRESH,
-            iou=0.5,
-            imgsz=IMGSZ,
-            classes=[YAWN_CLASS_INDEX, DROWSY_CLASS_INDEX],
-            verbose=False,
-            max_det=10,
-            agnostic_nms=False
-        )[0]
-
-        is_yawning = detect_yawn(results)
-        is_drowsy  = detect_drowsy(results)
-
-        A["yawn_window"].append(is_yawning)
-        A["drowsy_window"].append(is_drowsy)
-
-        if results.boxes is not None:
-            for box in results.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = float(box.conf[0])
-                cls_id = int(box.cls[0])
-                color = (0, 0, 255) if cls_id == YAWN_CLASS_INDEX else ((255, 255, 0) if cls_id == DROWSY_CLASS_INDEX else (0, 255, 0))
-                label = f"{model.names.get(cls_id, str(cls_id))} {conf:.2f}" if hasattr(model, "names") else f"{cls_id} {conf:.2f}"
-                cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(img, label, (x1, max(20, y1 - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-        weights = A["weights"]
-        weighted_sum = sum(w for yawning, w in zip(A["yawn_window"], weights) if yawning)
-        weighted_ratio = weighted_sum / (sum(weights) if sum(weights) else 1.0)
-        continuous_count = 0
-        for status in reversed(A["yawn_window"]):
-            if status: continuous_count += 1
-            else: break
-
-        if (not A["yawning"] and weighted_ratio > A["threshold_ratio_on"]  and continuous_count > A["min_yawn_duration"]):
-            new_yawning = True
-        elif (A["yawning"]    and weighted_ratio > A["threshold_ratio_off"] and continuous_count > A["min_yawn_duration"]):
-            new_yawning = True
-        else:
-            new_yawning = False
-
-        drowsy_frames = A["drowsy_window"].maxlen or 1
-        new_sleeping = (sum(A["drowsy_window"]) >= int(drowsy_frames * 0.8))
-
-        attention_for_event = max(0, min(100, compute_attention()))
-        set_state(new_yawning, new_sleeping, attention_for_event)
+    worker = get_worker()
+
+    # 추론은 워커에 맡기고(밀린 프레임은 워커가 버림) 콜백은 바로 반환
+    sched = A["scheduler"]
+    if A["frame_idx"] % sched.skip == 0:
+        worker.submit(img)   # 오버레이는 축소본에만 그리므로 원본을 그대로 넘김(사본 없음)
+
+    det = worker.latest()
+    if det is not None and det.seq != A["last_det_seq"]:
+        # 새 추론 결과가 나왔을 때만 윈도우/상태 갱신
+        A["last_det_seq"] = det.seq
+        # 배치 추론이면 큐 대기를 뺀 forward 몫으로(동시 세션 수에 끌려 내려가지 않게)
+        lat = det.infer_ms if det.infer_ms is not None else det.latency_ms
+        changed = sched.record(lat, det.done_ts, imgsz=det.imgsz)
+        rescale_windows(force=changed)
+        is_yawning = det.has_class(YAWN_CLASS_INDEX)
+        is_drowsy  = det.has_class(DROWSY_CLASS_INDEX)
+
+        # 윈도우 갱신 → 히스테리시스(on/off) + 최소 연속 프레임 + 졸음 80% 규칙 → 디바운스 전이
+        A["machine"].step(is_yawning, is_drowsy)
 
     attention_score = max(0, min(100, compute_attention()))
     A["latest_attention"] = attention_score
 
-    status_text = "Yawning" if A["yawning"] else ("Sleeping" if A["sleeping"] else "Awake")
-    status_color = (0,0,255) if A["yawning"] else ((255,255,0) if A["sleeping"] else (0,255,0))
-    cv2.putText(img, f"Status: {status_text}", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, status_color, 3)
-    cv2.putText(img, f"Attention: {attention_score}", (30, 90), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
-
-    small = cv2.resize(img, (cam_disp_w, cam_disp_h), interpolation=cv2.INTER_AREA)
+    # 표시 크기 버퍼로 축소 → 마지막 추론 결과/상태를 축소본 위에만 덧그림(집중 모드면 생략)
+    M = A["machine"]
+    status_text = "Yawning" if M.yawning else ("Sleeping" if M.sleeping else "Awake")
+    small = A["renderer"].render(img, det.boxes if det is not None else (), status_text, attention_score,
+                                 model.names, draw=A["overlay"])
     return av.VideoFrame.from_ndarray(small, format="bgr24")
 
 # ===== 유틸: 안전한 토스트(낮은 버전 호환) =====
@@ -684,6 +707,16 @@ with col2:
 )
 
             st.session_state.cam_active = bool(ctx) and getattr(ctx.state, "playing", False)
+            focus_mode = st.checkbox("🎯 집중 모드 (화면에 박스/상태 표시 안 함)", key="focus_mode")
+            A["overlay"] = not focus_mode
+            if A.get("worker") is not None:
+                ws = A["worker"].stats()
+                op = A["scheduler"].operating_point()
+                st.caption(f"추론 {ws['avg_latency_ms']:.0f}ms · 드롭 {ws['dropped']} / {ws['submitted']} 프레임 · "
+                           f"입력 {op['imgsz']}px · 스킵 {op['skip']} · 감지 {op['det_fps']:.0f}fps · "
+                           f"얼굴 크롭 {A['roi'].stats()['crop_ratio'] * 100:.0f}%"
+                           + (" · 배치 평균 {avg_batch} · 대기 {wait_ms_p50:.0f}ms".format(**model.stats())
+                              if isinstance(model, BatchedDetector) else ""))
         else:
             st.session_state.cam_active = False
             st.markdown(
@@ -720,8 +753,10 @@ with col3:
             )
         )
 
+    # 카운팅 중에도 HEARTBEAT_SEC 마다만 재실행(뽀모도로 전환 시점이 더 빠르면 그때), 아닐 땐 8초
+    _counting = _is_counting()
     st_autorefresh(
-        interval=1000 if _is_counting() else 8000,   # 카운팅 중 1초, 아닐 땐 8초
+        interval=int(max(1, min(HEARTBEAT_SEC, st.session_state.pomodoro_remaining)) * 1000) if _counting else 8000,
         key="auto_refresh_timer"
     )
 
@@ -733,17 +768,20 @@ with col3:
     ratio = max(0.0, min(1.0, ratio))
 
     _now = time.time()
-    if (
+    _studying = (
         st.session_state.get("pomodoro_mode") == "공부 중"
         and st.session_state.get("start_camera", False)
         and st.session_state.get("cam_active", False)
         and not st.session_state.get("break_active", False)
         and not st.session_state.get("ended", False)
-    ):
-        dt = int(max(0, _now - st.session_state.last_study_tick_ts))
+    )
+    if _studying:
+        # 화면 표시용(서버 기록은 하트비트 기준)
+        dt = max(0.0, _now - st.session_state.last_study_tick_ts)
         st.session_state.total_study_sec += dt
 
     st.session_state.last_study_tick_ts = _now
+    send_heartbeat(_studying)
 
     if st.session_state.get("show_break_alert", False):
         st.markdown("""
@@ -821,7 +859,7 @@ with col3:
         <div class="badge-head">⏱️ 뽀모도로 타이머</div>
         <div style="margin:8px 0 10px 0; font-size:1.02rem;">
             <b>현재 상태:</b> <span>{st.session_state.pomodoro_mode}</span><br>
-            <b>남은 시간:</b> <span>{mins:02d}:{secs:02d}</span>
+            <b>남은 시간:</b> <span data-clock="ms" data-sec="{remaining}" data-dir="-1" data-run="{int(_counting)}">{mins:02d}:{secs:02d}</span>
         </div>
         ''',
         unsafe_allow_html=True
@@ -836,9 +874,9 @@ with col3:
     st.markdown('<div class="soft-bg" style="margin-bottom:10px;"><div class="badge-head alt">🧠 집중도</div></div>', unsafe_allow_html=True)
 
     st.session_state.focus_score = int(A.get("latest_attention", st.session_state.get("focus_score", 100)))
-    if A.get("fatigue_bump", 0) > 0:
-        st.session_state.fatigue_count += A["fatigue_bump"]
-        A["fatigue_bump"] = 0
+    if A["machine"].fatigue_bump > 0:
+        st.session_state.fatigue_count += A["machine"].fatigue_bump
+        A["machine"].fatigue_bump = 0
 
     st.progress(st.session_state.focus_score / 100)
     st.markdown(
@@ -864,11 +902,12 @@ with col3:
         f"""
         <div class="soft-bg" style="padding:12px 14px; margin-top:10px;">
         <div style="font-weight:900; margin-bottom:4px;">⏳ 누적 공부 시간</div>
-        <div class="small-subtle"><b>{_h:02d}:{_m:02d}:{_s:02d}</b></div>
+        <div class="small-subtle"><b data-clock="hms" data-sec="{int(st.session_state.total_study_sec)}" data-dir="1" data-run="{int(_studying)}">{_h:02d}:{_m:02d}:{_s:02d}</b></div>
         </div>
         """,
         unsafe_allow_html=True
     )
+    _live_clocks()
 
 # ↓↓↓ 집중도 감지 + 모달 트리거(그대로 유지)
 if not ss.get("break_active", False) and not ss.get("ended", False):
@@ -85,63 +85,26 @@ def api_shop_select(char_id: str):
         return api_shop_state()
     return r.json()["state"]
 
+RANKING_LIMIT = 100
+
 def fetch_ranking(period_kor: str):
     period_map = {"주간": "weekly", "월간": "monthly", "전체": "all"}
     period = period_map.get(period_kor, "weekly")
     try:
         r = requests.get(
             f"{BACKEND_URL}/ranking/top",
-            params={"period": period, "limit": 100},
+            params={"period": period, "limit": RANKING_LIMIT},
             timeout=10, headers=_auth_headers()
         )
         r.raise_for_status()
+        # ✅ 닉네임/보유 포인트/active_char 까지 서버가 한 번에 내려줌(행마다 /shop/state 호출 없음)
         rows = r.json().get("rows", [])
-        # ✅ 여기서 각 row에 active_char 채워 넣기
-        return _enrich_rows_with_char(rows)
+        for row in rows:
+            row["active_char"] = row.get("active_char") or "ddalkkak"
+        return rows
     except Exception as e:
         st.error(f"랭킹을 불러오지 못했습니다: {e}")
         return []
-    
-def _extract_user_id(doc) -> str | None:
-    for k in ("user_id", "userId", "uid", "id", "_id"):
-        if k in doc and doc[k]:
-            v = doc[k]
-            if isinstance(v, dict) and "$oid" in v:
-                return v["$oid"]
-            return str(v)
-    return None
-
-def _fetch_active_char(uid: str) -> str | None:
-    try:
-        r = requests.get(
-            f"{BACKEND_URL}/shop/state",
-            params={"user_id": uid},
-            headers=_auth_headers(),
-            timeout=6,
-        )
-        r.raise_for_status()
-        return (r.json().get("state") or {}).get("active_char")
-    except Exception:
-        return None
-
-def _enrich_rows_with_char(rows: list[dict]) -> list[dict]:
-    cache: dict[str, str | None] = {}
-    for row in rows:
-        # 백엔드가 다른 키로 내려줄 수도 있어 대비
-        char = (
-            row.get("active_char")
-            or row.get("character")
-            or row.get("char")
-            or row.get("avatar")
-        )
-        if not char:
-            uid = _extract_user_id(row)
-            if uid:
-                if uid not in cache:
-                    cache[uid] = _fetch_active_char(uid)
-                char = cache[uid]
-        row["active_char"] = (char or "ddalkkak")
-    return rows
 
 # ─────────────────────────────────────────────
 # 쿼리 파라미터 유틸 (최신/구버전 호환)
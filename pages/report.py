@@ -3,9 +3,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 import random
-import os, base64, requests
+import os, base64, requests, time
 from components.header import render_header
 from components.auth import require_login
 
@@ -88,29 +88,35 @@ if not USER_KEY:
     st.stop()
 
 # ---- API helpers ----
-def fetch_daily(start_d, end_d):
-    url = f"{BACKEND_URL}/reports/daily/{USER_KEY}"
-    r = requests.get(url, params={"start": start_d.isoformat(), "end": end_d.isoformat()}, timeout=15)
+# 리포트 화면 데이터는 /reports/dashboard 한 번으로 받음. (유저, 기간)별로 세션에 ETag 와 함께 들고 있다가
+# 위젯을 바꿔 다시 그릴 때 DASHBOARD_FRESH 초 안이면 그대로, 지나면 If-None-Match 로 확인(304면 재사용).
+DASHBOARD_FRESH = 30
+DASHBOARD_KEEP = 8          # 세션당 보관할 (유저, 기간) 수
+
+@st.cache_resource(show_spinner=False)
+def _http() -> requests.Session:
+    return requests.Session()   # keep-alive 재사용
+
+def fetch_dashboard(start_d, end_d) -> dict:
+    cache = st.session_state.setdefault("_report_dash", {})
+    key = (USER_KEY, start_d.isoformat(), end_d.isoformat())
+    hit = cache.get(key)
+    if hit and time.time() - hit["at"] < DASHBOARD_FRESH:
+        return hit["data"]
+
+    headers = {"If-None-Match": hit["etag"]} if hit and hit.get("etag") else {}
+    r = _http().get(f"{BACKEND_URL}/reports/dashboard/{USER_KEY}",
+                    params={"start": key[1], "end": key[2]}, headers=headers, timeout=15)
+    if r.status_code == 304 and hit:
+        hit["at"] = time.time()
+        return hit["data"]
     r.raise_for_status()
-    return r.json()
-
-def fetch_focus(day_d):
-    url = f"{BACKEND_URL}/reports/focus/{USER_KEY}"
-    r = requests.get(url, params={"day": day_d.isoformat()}, timeout=10)
-    r.raise_for_status()
-    return r.json().get("events", [])
-
-def fetch_summary():
-    url = f"{BACKEND_URL}/reports/summary/{USER_KEY}"
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    return r.json()
-
-def fetch_focus_hist(start_d, end_d):
-    url = f"{BACKEND_URL}/reports/focus_hist/{USER_KEY}"
-    r = requests.get(url, params={"start": start_d.isoformat(), "end": end_d.isoformat()}, timeout=15)
-    r.raise_for_status()
-    return r.json()
+    data = r.json()
+    cache.pop(key, None)
+    cache[key] = {"at": time.time(), "etag": r.headers.get("ETag"), "data": data}
+    while len(cache) > DASHBOARD_KEEP:
+        cache.pop(next(iter(cache)))
+    return data
 
 # ================= CSS =================
 st.markdown(f"""
@@ -190,20 +196,21 @@ with st.expander("📅 기간 선택", expanded=False):
         st.error("⚠️ 시작일은 종료일보다 빠르거나 같아야 합니다.")
         st.stop()
 
+# 요약 / 선택 기간 / 가입 이후 전체 / 집중도 — 한 번에
+dash = fetch_dashboard(start_date, end_date)
+
 # (1) 선택 기간 데이터
-daily = fetch_daily(start_date, end_date)
+daily = dash.get("daily", {})
 df = make_df(daily.get("days", []))
 filtered_df = df.copy()
 
 # (2) 요약/전체기간 데이터
-summary = fetch_summary()
+summary = dash.get("summary", {})
 overall_learning_days = int(summary.get("total_learning_days", 0))
 streak_days = int(summary.get("streak_days", 0))
 overall_points = int(summary.get("total_points", 0))
 
-global_start = datetime.fromisoformat(summary["created_at"]).date()
-global_end   = datetime.today().date()
-daily_all = fetch_daily(global_start, global_end)
+daily_all = dash.get("daily_all", {})
 df_all = make_df(daily_all.get("days", []))
 
 # 기간 요약(선택구간 기준)
@@ -407,7 +414,7 @@ st.markdown("""
 
 st.markdown('<div class="section-head"><span>오늘의 집중도 그래프</span><span class="chev">▾</span></div>', unsafe_allow_html=True)
 
-hist = fetch_focus_hist(start_date, end_date)
+hist = dash.get("focus_hist", {})
 hourly = hist.get("hourly", [0]*24)
 
 bar_x = [f"{h:02d}:00" for h in range(24)]
@@ -0,0 +1,108 @@
+# server/bench_focus_hist.py
+# 집중도 히스토그램 벤치마크(예전 시간 단위 while 루프 vs report_engine.focus_histogram) — 운영 DB 에 돌리지 말 것
+#
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.bench_focus_hist --per-day 4
+#
+# 유저 한 명에게 1년치 세션(하루 per-day 개, 20분~3시간)을 만들고 1일/30일/365일 범위로
+# 두 방식을 repeat 번 재서 비교한다. 시간대별 평균이 같은지도 확인.
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from bson import ObjectId
+
+try:
+    # 패키지로 실행: python -m server.bench_focus_hist
+    from .server_db import db
+    from . import daily_study, report_engine
+except Exception:
+    # 스크립트로 실행: cd server && python bench_focus_hist.py
+    from server_db import db
+    import daily_study
+    import report_engine
+
+KST = timezone(timedelta(hours=9))
+LAST_DAY = datetime(2031, 12, 31, tzinfo=KST)      # 다른 데이터와 겹치지 않는 기간
+
+
+# ---------- 예전 구현(비교 기준, naive = UTC 로만 맞춤) ----------
+def legacy_hist(uid, t0, t1) -> list:
+    items = list(report_engine._sess().find(
+        {"user_id": uid, "$or": [
+            {"start": {"$lt": t1}, "end": {"$gt": t0}},
+            {"study_date": {"$lt": t1}, "end_time": {"$gt": t0}}
+        ]},
+        {"start": 1, "end": 1, "study_date": 1, "end_time": 1, "focus_score": 1, "minutes": 1}
+    ))
+    wsum = [0.0] * 24; wmin = [0.0] * 24
+    for it in items:
+        s = it.get("start") or it.get("study_date")
+        e = it.get("end") or it.get("end_time") or s
+        if not s or not e: continue
+        s = max(daily_study.to_kst(s), t0); e = min(daily_study.to_kst(e), t1)
+        fs = float(it.get("focus_score") or 0)
+        if e <= s: continue
+        cur = s
+        while cur < e:
+            h_end = datetime(cur.year, cur.month, cur.day, cur.hour, tzinfo=KST) + timedelta(hours=1)
+            seg_end = min(h_end, e)
+            mins = (seg_end - cur).total_seconds() / 60.0
+            if mins > 0:
+                wsum[cur.hour] += fs * mins
+                wmin[cur.hour] += mins
+            cur = seg_end
+    return [(wsum[h] / wmin[h] if wmin[h] > 0 else 0.0) for h in range(24)]
+
+
+def seed(per_day: int) -> ObjectId:
+    rnd = random.Random(11)
+    uid = ObjectId()
+    docs = []
+    for d in range(365):
+        day0 = LAST_DAY - timedelta(days=d)
+        for _ in range(per_day):
+            s = day0 + timedelta(minutes=rnd.randint(6 * 60, 23 * 60))
+            docs.append({"user_id": uid, "study_date": s, "end_time": s + timedelta(minutes=rnd.randint(20, 180)),
+                         "focus_score": rnd.randint(30, 100), "bench_focus": True})
+    report_engine._sess().insert_many(docs)
+    return uid
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--per-day", type=int, default=4, help="하루 세션 수")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--force", action="store_true", help="DB 이름에 load/test 가 없어도 실행")
+    args = ap.parse_args()
+
+    if not args.force and not any(k in db.name for k in ("load", "test")):
+        raise SystemExit(f"DB '{db.name}' 는 테스트용이 아닌 것 같습니다. MONGODB_DB=ttalk_load 등으로 실행하거나 --force")
+
+    uid = seed(args.per_day)
+    t1 = LAST_DAY + timedelta(days=1)
+    try:
+        print(f"{'days':>5} {'impl':>7} {'p50 ms':>9} {'p95 ms':>9}")
+        for days in (1, 30, 365):
+            t0 = t1 - timedelta(days=days)
+            want = legacy_hist(uid, t0, t1)
+            got = report_engine.focus_histogram(uid, t0, t1)["hourly"]
+            if not np.allclose(want, got):
+                raise SystemExit(f"{days}일: 결과가 다름\n{want}\n{got}")
+            for name, fn in (("legacy", lambda: legacy_hist(uid, t0, t1)),
+                             ("engine", lambda: report_engine.focus_histogram(uid, t0, t1))):
+                ms = []
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    fn()
+                    ms.append((time.perf_counter() - t) * 1000.0)
+                ms.sort()
+                print(f"{days:>5} {name:>7} {statistics.median(ms):>9.2f} {ms[min(len(ms) - 1, int(0.95 * len(ms)))]:>9.2f}")
+    finally:
+        report_engine._sess().delete_many({"user_id": uid})
+
+
+if __name__ == "__main__":
+    main()
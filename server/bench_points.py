@@ -0,0 +1,164 @@
+# server/bench_points.py
+# 세션 종료 포인트 지급 지연 벤치마크(예전 규칙별 조회 vs points_engine) — 운영 DB 에 돌리지 말 것
+#
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.bench_points --sessions 1 20 100
+#
+# 하루 세션 수별로 유저를 만들고(세션마다 휴식 2개, 일별 원장까지 준비), 마지막 세션 종료 시점의
+# award_all_points_on_finish 를 각 방식으로 repeat 번 실행해 지연과 DB 왕복 수를 비교한다.
+# 매 반복 전에 포인트/유저 상태를 되돌리므로 두 방식 모두 같은 지급을 하게 된다.
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import MongoClient, monitoring
+
+try:
+    # 패키지로 실행: python -m server.bench_points
+    from .server_db import db
+    from . import daily_study, points_engine as pe
+except Exception:
+    # 스크립트로 실행: cd server && python bench_points.py
+    from server_db import db
+    import daily_study
+    import points_engine as pe
+
+
+class _Counter(monitoring.CommandListener):
+    n = 0
+    def started(self, event): _Counter.n += 1
+    def succeeded(self, event): pass
+    def failed(self, event): pass
+
+
+# ---------- 예전 구현(비교 기준) ----------
+def _legacy_net(db, ses) -> float:
+    sst = ses.get("sum_study_time")
+    if sst is not None:
+        return float(sst)
+    start = ses.get("study_date"); end = ses.get("end_time")
+    if not start or not end:
+        return 0.0
+    brs = db.breaks.find({"session_id": ses["_id"], "end_time": {"$ne": None}}, {"start_time": 1, "end_time": 1})
+    return max(0.0, (end - start).total_seconds() - sum((b["end_time"] - b["start_time"]).total_seconds() for b in brs))
+
+
+def _legacy_award(db, uid, value, reason, when) -> int:
+    if db.points.find_one({"user_id": uid, "reason": reason}):
+        return 0
+    db.points.insert_one({"user_id": uid, "gain_date": when, "point": int(value), "reason": reason})
+    db.users.update_one({"_id": uid}, {"$inc": {"points": int(value)}})
+    return int(value)
+
+
+def _legacy_day_secs(db, uid, day_start, day_end) -> float:
+    return sum(_legacy_net(db, s) for s in db.sessions.find(
+        {"user_id": uid, "study_date": {"$gte": day_start, "$lt": day_end}, "end_time": {"$ne": None}},
+        {"_id": 1, "study_date": 1, "end_time": 1, "sum_study_time": 1}))
+
+
+def legacy_finish(db, ses) -> int:
+    uid, end = ses["user_id"], ses["end_time"]
+    gained = 0
+    if _legacy_net(db, ses) / 60.0 >= pe.ATTN_MINUTES_CUTOFF and (ses.get("focus_score") or 0) >= pe.ATTN_THRESHOLD:
+        gained += _legacy_award(db, uid, pe.ATTN_POINTS, pe.attn_reason(ses), end)
+    day_start, day_end = pe.kst_day_range(end)
+    day = day_start.strftime("%Y-%m-%d")
+    hours = int(_legacy_day_secs(db, uid, day_start, day_end) // 3600)
+    given = db.points.count_documents({"user_id": uid, "gain_date": {"$gte": day_start, "$lt": day_end},
+                                       "reason": {"$regex": f"^HOUR_{day}_"}})
+    for k in range(given + 1, hours + 1):
+        gained += _legacy_award(db, uid, pe.HOUR_POINTS, f"HOUR_{day}_{k}", day_end - timedelta(seconds=1))
+    if not db.points.find_one({"user_id": uid, "reason": f"ATTEND_{day}"}) \
+            and _legacy_day_secs(db, uid, day_start, day_end) >= pe.ONE_HOUR_SECS:
+        gained += _legacy_award(db, uid, pe.ATTEND_DAILY_POINTS, f"ATTEND_{day}", end)
+        prev = int((db.users.find_one({"_id": uid}, {"continuous_count": 1}) or {}).get("continuous_count") or 0)
+        yday = (day_start - timedelta(days=1)).strftime("%Y-%m-%d")
+        cnt = prev + 1 if db.points.find_one({"user_id": uid, "reason": f"ATTEND_{yday}"}) else 1
+        db.users.update_one({"_id": uid}, {"$set": {"continuous_count": cnt}})
+        if cnt % 7 == 0:
+            gained += _legacy_award(db, uid, pe.ATTEND_WEEK_BONUS, f"ATTEND_WEEK_{day}", end)
+    return gained
+
+
+# ---------- 데이터 ----------
+def seed(n_sessions: int, day: datetime) -> tuple:
+    """하루 n 개 세션(각 20분, 휴식 2×2분, sum_study_time 없음 → 휴식 합산 경로). 마지막 세션 반환."""
+    uid = ObjectId()
+    db.users.insert_one({"_id": uid, "points": 0, "continuous_count": 6, "bench_points": True})
+    yday = (day - timedelta(days=1)).strftime("%Y-%m-%d")
+    db.points.insert_one({"user_id": uid, "reason": f"ATTEND_{yday}", "point": 2, "gain_date": day - timedelta(hours=12)})
+    start = day + timedelta(minutes=5)
+    step = timedelta(seconds=min(1800, 14 * 3600 // max(1, n_sessions)))
+    sessions, breaks = [], []
+    for i in range(n_sessions):
+        s0 = start + step * i
+        sid = ObjectId()
+        sessions.append({"_id": sid, "user_id": uid, "study_date": s0, "end_time": s0 + min(step, timedelta(minutes=40)),
+                         "focus_score": 75})
+        for j in range(2):
+            b0 = s0 + timedelta(minutes=3 + 6 * j)
+            breaks.append({"session_id": sid, "start_time": b0, "end_time": b0 + timedelta(minutes=2)})
+    db.sessions.insert_many(sessions)
+    db.breaks.insert_many(breaks)
+    daily_study.rebuild(user_id=uid, quiet=True)     # 평소처럼 원장이 이미 있는 상태에서 측정
+    return uid, db.sessions.find_one({"_id": sessions[-1]["_id"]})
+
+
+def cleanup(uids):
+    sids = [s["_id"] for s in db.sessions.find({"user_id": {"$in": uids}}, {"_id": 1})]
+    db.breaks.delete_many({"session_id": {"$in": sids}})
+    db.sessions.delete_many({"user_id": {"$in": uids}})
+    db.points.delete_many({"user_id": {"$in": uids}})
+    db.users.delete_many({"_id": {"$in": uids}})
+    daily_study._coll().delete_many({"user_id": {"$in": uids}})
+    pe.leaderboard._coll().delete_many({"user_id": {"$in": uids}})
+    pe.leaderboard.rebuild_hist()
+
+
+def _pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q / 100.0 * (len(xs) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, nargs="+", default=[1, 20, 100], help="하루 세션 수")
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--force", action="store_true", help="DB 이름에 load/test 가 없어도 실행")
+    args = ap.parse_args()
+
+    if not args.force and not any(k in db.name for k in ("load", "test")):
+        raise SystemExit(f"DB '{db.name}' 는 테스트용이 아닌 것 같습니다. MONGODB_DB=ttalk_load 등으로 실행하거나 --force")
+    # 명령 수를 세려면 리스너를 단 클라이언트가 따로 필요(server_db 의 클라이언트는 이미 생성됨)
+    bdb = MongoClient(os.getenv("MONGODB_URI"), event_listeners=[_Counter()])[db.name]
+
+    day = datetime(2030, 1, 7)      # 다른 데이터와 겹치지 않는 날짜(naive, 서버 저장 형식과 동일)
+    uids = []
+    try:
+        print(f"{'sessions':>8} {'impl':>7} {'p50 ms':>8} {'p95 ms':>8} {'db cmds':>8} {'points':>7}")
+        for n in args.sessions:
+            uid, last = seed(n, day)
+            uids.append(uid)
+            for name, fn in (("legacy", legacy_finish), ("engine", pe.award_on_finish)):
+                ms, gained = [], None
+                for _ in range(args.repeat):
+                    db.points.delete_many({"user_id": uid, "reason": {"$ne": f"ATTEND_{(day - timedelta(days=1)):%Y-%m-%d}"}})
+                    db.users.update_one({"_id": uid}, {"$set": {"points": 0, "continuous_count": 6}})
+                    c0 = _Counter.n
+                    t0 = time.perf_counter()
+                    g = fn(bdb, last)
+                    ms.append((time.perf_counter() - t0) * 1000.0)
+                    cmds = _Counter.n - c0
+                    if gained is not None and g != gained:
+                        raise SystemExit(f"{name}: 반복마다 지급 포인트가 다름 {gained} != {g}")
+                    gained = g
+                print(f"{n:>8} {name:>7} {statistics.median(ms):>8.2f} {_pct(ms, 95):>8.2f} {cmds:>8} {gained:>7}")
+    finally:
+        cleanup(uids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# server/bench_ranking.py
+# 랭킹 페이지 로드(랭킹 API + 캐릭터 조회) 벤치마크 — 운영 DB 에 돌리지 말 것
+#
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load uvicorn server.app:app --port 8080
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.bench_ranking --rows 50 200
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.bench_ranking --me 100000
+#
+# 이번 주 점수판에 rows 명을 만들고, 페이지가 랭킹을 그리기 전에 하는 HTTP 호출을
+#   per-row : /ranking/top + 행마다 /shop/state (예전 pages/ranking.py)
+#   bulk    : /ranking/top 한 번 (active_char 포함)
+# 두 방식으로 repeat 번 재서 비교한다.
+#
+# --me N : 점수판에 N 명을 넣고 1등 / 꼴찌의 /ranking/me 를 기간별로 잰다.
+#          비교용 legacy 는 예전 방식(나보다 높은 문서를 $or 로 count) — 순위에 비례해 느려짐
+#          주간/월간 API 는 캐시된 기간 점수 분포를 쓰므로, 캐시가 TTL 마다 다시 계산하는 비용(window_dist)도 따로 보임
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+from bson import ObjectId
+
+try:
+    # 패키지로 실행: python -m server.bench_ranking
+    from .server_db import db
+    from . import leaderboard
+except Exception:
+    # 스크립트로 실행: cd server && python bench_ranking.py
+    from server_db import db
+    import leaderboard
+
+KST = timezone(timedelta(hours=9))
+Users = db[os.getenv("USER_COLL", "User")]
+CHARS = ("ddalkkak", "shiba", "cat", "rabbit", "bear")
+
+
+def seed(n: int) -> list:
+    now = datetime.now(KST)
+    uids = [ObjectId() for _ in range(n)]
+    Users.insert_many([{"_id": u, "nickname": f"bench-{i:04d}", "points": 1000 + i,
+                       "active_char": CHARS[i % len(CHARS)], "bench_ranking": True}
+                      for i, u in enumerate(uids)])
+    # 실제 점수보다 높게 넣어 상위 n 명이 모두 벤치 유저가 되게 함
+    leaderboard.record([{"user_id": u, "gain_date": now, "point": 10_000_000 + i, "reason": f"ATTENDANCE#bench{i}"}
+                        for i, u in enumerate(uids)])
+    return uids
+
+
+def cleanup(uids):
+    Users.delete_many({"_id": {"$in": uids}})
+    db[os.getenv("SHOP_COLL", "shop")].delete_many({"user_id": {"$in": [str(u) for u in uids]}})   # /shop/state 가 만든 문서
+    leaderboard._coll().delete_many({"user_id": {"$in": uids}})
+    leaderboard.rebuild_hist()
+
+
+def seed_board(n: int) -> list:
+    """점수판에 직접 n 명(오늘 날짜 board + 전체) — 0번이 1등, 마지막이 꼴찌"""
+    now = datetime.now(KST)
+    day = leaderboard.day_board(now)
+    date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    uids = [ObjectId() for _ in range(n)]
+    L = leaderboard._coll()
+    for i in range(0, n, 5000):
+        docs = []
+        for j, u in enumerate(uids[i:i + 5000], start=i):
+            p, a = 10_000_000 - j * 7, 1 + j % 3
+            docs.append({"board": "all", "user_id": u, "points": p, "attempts": a})
+            docs.append({"board": day, "user_id": u, "points": p, "attempts": a, "date": date})
+        L.insert_many(docs, ordered=False)
+    leaderboard.rebuild_hist()
+    return uids
+
+
+def legacy_rank(period, uid):
+    L = leaderboard._coll()
+    board = "all" if period == "all" else leaderboard.day_board()
+    me = L.find_one({"board": board, "user_id": uid})
+    return L.count_documents({"board": board, "$or": [
+        {"points": {"$gt": me["points"]}}, {"points": me["points"], "attempts": {"$gt": me["attempts"]}}]}) + 1
+
+
+def bench_me(http, base, n, repeat):
+    uids = seed_board(n)
+    try:
+        print(f"{'users':>8} {'period':>8} {'who':>7} {'rank':>8} {'api p50':>8} {'api p95':>8} {'legacy p50':>11}")
+        for period in ("all", "weekly", "monthly"):
+            if period in leaderboard.WINDOW_DAYS:
+                t0 = time.perf_counter()
+                leaderboard.window_dist(period)
+                print(f"{n:>8} {period:>8} window_dist (캐시 갱신 1회) {(time.perf_counter() - t0) * 1000.0:.1f} ms")
+            for who, uid, want in (("top", uids[0], 1), ("bottom", uids[-1], n)):
+                api, old = [], []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    r = http.get(f"{base}/ranking/me/{uid}", params={"period": period}, timeout=60).json()
+                    api.append((time.perf_counter() - t0) * 1000.0)
+                    t0 = time.perf_counter()
+                    legacy_rank(period, uid)
+                    old.append((time.perf_counter() - t0) * 1000.0)
+                if r["rank"] != want:
+                    raise SystemExit(f"{period}/{who}: rank {r['rank']} != {want}")
+                print(f"{n:>8} {period:>8} {who:>7} {r['rank']:>8} {statistics.median(api):>8.1f} "
+                      f"{_pct(api, 95):>8.1f} {statistics.median(old):>11.1f}")
+    finally:
+        leaderboard._coll().delete_many({"user_id": {"$in": uids}})
+        leaderboard.rebuild_hist()
+
+
+def load_per_row(http, base, n):
+    rows = http.get(f"{base}/ranking/top", params={"period": "weekly", "limit": n}, timeout=30).json()["rows"]
+    for r in rows:
+        http.get(f"{base}/shop/state", params={"user_id": r["user_id"]}, timeout=30).json()
+    return len(rows)
+
+
+def load_bulk(http, base, n):
+    rows = http.get(f"{base}/ranking/top", params={"period": "weekly", "limit": n}, timeout=30).json()["rows"]
+    assert all("active_char" in r for r in rows)
+    return len(rows)
+
+
+def _pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q / 100.0 * (len(xs) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://127.0.0.1:8080")
+    ap.add_argument("--rows", type=int, nargs="+", default=[50, 200])
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--me", type=int, metavar="N", help="N 명 점수판에서 /ranking/me (1등/꼴찌) 측정")
+    ap.add_argument("--force", action="store_true", help="DB 이름에 load/test 가 없어도 실행")
+    args = ap.parse_args()
+
+    if not args.force and not any(k in db.name for k in ("load", "test")):
+        raise SystemExit(f"DB '{db.name}' 는 테스트용이 아닌 것 같습니다. MONGODB_DB=ttalk_load 등으로 실행하거나 --force")
+
+    http = requests.Session()
+    if args.me:
+        bench_me(http, args.base, args.me, args.repeat)
+        return
+    uids = seed(max(args.rows))
+    try:
+        print(f"{'rows':>6} {'impl':>8} {'p50 ms':>8} {'p95 ms':>8} {'requests':>9}")
+        for n in args.rows:
+            for name, fn, reqs in (("per-row", load_per_row, n + 1), ("bulk", load_bulk, 1)):
+                ms = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    got = fn(http, args.base, n)
+                    ms.append((time.perf_counter() - t0) * 1000.0)
+                if got != n:
+                    raise SystemExit(f"{name}: rows {got} != {n}")
+                print(f"{n:>6} {name:>8} {statistics.median(ms):>8.1f} {_pct(ms, 95):>8.1f} {reqs:>9}")
+    finally:
+        cleanup(uids)
+
+
+if __name__ == "__main__":
+    main()
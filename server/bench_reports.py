@@ -0,0 +1,166 @@
+# server/bench_reports.py
+# 일별 리포트 벤치마크(예전 조회 5번 vs report_engine 한 번) — 운영 DB 에 돌리지 말 것
+#
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.bench_reports --users 1000 --days 365
+#
+# 유저 users 명에게 days 일치 포인트/출석/일별 원장을 만들고(하루 평균 포인트 3건 정도),
+#   1) 한 명의 한 달/1년 리포트 : legacy(집계 5번) vs engine(집계 1번)
+#   2) batch 명 리포트          : legacy 를 유저마다 반복 vs engine 한 번에
+# 을 repeat 번 재서 지연과 DB 왕복 수를 비교한다. 포인트 합계/사유별 합계가 같은지도 확인.
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import MongoClient, monitoring
+
+try:
+    # 패키지로 실행: python -m server.bench_reports
+    from .server_db import db
+    from . import daily_study, report_engine
+except Exception:
+    # 스크립트로 실행: cd server && python bench_reports.py
+    from server_db import db
+    import daily_study
+    import report_engine
+
+KST = timezone(timedelta(hours=9))
+LAST_DAY = datetime(2031, 12, 31, tzinfo=KST)      # 다른 데이터와 겹치지 않는 기간
+
+
+class _Counter(monitoring.CommandListener):
+    n = 0
+    def started(self, event): _Counter.n += 1
+    def succeeded(self, event): pass
+    def failed(self, event): pass
+
+
+# ---------- 예전 구현(비교 기준) ----------
+def legacy_daily(bdb, uid, start: str, end: str) -> dict:
+    t0, t1 = report_engine._kst_range(start, end)
+    P, A = bdb[os.getenv("POINTS_COLL", "points")], bdb[os.getenv("ATTENDANCE_COLL", "attendance")]
+    pos_match = {"user_id": uid, "gain_date": {"$gte": t0, "$lt": t1}, "point": {"$gt": 0}}
+    day = lambda e: {"$dateTrunc": {"date": e, "unit": "day", "timezone": "Asia/Seoul"}}
+    pts_by_day = {d["_id"]: int(d["sum"]) for d in P.aggregate([
+        {"$match": pos_match}, {"$group": {"_id": day("$gain_date"), "sum": {"$sum": "$point"}}}])}
+    pts_by_reason = {d["_id"] or "UNKNOWN": int(d["sum"]) for d in P.aggregate([
+        {"$match": pos_match}, {"$group": {"_id": "$reason", "sum": {"$sum": "$point"}}}])}
+    ses = list(bdb[daily_study._coll().name].find({"user_id": uid, "day": {"$gte": start, "$lte": end}}))
+    att = list(A.aggregate([
+        {"$match": {"user_id": uid, "$or": [{"date": {"$gte": t0, "$lt": t1}}, {"checked_at": {"$gte": t0, "$lt": t1}}]}},
+        {"$project": {"day": {"$ifNull": ["$date", day("$checked_at")]}}}, {"$group": {"_id": "$day"}}]))
+    att += list(P.aggregate([
+        {"$match": {**pos_match, "reason": {"$regex": "ATTEND", "$options": "i"}}},
+        {"$group": {"_id": day("$gain_date")}}]))
+    return {"points": sum(pts_by_day.values()), "points_by_reason": pts_by_reason,
+            "study_minutes": int(round(sum(d["gross_seconds"] for d in ses) / 60.0)), "att_n": len(att)}
+
+
+def _engine_summary(rep) -> dict:
+    return {"points": sum(d["points"] for d in rep["days"]), "points_by_reason": rep["points_by_reason"]}
+
+
+# ---------- 데이터 ----------
+def seed(n_users: int, n_days: int) -> list:
+    rnd = random.Random(7)
+    uids = [ObjectId() for _ in range(n_users)]
+    P, A, L = report_engine._points(), db[report_engine._att_name()], daily_study._coll()
+    first = LAST_DAY - timedelta(days=n_days - 1)
+    for uid in uids:
+        pts, att, led = [], [], []
+        for i in range(n_days):
+            day0 = first + timedelta(days=i)
+            iso = day0.strftime("%Y-%m-%d")
+            if rnd.random() < 0.3:
+                continue
+            mins = rnd.randint(20, 240)
+            led.append({"user_id": uid, "day": iso, "net_seconds": mins * 60.0, "gross_seconds": mins * 66.0,
+                        "sessions": rnd.randint(1, 4), "focus_sum": 0.0, "focus_n": 0, "yawns": 0, "sleeps": 0, "built": True})
+            for k in range(1, mins // 60 + 1):
+                pts.append({"user_id": uid, "reason": f"HOUR_{iso}_{k}", "point": 5, "gain_date": day0 + timedelta(hours=23)})
+            if mins >= 60:
+                pts.append({"user_id": uid, "reason": f"ATTEND_{iso}", "point": 2, "gain_date": day0 + timedelta(hours=20)})
+            if rnd.random() < 0.2:
+                pts.append({"user_id": uid, "reason": f"BET_START#{iso}", "point": -20, "gain_date": day0 + timedelta(hours=19)})
+            if rnd.random() < 0.5:
+                att.append({"user_id": uid, "checked_at": day0 + timedelta(hours=9), "bench_reports": True})
+        if pts: P.insert_many(pts, ordered=False)
+        if att: A.insert_many(att, ordered=False)
+        if led: L.insert_many(led, ordered=False)
+    return uids
+
+
+def cleanup(uids):
+    for i in range(0, len(uids), 500):
+        q = {"user_id": {"$in": uids[i:i + 500]}}
+        report_engine._points().delete_many(q)
+        db[report_engine._att_name()].delete_many(q)
+        daily_study._coll().delete_many(q)
+
+
+def _pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q / 100.0 * (len(xs) - 1))))]
+
+
+def _time(fn, repeat):
+    ms, cmds = [], 0
+    for _ in range(repeat):
+        c0 = _Counter.n
+        t0 = time.perf_counter()
+        fn()
+        ms.append((time.perf_counter() - t0) * 1000.0)
+        cmds = _Counter.n - c0
+    return statistics.median(ms), _pct(ms, 95), cmds
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=1000)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--batch", type=int, nargs="+", default=[1, 50, 200], help="리포트 한 번에 볼 유저 수")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--keep", action="store_true", help="시드 데이터 남기기")
+    ap.add_argument("--force", action="store_true", help="DB 이름에 load/test 가 없어도 실행")
+    args = ap.parse_args()
+
+    if not args.force and not any(k in db.name for k in ("load", "test")):
+        raise SystemExit(f"DB '{db.name}' 는 테스트용이 아닌 것 같습니다. MONGODB_DB=ttalk_load 등으로 실행하거나 --force")
+    bdb = MongoClient(os.getenv("MONGODB_URI"), event_listeners=[_Counter()])[db.name]
+
+    t0 = time.perf_counter()
+    uids = seed(args.users, args.days)
+    print(f"seeded users={args.users} days={args.days} in {time.perf_counter() - t0:.1f}s")
+    report_engine.ensure_indexes()
+    end = LAST_DAY.strftime("%Y-%m-%d")
+    ranges = {"month": (LAST_DAY - timedelta(days=29)).strftime("%Y-%m-%d"),
+              "year": (LAST_DAY - timedelta(days=args.days - 1)).strftime("%Y-%m-%d")}
+    engine_db = report_engine.db
+    try:
+        # 결과 확인(포인트 합계/사유별 합계)
+        for uid in uids[:5]:
+            leg = legacy_daily(bdb, uid, ranges["year"], end)
+            eng = _engine_summary(report_engine.daily_reports([uid], ranges["year"], end)[uid])
+            if leg["points"] != eng["points"] or leg["points_by_reason"] != eng["points_by_reason"]:
+                raise SystemExit(f"결과가 다름: {uid}")
+
+        report_engine.db = bdb      # 명령 수를 세기 위해 같은 리스너 클라이언트로
+        print(f"{'range':>6} {'users':>6} {'impl':>7} {'p50 ms':>9} {'p95 ms':>9} {'db cmds':>8}")
+        for name, start in ranges.items():
+            for n in args.batch:
+                group = uids[:n]
+                for impl, fn in (("legacy", lambda: [legacy_daily(bdb, u, start, end) for u in group]),
+                                 ("engine", lambda: report_engine.daily_reports(group, start, end))):
+                    p50, p95, cmds = _time(fn, args.repeat)
+                    print(f"{name:>6} {n:>6} {impl:>7} {p50:>9.1f} {p95:>9.1f} {cmds:>8}")
+    finally:
+        report_engine.db = engine_db
+        if not args.keep:
+            cleanup(uids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# server/bench_user_alias.py
+# 유저 키 → _id 조회 벤치마크(예전 12필드 $or vs user_alias) — 운영 DB 에 돌리지 말 것
+#
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.bench_user_alias --users 100000
+#
+# 로컬/카카오 유저를 users 명 만들고 별칭을 백필한 뒤, 무작위 키(local_user_id / 카카오 id / ObjectId)를
+#   legacy : 예전 reports._resolve_uid 와 같은 $or 조회
+#   alias  : user_alias (필드, 값) _id $in 조회(프로세스 캐시 끔)
+#   cached : user_alias.resolve (캐시를 한 번 채운 뒤 같은 키로)
+# 로 lookups 번씩 풀어 p50/p99 를 비교한다. 없는 키(miss)도 같은 수만큼 — resolve 는 처음(cold, FALLBACK
+# 이면 $or 까지)과 못 찾은 결과가 캐시된 뒤(cached)를 따로 잰다.
+import argparse
+import random
+import statistics
+import time
+
+from bson import ObjectId
+
+try:
+    # 패키지로 실행: python -m server.bench_user_alias
+    from .server_db import db
+    from . import user_alias
+except Exception:
+    # 스크립트로 실행: cd server && python bench_user_alias.py
+    from server_db import db
+    import user_alias
+
+LEGACY_FIELDS = ["local_user_id", "localUserId", "localId", "localid",
+                 "provider_id", "providerId", "provider",
+                 "id", "user_id", "userId", "email", "username"]
+
+
+def legacy_resolve(user_key: str):
+    U = user_alias._users()
+    if ObjectId.is_valid(user_key):
+        f = U.find_one({"_id": ObjectId(user_key)}, {"_id": 1})
+        if f: return f["_id"]
+    ors = []
+    for f in LEGACY_FIELDS:
+        ors.append({f: user_key})
+        try: ors.append({f: int(user_key)})
+        except ValueError: pass
+    f = U.find_one({"$or": ors}, {"_id": 1})
+    return f and f["_id"]
+
+
+def alias_uncached(user_key: str):
+    if ObjectId.is_valid(user_key):
+        u = user_alias._users().find_one({"_id": ObjectId(user_key)}, {"_id": 1})
+        if u: return u["_id"]
+    return user_alias._lookup([user_key]).get(user_key)
+
+
+def seed(n: int) -> list:
+    U = user_alias._users()
+    docs = []
+    for i in range(n):
+        if i % 3 == 0:
+            docs.append({"_id": ObjectId(), "provider": "kakao", "provider_id": 9_000_000_000 + i,
+                         "local_user_id": None, "nickname": f"bk{i}", "bench_alias": True})
+        else:
+            docs.append({"_id": ObjectId(), "provider": "local", "provider_id": 0,
+                         "local_user_id": f"bench_user_{i}", "nickname": f"bl{i}", "bench_alias": True})
+    for i in range(0, n, 5000):
+        U.insert_many(docs[i:i + 5000], ordered=False)
+    user_alias.ensure_indexes()
+    ops = [user_alias._op(f, v, d["_id"]) for d in docs for f, v in user_alias.aliases_of(d)]
+    for i in range(0, len(ops), 5000):
+        user_alias._bulk(ops[i:i + 5000])
+    return docs
+
+
+def cleanup(docs):
+    ids = [d["_id"] for d in docs]
+    for i in range(0, len(ids), 5000):
+        user_alias._users().delete_many({"_id": {"$in": ids[i:i + 5000]}})
+        user_alias._coll().delete_many({"user_id": {"$in": ids[i:i + 5000]}})
+
+
+def _pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q / 100.0 * (len(xs) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--lookups", type=int, default=2000)
+    ap.add_argument("--force", action="store_true", help="DB 이름에 load/test 가 없어도 실행")
+    args = ap.parse_args()
+
+    if not args.force and not any(k in db.name for k in ("load", "test")):
+        raise SystemExit(f"DB '{db.name}' 는 테스트용이 아닌 것 같습니다. MONGODB_DB=ttalk_load 등으로 실행하거나 --force")
+
+    t0 = time.perf_counter()
+    docs = seed(args.users)
+    print(f"seeded users={args.users} in {time.perf_counter() - t0:.1f}s")
+    rnd = random.Random(3)
+    picks = [rnd.choice(docs) for _ in range(args.lookups)]
+    keys = [(str(d["_id"]) if j % 5 == 0 else (d["local_user_id"] or str(d["provider_id"])), d["_id"])
+            for j, d in enumerate(picks)]
+    # 없는 키 — 없는 ObjectId / 없는 로컬 아이디 / 없는 카카오 id
+    misses = [(str(ObjectId()) if j % 5 == 0 else (f"nobody_{j}" if j % 2 else str(8_000_000_000 + j)), None)
+              for j in range(args.lookups)]
+    try:
+        print(f"{'keys':>5} {'impl':>7} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        for kind, ks in (("hit", keys), ("miss", misses)):
+            impls = [("legacy", legacy_resolve), ("alias", alias_uncached), ("cached", user_alias.resolve)]
+            if kind == "miss":
+                impls.insert(2, ("cold", user_alias.resolve))
+            for name, fn in impls:
+                if name == "cached" and kind == "hit":
+                    for k, _ in ks:     # 한 번 돌려 캐시를 채운 뒤 측정
+                        fn(k)
+                ms = []
+                for k, want in ks:
+                    if name == "cached" and kind == "miss":
+                        fn(k)           # miss 캐시는 _MISS_TTL 로 짧으므로 키마다 바로 앞에서 채움
+                    t = time.perf_counter()
+                    got = fn(k)
+                    ms.append((time.perf_counter() - t) * 1000.0)
+                    if got != want:
+                        raise SystemExit(f"{kind}/{name}: {k} → {got} != {want}")
+                print(f"{kind:>5} {name:>7} {statistics.median(ms):>8.3f} {_pct(ms, 99):>8.3f} {statistics.fmean(ms):>8.3f}")
+    finally:
+        cleanup(docs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+# server/daily_study.py
+# 유저 × KST 날짜 공부 원장(daily_study)
+#
+# 오늘/기간 공부 시간을 매번 sessions(+breaks)에서 다시 계산하지 않도록
+#   (user_id, day) 문서 하나에 순공부 초, 세션 길이 초(휴식 포함), 세션 수, 집중도 합/개수, 하품/졸음 수
+# 를 모아 둔다.
+#   - 세션 종료/휴식 종료 : record_session() — 세션 문서의 ledger(이전 기여분)와 비교해 차이만 $inc
+#   - 이벤트 적재         : add_events()     — 새로 저장된 yawn_end/sleep_end 만 $inc
+#   - 처음 보는 날        : rebuild()        — 원본에서 그날을 다시 계산(built=True)
+# 읽기는 get_day()/range_days() 로 문서 몇 개만.
+#
+# 증분 쓰기와 rebuild 가 같은 (유저, 날)에 겹치면 rebuild 가 이미 센 기여분을 $inc 가 한 번 더 더할 수 있다.
+# 그래서 원장 문서에 pending(진행 중인 증분 쓰기 수)과 gen(쓰기마다 +1)을 두고,
+#   - 증분 쓰기 : 원본/기여분을 바꾸기 전에 begin() 으로 pending+1, $inc 와 같은 update 에서 pending-1
+#   - rebuild   : 원본을 읽기 전의 gen 이 그대로이고 pending 이 0 인 날만 덮어씀
+#                 겹친 날은 built=False 로 두고 다음 get_day()/_inc() 가 다시 계산한다(요청 경로에서 기다리지 않음).
+#                 CLI(--rebuild)만 겹친 날을 잠깐 쉬었다가 REBUILD_TRIES 번까지 다시 해 본다.
+#
+# 과거 데이터 채우기/재계산:  python -m server.daily_study --rebuild [--user <id>] [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+# 세션 break_seconds 채우기:  python -m server.daily_study --backfill-breaks
+from datetime import datetime, timedelta, timezone
+import os
+
+import time
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+try:
+    # 패키지로 실행: python -m server.daily_study
+    from .server_db import db
+    from . import event_store
+except Exception:
+    # 스크립트로 실행: cd server && python daily_study.py
+    from server_db import db
+    import event_store
+
+KST = timezone(timedelta(hours=9))
+FIELDS = ("net_seconds", "gross_seconds", "sessions", "focus_sum", "focus_n", "yawns", "sleeps")
+YAWN, SLEEP = "yawn_end", "sleep_end"
+PENDING_STALE = 60.0        # 초. 이보다 오래 풀리지 않은 pending 은 죽은 요청으로 보고 무시
+REBUILD_TRIES = 5           # CLI 재계산에서 겹친 날을 다시 계산해 보는 횟수(넘으면 built=False 로 두고 다음 읽기/쓰기 때)
+
+def _coll():  return db[os.getenv("DAILY_STUDY_COLL", "daily_study")]
+
+def ensure_indexes():
+    _coll().create_index([("user_id", 1), ("day", 1)], unique=True)
+
+
+def to_kst(dt: datetime) -> datetime:
+    """Mongo 에서 읽은 naive datetime 은 UTC."""
+    return dt.replace(tzinfo=timezone.utc).astimezone(KST) if dt.tzinfo is None else dt.astimezone(KST)
+
+
+def day_key(dt: datetime) -> str:
+    return to_kst(dt).strftime("%Y-%m-%d")
+
+
+def day_start(day: str) -> datetime:
+    return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=KST)
+
+
+def net_seconds(ses: dict, breaks=None) -> float:
+    """
+    세션의 실제 공부 시간(초).
+      1) 프론트가 준 sum_study_time (초)
+      2) minutes 필드(예전/시드 데이터)
+      3) (end - start) - 휴식 합계
+    휴식 합계는 breaks(미리 불러 둔 종료된 휴식 목록)가 있으면 그것으로, 없으면 세션의 break_seconds.
+    """
+    sst = ses.get("sum_study_time")
+    if sst is not None:
+        try:
+            return float(sst)
+        except Exception:
+            pass
+    if ses.get("minutes") is not None:
+        return max(0.0, float(ses["minutes"]) * 60.0)
+    start = ses.get("study_date") or ses.get("start")
+    end = ses.get("end_time") or ses.get("end")
+    if not start or not end:
+        return 0.0
+    total = (end - start).total_seconds()
+    if breaks is None:
+        return max(0.0, total - float(ses.get("break_seconds") or 0.0))
+    br_secs = 0.0
+    for br in breaks:
+        st = br.get("start_time"); ed = br.get("end_time")
+        if st and ed:
+            br_secs += max(0.0, (ed - st).total_seconds())
+    return max(0.0, total - br_secs)
+
+
+def gross_seconds(ses: dict) -> float:
+    """세션 길이(초, 휴식 포함) — 예전 리포트 학습시간/연속일 기준: minutes 필드, 없으면 end - start."""
+    if ses.get("minutes") is not None:
+        return max(0.0, float(ses["minutes"]) * 60.0)
+    start = ses.get("study_date") or ses.get("start")
+    end = ses.get("end_time") or ses.get("end")
+    if not start or not end:
+        return 0.0
+    return max(0.0, (end - start).total_seconds())
+
+
+def contribution(ses: dict, breaks=None) -> dict | None:
+    """세션 1개가 원장에 더하는 값. 종료 전이면 None."""
+    start = ses.get("study_date") or ses.get("start")
+    if not start or not (ses.get("end_time") or ses.get("end")):
+        return None
+    fs = ses.get("focus_score")
+    return {"day": day_key(start), "net_seconds": net_seconds(ses, breaks), "gross_seconds": gross_seconds(ses),
+            "sessions": 1, "focus_sum": float(fs) if fs is not None else 0.0, "focus_n": 1 if fs is not None else 0}
+
+
+SESSION_FIELDS = {"user_id": 1, "study_date": 1, "end_time": 1, "start": 1, "end": 1, "minutes": 1,
+                  "sum_study_time": 1, "break_seconds": 1, "focus_score": 1, "ledger": 1}
+
+
+# ---------- 증분 갱신 ----------
+def begin(user_id, days) -> list:
+    """증분 쓰기 시작: 그날들의 pending+1(문서가 없으면 만듦). 끝은 _inc()/_end()/add_events()."""
+    days = sorted(set(days))
+    now = datetime.now(KST)
+    ops = [UpdateOne({"user_id": user_id, "day": day},
+                     {"$inc": {"pending": 1, "gen": 1}, "$set": {"pending_at": now},
+                      "$setOnInsert": {"date": day_start(day)}}, upsert=True) for day in days]
+    for attempt in range(2):
+        if not ops:
+            break
+        try:
+            _coll().bulk_write(ops, ordered=False)
+            ops = []
+        except BulkWriteError as e:
+            # 같은 날 문서를 두 요청이 동시에 처음 만든 경우(11000) → 그 건만 한 번 더(이번엔 갱신으로)
+            errs = e.details.get("writeErrors", [])
+            if attempt or any(err.get("code") != 11000 for err in errs):
+                raise
+            ops = [ops[err["index"]] for err in errs]
+    return days
+
+
+def _end(user_id, day: str):
+    _coll().update_one({"user_id": user_id, "day": day}, {"$inc": {"pending": -1, "gen": 1}})
+
+
+def record_session(ses: dict, breaks=None) -> dict | None:
+    """
+    세션 종료/휴식 종료 후 호출. 세션의 기여분을 새로 계산해 ledger 필드와 바꿔 끼우고
+    (이전 값은 원자적으로 돌려받음) 차이만 원장에 반영 → 여러 번 불러도 한 번만 더해짐.
+    휴식 합계는 세션의 break_seconds(end_break 가 유지). 이관 전 세션만 breaks 를 조회.
+    """
+    if breaks is None and ses.get("break_seconds") is None \
+            and ses.get("sum_study_time") is None and ses.get("minutes") is None:
+        breaks = list(db.breaks.find({"session_id": ses["_id"], "end_time": {"$ne": None}},
+                                     {"start_time": 1, "end_time": 1}))
+    new = contribution(ses, breaks)
+    if new is None:
+        return None
+    uid = ses["user_id"]
+    # 바꿔 끼우기 전에 pending 표시 → 그 사이 rebuild 는 이 날을 덮어쓰지 않음
+    days = set(begin(uid, {new["day"], (ses.get("ledger") or {}).get("day")} - {None}))
+    try:
+        before = db.sessions.find_one_and_update({"_id": ses["_id"]}, {"$set": {"ledger": new}},
+                                                 projection={"ledger": 1}, return_document=ReturnDocument.BEFORE)
+        old = (before or {}).get("ledger") or {}
+        if old and old.get("day") != new["day"]:
+            if old["day"] not in days:          # 넘겨받은 문서보다 ledger 가 새로 바뀐 경우(드묾)
+                days |= set(begin(uid, [old["day"]]))
+            days.discard(old["day"])
+            _inc(uid, old["day"], {k: -old.get(k, 0) for k in FIELDS[:5]})
+            old = {}
+        days.discard(new["day"])
+        _inc(uid, new["day"], {k: new[k] - old.get(k, 0) for k in FIELDS[:5]})
+    finally:
+        for day in days:                        # 시작만 하고 쓰지 않은 날(오류 포함)
+            _end(uid, day)
+    return new
+
+
+def _inc(user_id, day: str, delta: dict):
+    """begin() 한 날에 차이를 더하고 pending 을 푼다."""
+    delta = {k: v for k, v in delta.items() if v}
+    r = _coll().update_one({"user_id": user_id, "day": day, "built": True},
+                           {"$inc": {**delta, "pending": -1, "gen": 1}, "$set": {"updated_at": datetime.now(KST)}})
+    if r.matched_count == 0:
+        # 처음 보는 날(또는 이벤트만 먼저 들어온 날) → 원본에서 그날 전체를 다시 계산
+        _end(user_id, day)
+        rebuild(user_id=user_id, start=day, end=day, quiet=True)
+
+
+def event_days(docs: list) -> set:
+    """원장에 세는 이벤트(yawn_end/sleep_end)가 있는 날"""
+    return {day_key(d["timestamp"]) for d in docs if d.get("event_type") in (YAWN, SLEEP)}
+
+
+def add_events(user_id, docs: list, days: list):
+    """
+    새로 저장된 이벤트(session_events 형식) → 날짜별 하품/졸음 수 $inc.
+    days 는 버킷에 쓰기 전에 begin(user_id, event_days(전체)) 한 날들 — 새 이벤트가 없어도 pending 은 풂.
+    """
+    if user_id is None or not days:
+        return
+    per_day = {day: {"yawns": 0, "sleeps": 0} for day in days}
+    for d in docs:
+        et = d.get("event_type")
+        if et in (YAWN, SLEEP):
+            c = per_day.setdefault(day_key(d["timestamp"]), {"yawns": 0, "sleeps": 0})
+            c["yawns" if et == YAWN else "sleeps"] += 1
+    now = datetime.now(KST)
+    ops = [UpdateOne({"user_id": user_id, "day": day},
+                     {"$inc": {**{k: v for k, v in per_day[day].items() if v}, "pending": -1, "gen": 1},
+                      "$set": {"updated_at": now}})
+           for day in days]
+    _coll().bulk_write(ops, ordered=False)
+
+
+# ---------- 읽기 ----------
+def _row(d: dict | None, day: str) -> dict:
+    d = d or {}
+    row = {"day": day, **{k: d.get(k, 0) for k in FIELDS}}
+    row["avg_focus"] = (row["focus_sum"] / row["focus_n"]) if row["focus_n"] else None
+    return row
+
+
+def get_day(user_id, day: str) -> dict:
+    """그날 원장(없으면 0). 아직 계산 안 된 날이면 원본에서 한 번 계산."""
+    d = _coll().find_one({"user_id": user_id, "day": day})
+    if not d or not d.get("built"):
+        rebuild(user_id=user_id, start=day, end=day, quiet=True)
+        d = _coll().find_one({"user_id": user_id, "day": day})
+    return _row(d, day)
+
+
+def range_days(user_id, start: str, end: str) -> dict:
+    """[start, end] 날짜별 원장 {day: row}. 기록이 없는 날은 빠짐."""
+    return {d["day"]: _row(d, d["day"])
+            for d in _coll().find({"user_id": user_id, "day": {"$gte": start, "$lte": end}})}
+
+
+# ---------- 재계산 ----------
+def _sessions_with_breaks(match: dict, batch: int = 1000):
+    """
+    (세션, 종료된 휴식 목록 또는 None) — break_seconds 가 있는 세션은 None(그 값으로 계산),
+    없는(이관 전) 세션만 batch 개씩 모아 breaks 를 $in 한 번으로 붙여 옴.
+    """
+    chunk = []
+
+    def _flush():
+        need = [s["_id"] for s in chunk if s.get("break_seconds") is None]
+        brs = {}
+        if need:
+            for b in db.breaks.find({"session_id": {"$in": need}, "end_time": {"$ne": None}},
+                                    {"session_id": 1, "start_time": 1, "end_time": 1}):
+                brs.setdefault(b["session_id"], []).append(b)
+        out = [(s, None if s.get("break_seconds") is not None else brs.get(s["_id"], [])) for s in chunk]
+        chunk.clear()
+        return out
+
+    for ses in db.sessions.find(match, SESSION_FIELDS):
+        chunk.append(ses)
+        if len(chunk) >= batch:
+            yield from _flush()
+    yield from _flush()
+
+
+def rebuild(user_id=None, start: str | None = None, end: str | None = None, quiet: bool = False,
+            tries: int = 1, _try: int = 0) -> int:
+    """
+    원본(sessions(break_seconds) + 이벤트 버킷)에서 원장을 다시 계산해 덮어쓴다.
+    user_id/start/end 로 범위를 좁힐 수 있고, 세션마다 ledger 필드도 다시 맞춘다. → 갱신한 (유저, 날) 수
+    증분 쓰기가 진행 중이거나(pending) 읽는 동안 바뀐(gen) 날은 건너뛰고 built=False 로 둔다.
+    tries > 1 이면(CLI) 그날만 잠깐 쉬었다가 tries 번까지 다시 계산해 본다 — 요청 경로에서는 1.
+    """
+    t0 = day_start(start) if start else None
+    t1 = day_start(end) + timedelta(days=1) if end else None
+    rng = {}
+    if t0: rng["$gte"] = t0
+    if t1: rng["$lt"] = t1
+
+    # 0) 원본을 읽기 전에 덮어쓸 문서들의 gen/pending
+    lq = {}
+    if user_id is not None:
+        lq["user_id"] = user_id
+    if start or end:
+        lq["day"] = {**({"$gte": start} if start else {}), **({"$lte": end} if end else {})}
+    snap = {(d["user_id"], d["day"]): d
+            for d in _coll().find(lq, {"user_id": 1, "day": 1, "gen": 1, "pending": 1, "pending_at": 1})}
+    now = datetime.now(KST)
+    busy = {k for k, d in snap.items()
+            if (d.get("pending") or 0) > 0 and d.get("pending_at")
+            and (now - to_kst(d["pending_at"])).total_seconds() < PENDING_STALE}
+
+    match = {"$or": [{"study_date": rng or {"$type": "date"}}, {"start": rng or {"$type": "date"}}]}
+    if user_id is not None:
+        match["user_id"] = user_id
+    days: dict[tuple, dict] = {}
+    ses_ops = []
+    for ses, brs in _sessions_with_breaks(match):
+        c = contribution(ses, brs)
+        if c is None:
+            continue
+        key = (ses["user_id"], c["day"])
+        if ses.get("ledger") != c and key not in busy:
+            # 읽은 뒤 record_session 이 바꿔 끼웠으면 그쪽이 최신 → 건드리지 않음(그날 gen 도 바뀌어 다시 계산됨)
+            ses_ops.append(UpdateOne({"_id": ses["_id"], "ledger": ses.get("ledger")}, {"$set": {"ledger": c}}))
+        acc = days.setdefault(key, {k: 0 for k in FIELDS})
+        for k in FIELDS[:5]:
+            acc[k] += c[k]
+
+    # 하품/졸음 수: 이벤트 버킷의 분 단위 집계값을 KST 날짜로
+    bmatch = {}
+    if user_id is not None:
+        bmatch["user_id"] = user_id
+    if rng:
+        bmatch["minute"] = rng
+    for d in event_store._buckets().aggregate([
+        {"$match": bmatch},
+        {"$group": {"_id": {"u": "$user_id",
+                            "d": {"$dateToString": {"date": "$minute", "format": "%Y-%m-%d", "timezone": "Asia/Seoul"}}},
+                    "yawns": {"$sum": {"$ifNull": [f"$c.{YAWN}", 0]}},
+                    "sleeps": {"$sum": {"$ifNull": [f"$c.{SLEEP}", 0]}}}},
+    ]):
+        if d["_id"]["u"] is None:
+            continue
+        acc = days.setdefault((d["_id"]["u"], d["_id"]["d"]), {k: 0 for k in FIELDS})
+        acc["yawns"] += int(d["yawns"]); acc["sleeps"] += int(d["sleeps"])
+
+    # 범위를 좁혀 다시 계산할 때 기록이 사라진 날도 0 으로(built) 맞춤
+    if user_id is not None and start and end and (user_id, start) not in days and start == end:
+        days[(user_id, start)] = {k: 0 for k in FIELDS}
+
+    # 읽기 전 gen 그대로일 때만 덮어씀(없던 문서는 그 사이 아무도 안 만들었을 때만 upsert)
+    token = ObjectId()
+    ops = []
+    for (uid, day), acc in days.items():
+        if (uid, day) in busy:
+            continue
+        g = snap.get((uid, day)) or {}
+        flt = {"user_id": uid, "day": day, "gen": g["gen"] if g.get("gen") is not None else {"$exists": False}}
+        ops.append(UpdateOne(flt, {"$set": {**acc, "date": day_start(day), "built": True, "updated_at": now,
+                                            "pending": 0, "rebuilt": token}, "$inc": {"gen": 1}}, upsert=True))
+    for i in range(0, len(ses_ops), 1000):
+        db.sessions.bulk_write(ses_ops[i:i + 1000], ordered=False)
+    for i in range(0, len(ops), 1000):
+        try:
+            _coll().bulk_write(ops[i:i + 1000], ordered=False)
+        except BulkWriteError as e:
+            # 그 사이 다른 요청이 처음 만든 날(11000) → 아래에서 겹친 날로 처리
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    # 겹친 날(진행 중이었거나 읽는 동안 바뀐 날)은 그날만 다시
+    done = {(d["user_id"], d["day"]) for d in _coll().find({**lq, "rebuilt": token}, {"user_id": 1, "day": 1})}
+    retry = (set(days) | busy) - done
+    for uid, day in sorted(retry, key=str):
+        if _try + 1 < tries:
+            time.sleep(0.05 * (_try + 1))
+            rebuild(user_id=uid, start=day, end=day, quiet=True, tries=tries, _try=_try + 1)
+        else:
+            # 미계산으로 두고 다음 get_day()/_inc() 때 다시
+            _coll().update_one({"user_id": uid, "day": day}, {"$set": {"built": False}})
+    if not quiet:
+        print(f"✅ daily_study: days={len(done)} retried={len(retry)} sessions_updated={len(ses_ops)}")
+    return len(done)
+
+
+# ---------- 세션 휴식 합계(break_seconds) ----------
+def close_break(q: dict, end: datetime, extra: dict | None = None):
+    """
+    미종료 휴식 하나를 종료하고 그 길이를 세션 break_seconds 에 $inc.
+    find_one_and_update 라 같은 휴식을 두 번 닫아도 한 번만 더해짐. 닫은 휴식(이전 상태) 또는 None.
+    """
+    br = db.breaks.find_one_and_update({**q, "end_time": None}, {"$set": {"end_time": end, **(extra or {})}},
+                                       projection={"session_id": 1, "start_time": 1})
+    if br and br.get("start_time"):
+        secs = max(0.0, (to_kst(end) - to_kst(br["start_time"])).total_seconds())
+        db.sessions.update_one({"_id": br["session_id"]}, {"$inc": {"break_seconds": secs}})
+    return br
+
+
+def backfill_break_seconds(batch: int = 1000) -> int:
+    """
+    기존 세션에 break_seconds 채우기(종료된 휴식 합계, 없으면 0). 집계 1회 + bulk.
+    여러 번 돌려도 같은 값으로 덮어쓴다. → 갱신한 세션 수
+    """
+    ops, n = [], 0
+    for d in db.breaks.aggregate([
+        {"$match": {"end_time": {"$ne": None}, "start_time": {"$ne": None}}},
+        {"$group": {"_id": "$session_id",
+                    "ms": {"$sum": {"$max": [0, {"$subtract": ["$end_time", "$start_time"]}]}}}},
+    ]):
+        ops.append(UpdateOne({"_id": d["_id"]}, {"$set": {"break_seconds": d["ms"] / 1000.0}}))
+        if len(ops) >= batch:
+            n += db.sessions.bulk_write(ops, ordered=False).modified_count; ops = []
+    if ops:
+        n += db.sessions.bulk_write(ops, ordered=False).modified_count
+    n += db.sessions.update_many({"break_seconds": {"$exists": False}}, {"$set": {"break_seconds": 0.0}}).modified_count
+    return n
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="sessions/breaks/이벤트에서 원장 재계산")
+    ap.add_argument("--user", help="특정 유저 ObjectId 만")
+    ap.add_argument("--start", help="YYYY-MM-DD (KST)")
+    ap.add_argument("--end", help="YYYY-MM-DD (KST)")
+    ap.add_argument("--backfill-breaks", action="store_true", help="sessions.break_seconds 채우기")
+    args = ap.parse_args()
+    ensure_indexes()
+    if args.backfill_breaks:
+        print(f"✅ break_seconds: sessions updated={backfill_break_seconds()}")
+    if args.rebuild:
+        rebuild(user_id=ObjectId(args.user) if args.user else None, start=args.start, end=args.end,
+                tries=REBUILD_TRIES)
+    elif not args.backfill_breaks:
+        print("✅ indexes ready")
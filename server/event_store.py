@@ -0,0 +1,222 @@
+# server/event_store.py
+# 하품/졸음 이벤트 저장소 — 세션 × 1분 버킷
+#
+# 이벤트 1건 = 문서 1개(session_events)로 쌓으면 문서 수가 폭증하고, 일/시간대 분석이
+# 원본을 전부 훑는다. 여기서는 (session_id, minute) 버킷 문서 하나에
+#   - 원본 이벤트 배열(events)
+#   - 미리 계산한 종류별 개수(c.*), 집중도 min/max/sum/n
+# 을 함께 넣는다. 리포트는 버킷 집계값만 읽고, 원본이 필요하면 events 를 펼친다.
+#
+# 기존 session_events 이관:  python -m server.event_store --migrate
+from datetime import datetime, timedelta, timezone
+import os
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+try:
+    # 패키지로 실행: python -m server.event_store
+    from .server_db import db
+except Exception:
+    # 스크립트로 실행: cd server && python event_store.py
+    from server_db import db
+
+KST = timezone(timedelta(hours=9))
+EVENT_TYPES = ("yawn_start", "yawn_end", "sleep_start", "sleep_end")
+
+def _buckets():  return db[os.getenv("EVENT_BUCKETS_COLL", "session_event_buckets")]
+
+def ensure_indexes():
+    B = _buckets()
+    B.create_index([("session_id", 1), ("minute", 1)], unique=True)
+    B.create_index([("user_id", 1), ("minute", 1)])
+
+
+def _minute(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+def _bucket_op(session_id, user_id, d: dict) -> UpdateOne:
+    """
+    이벤트 1건 → 버킷 upsert.
+    event_id 가 이미 버킷에 있으면 필터가 안 맞아 upsert(insert) 시도 → (session_id, minute) 유일 인덱스에서
+    중복키(11000) → 이미 저장된 이벤트로 처리.
+    """
+    et = d["event_type"]
+    ev = {"id": d.get("event_id"), "t": d["timestamp"], "e": et,
+          "a": d.get("attention"), "w": d.get("yawn_weight")}
+    flt = {"session_id": session_id, "minute": _minute(d["timestamp"])}
+    if ev["id"]:
+        flt["events.id"] = {"$ne": ev["id"]}
+    update = {
+        "$push": {"events": ev},
+        "$inc": {"n": 1, f"c.{et}": 1},
+        "$setOnInsert": {"user_id": user_id},
+    }
+    a = d.get("attention")
+    if a is not None:
+        update["$inc"].update({"att_sum": float(a), "att_n": 1})
+        update["$min"] = {"att_min": float(a)}
+        update["$max"] = {"att_max": float(a)}
+    return UpdateOne(flt, update, upsert=True)
+
+
+def write_events(session_id, user_id, docs: list, on_inserted=None) -> tuple:
+    """
+    session_events 형식 문서 목록(session_id/timestamp/event_type/attention/yawn_weight/event_id)을 버킷에 기록.
+    on_inserted 가 있으면 새로 저장된 문서 목록으로 호출(일별 원장 갱신용).
+    → (새로 저장된 수, 이미 있던 수)
+    """
+    if not docs:
+        return 0, 0
+    pending = list(docs)
+    # 새 버킷을 두 요청이 동시에 만들면 한쪽이 11000 → 한 번 더 시도하면 갱신으로 들어감
+    for attempt in range(2):
+        ops = [_bucket_op(session_id, user_id, d) for d in pending]
+        try:
+            _buckets().bulk_write(ops, ordered=False)
+            pending = []
+        except BulkWriteError as e:
+            errs = e.details.get("writeErrors", [])
+            if any(err.get("code") != 11000 for err in errs):
+                raise
+            pending = [pending[err["index"]] for err in errs]
+        if not pending:
+            break
+    duplicates = len(pending)
+    if on_inserted is not None and len(docs) > duplicates:
+        dup_ids = {id(d) for d in pending}
+        on_inserted([d for d in docs if id(d) not in dup_ids])
+    return len(docs) - duplicates, duplicates
+
+
+# ---------- 읽기 ----------
+def _owner_match(user_id=None, session_ids=None) -> dict:
+    m = {}
+    if user_id is not None:
+        m["user_id"] = user_id
+    if session_ids is not None:
+        m["session_id"] = {"$in": list(session_ids)}
+    return m
+
+
+def raw_events(t0: datetime, t1: datetime, user_id=None, session_ids=None) -> list:
+    """버킷을 펼쳐 원본 이벤트(session_events 형식) 복원. 시간순."""
+    q = {**_owner_match(user_id, session_ids), "minute": {"$gte": _minute(t0), "$lt": t1}}
+    out = []
+    for b in _buckets().find(q, {"session_id": 1, "events": 1}).sort("minute", 1):
+        for ev in b.get("events", []):
+            t = ev["t"]
+            if t.tzinfo is None:
+                t = t.replace(tzinfo=timezone.utc)
+            if not (t0 <= t < t1):
+                continue
+            out.append({"session_id": b["session_id"], "timestamp": t.astimezone(KST),
+                        "event_type": ev["e"], "attention": ev.get("a"),
+                        "yawn_weight": ev.get("w"), "event_id": ev.get("id")})
+    out.sort(key=lambda x: x["timestamp"])
+    return out
+
+
+def _group_fields() -> dict:
+    g = {"n": {"$sum": "$n"},
+         "att_min": {"$min": "$att_min"}, "att_max": {"$max": "$att_max"},
+         "att_sum": {"$sum": {"$ifNull": ["$att_sum", 0]}}, "att_n": {"$sum": {"$ifNull": ["$att_n", 0]}}}
+    for et in EVENT_TYPES:
+        g[et] = {"$sum": {"$ifNull": [f"$c.{et}", 0]}}
+    return g
+
+
+def _row(d: dict) -> dict:
+    row = {et: int(d.get(et, 0)) for et in EVENT_TYPES}
+    row.update({"n": int(d.get("n", 0)), "att_min": d.get("att_min"), "att_max": d.get("att_max"),
+                "att_avg": (d["att_sum"] / d["att_n"]) if d.get("att_n") else None})
+    return row
+
+
+def series(t0: datetime, t1: datetime, unit: str = "hour", user_id=None, session_ids=None) -> list:
+    """
+    버킷 집계값을 unit(minute/hour/day) 단위로 합친 시계열.
+    [{"t": KST datetime, "yawn_start":.., "yawn_end":.., "sleep_start":.., "sleep_end":..,
+      "n":.., "att_min":.., "att_max":.., "att_avg":..}, ...]
+    """
+    if unit not in ("minute", "hour", "day"):
+        raise ValueError(f"unsupported unit: {unit}")
+    key = "$minute" if unit == "minute" else {"$dateTrunc": {"date": "$minute", "unit": unit, "timezone": "Asia/Seoul"}}
+    pipeline = [
+        {"$match": {**_owner_match(user_id, session_ids), "minute": {"$gte": _minute(t0), "$lt": t1}}},
+        {"$group": {"_id": key, **_group_fields()}},
+        {"$sort": {"_id": 1}},
+    ]
+    out = []
+    for d in _buckets().aggregate(pipeline):
+        t = d["_id"]
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        out.append({"t": t.astimezone(KST), **_row(d)})
+    return out
+
+
+def hour_of_day(t0: datetime, t1: datetime, user_id=None, session_ids=None) -> list:
+    """KST 시간대(0~23)별 합계 24칸 — 기간 히스토그램용."""
+    pipeline = [
+        {"$match": {**_owner_match(user_id, session_ids), "minute": {"$gte": _minute(t0), "$lt": t1}}},
+        {"$group": {"_id": {"$hour": {"date": "$minute", "timezone": "Asia/Seoul"}}, **_group_fields()}},
+    ]
+    hours = [_row({}) for _ in range(24)]
+    for d in _buckets().aggregate(pipeline):
+        hours[int(d["_id"])] = _row(d)
+    return hours
+
+
+# ---------- 이관 ----------
+def migrate(batch: int = 1000, drop_raw: bool = False):
+    """
+    session_events(문서 1건 = 이벤트 1건) → 버킷. event_id 없는 예전 문서는 _id 를 id 로 써서
+    여러 번 돌려도 중복 저장되지 않는다.
+    """
+    ensure_indexes()
+    # 아래 정렬 스캔용(session_events 는 이관할 때만 읽음 — 평소 시작 시에는 만들지 않는다)
+    db.session_events.create_index([("session_id", 1), ("timestamp", 1)])
+    owners = {}
+    moved = dup = 0
+    cur = db.session_events.find({}).sort([("session_id", 1), ("timestamp", 1)])
+    chunk, chunk_sid = [], None
+
+    def _flush():
+        nonlocal moved, dup
+        if not chunk:
+            return
+        if chunk_sid not in owners:
+            s = db.sessions.find_one({"_id": chunk_sid}, {"user_id": 1}) or {}
+            owners[chunk_sid] = s.get("user_id")
+        a, b = write_events(chunk_sid, owners[chunk_sid], chunk)
+        moved += a; dup += b
+        chunk.clear()
+
+    for d in cur:
+        if d["session_id"] != chunk_sid or len(chunk) >= batch:
+            _flush()
+            chunk_sid = d["session_id"]
+        d.setdefault("event_id", str(d["_id"]))
+        ts = d["timestamp"]
+        d["timestamp"] = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+        chunk.append(d)
+    _flush()
+    print(f"✅ buckets: moved={moved} already={dup}")
+    if drop_raw:
+        r = db.session_events.delete_many({})
+        print(f"🧹 session_events deleted={r.deleted_count}")
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--migrate", action="store_true")
+    ap.add_argument("--drop-raw", action="store_true", help="이관 후 session_events 삭제")
+    args = ap.parse_args()
+    if args.migrate:
+        migrate(drop_raw=args.drop_raw)
+    else:
+        ensure_indexes()
+        print("✅ indexes ready")
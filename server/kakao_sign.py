@@ -3,6 +3,7 @@ from fastapi import APIRouter
 from fastapi.responses import RedirectResponse, JSONResponse
 from urllib.parse import quote_plus
 from server.common_sign import db, now_kst, bump_streak_and_touch
+from server import user_alias
 from dotenv import load_dotenv
 import os, requests
 
@@ -82,6 +83,7 @@ def kakao_callback(code: str):
     else:
         bump_streak_and_touch(user)
         db.User.update_one({"_id": user["_id"]}, {"$set": {"nickname": nickname}})
+    user_alias.register(user)
         
     user_object_id = str(user["_id"]) # 👈 사용자의 ObjectId를 문자열로 저장
     n = quote_plus(nickname or "")
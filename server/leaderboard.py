@@ -0,0 +1,303 @@
+# server/leaderboard.py
+# 랭킹 점수판 — 포인트가 기록될 때마다 증분 갱신
+#
+# 예전 /ranking/top 은 요청마다 points 전체를 기간으로 $group 했다(원장이 커질수록 느려짐).
+# 여기서는 leaderboard 컬렉션에 (board, user_id) 문서 하나씩
+#   board = "day:2026-10-18" (KST 하루) | "all"
+#   points   : 그 board 에서 획득(+만) 포인트 합
+#   attempts : 그 board 의 ATTENDANCE# 건수
+# 을 두고 $inc 로 갱신한다.
+#   - 전체(all)     : (board, points, attempts) 인덱스를 앞에서 N 개
+#   - 주간/월간     : 예전처럼 '최근 7일/30일'(롤링) — 해당 날짜 board 들만 모아 $group
+#                     (오늘 포함 7/30 개 KST 날짜, 기간 안에 활동한 (유저, 날) 문서 수만큼 읽음)
+# 날짜 board 문서는 date 필드의 TTL 인덱스로 DAY_TTL_DAYS 뒤 지워진다.
+#
+# 내 순위(/ranking/me):
+#   - 전체(all)     : leaderboard_hist 에 전체 board 의 점수 분포를 같이 둔다
+#                       level "c" : HIST_WIDTH 점 단위 칸별 인원,  level "p" : 점수별 인원
+#                     나보다 높은 칸 합 + 내 칸 안에서 더 높은 점수 합 + 동점 중 attempts 가 더 많은 수
+#                     → 순위와 상관없이 (최고점/HIST_WIDTH + HIST_WIDTH + 동점자) 개 문서만 읽음
+#   - 주간/월간     : window_dist() 가 기간 합계를 (points, attempts) 별 누적 인원으로 접어 두고(기간 안
+#                     (유저, 날) 문서 수에 비례), 내 합계(날짜 board 최대 30개)로 그 목록을 이분 탐색.
+#                     /ranking/me 는 window_dist 를 랭킹 캐시(ranking_cache)에 두고 TTL 마다 백그라운드로
+#                     한 번만 다시 계산 → 요청당 O(기간 일수 + log 점수 종류). 남의 점수는 캐시 TTL 만큼 늦을 수 있음
+#   벤치: python -m server.bench_ranking --me 100000
+#
+# 기존 points 로 다시 채우기:  python -m server.leaderboard --rebuild
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+import os
+
+from pymongo import DESCENDING, ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+try:
+    # 패키지로 실행: python -m server.leaderboard
+    from .server_db import db
+except Exception:
+    # 스크립트로 실행: cd server && python leaderboard.py
+    from server_db import db
+
+KST = timezone(timedelta(hours=9))
+PERIODS = ("weekly", "monthly", "all")
+WINDOW_DAYS = {"weekly": 7, "monthly": 30}
+DAY_TTL_DAYS = 40
+HIST_WIDTH = 100            # 전체 board 점수 분포의 칸 폭(점)
+ATTEND_PREFIX = "ATTENDANCE#"
+
+def _coll():  return db[os.getenv("LEADERBOARD_COLL", "leaderboard")]
+def _hist():  return db[os.getenv("LEADERBOARD_HIST_COLL", "leaderboard_hist")]
+def _points():  return db[os.getenv("POINTS_COLL", "points")]
+
+def ensure_indexes():
+    L = _coll()
+    L.create_index([("board", ASCENDING), ("user_id", ASCENDING)], unique=True)
+    L.create_index([("board", ASCENDING), ("points", DESCENDING), ("attempts", DESCENDING), ("user_id", ASCENDING)])
+    L.create_index([("date", ASCENDING)], expireAfterSeconds=DAY_TTL_DAYS * 86400)
+    _hist().create_index([("level", ASCENDING), ("v", ASCENDING)], unique=True)
+
+
+def _kst(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc).astimezone(KST) if dt.tzinfo is None else dt.astimezone(KST)
+
+
+def day_board(when: datetime | None = None) -> str:
+    return f"day:{_kst(when or datetime.now(KST)):%Y-%m-%d}"
+
+
+def boards(period: str, now: datetime | None = None) -> list:
+    """기간이 덮는 board 목록 — all 이면 ["all"], 주간/월간이면 오늘부터 거꾸로 7/30 개 날짜"""
+    if period not in WINDOW_DAYS:
+        return ["all"]
+    now = _kst(now or datetime.now(KST))
+    return [day_board(now - timedelta(days=i)) for i in range(WINDOW_DAYS[period])]
+
+
+def window(period: str, now: datetime | None = None) -> tuple:
+    """board 가 덮는 [start, now) — 응답 표시용"""
+    now = _kst(now or datetime.now(KST))
+    if period in WINDOW_DAYS:
+        day0 = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return day0 - timedelta(days=WINDOW_DAYS[period] - 1), now
+    return datetime(1970, 1, 1, tzinfo=KST), now
+
+
+# ---------- 쓰기 ----------
+def _deltas(docs) -> dict:
+    acc = {}
+    for d in docs:
+        p = int(d.get("point") or 0)
+        att = 1 if str(d.get("reason") or "").startswith(ATTEND_PREFIX) else 0
+        if p <= 0 and not att:
+            continue
+        when = d.get("gain_date") or datetime.now(KST)
+        for board in (day_board(when), "all"):
+            a = acc.setdefault((board, d["user_id"]), [0, 0])
+            a[0] += max(p, 0); a[1] += att
+    return acc
+
+
+def _op(board: str, uid, update: dict) -> UpdateOne:
+    if board != "all":
+        # 날짜 board 는 TTL 로 지워지도록 그날 0시(KST)
+        update = {**update, "$setOnInsert": {"date": datetime.strptime(board[4:], "%Y-%m-%d").replace(tzinfo=KST)}}
+    return UpdateOne({"board": board, "user_id": uid}, update, upsert=True)
+
+
+def _hist_ops(moves: dict) -> list:
+    """{(level, v): 인원 증감} → 점수 분포 upsert (0 이 된 칸은 그대로 둔다)"""
+    return [UpdateOne({"level": lv, "v": v}, {"$inc": {"n": n}}, upsert=True)
+            for (lv, v), n in moves.items() if n]
+
+
+def _move(moves: dict, old: int | None, new: int):
+    """전체 board 에서 한 유저 점수가 old(None 이면 새로 들어옴) → new"""
+    if old == new:
+        return
+    for p, n in ((old, -1), (new, 1)):
+        if p is None:
+            continue
+        for key in (("c", p // HIST_WIDTH), ("p", p)):
+            moves[key] = moves.get(key, 0) + n
+
+
+def _record_all(uid, p: int, a: int, moves: dict, session=None):
+    """전체 board 는 바뀌기 전 점수가 있어야 분포를 옮길 수 있으므로 한 건씩"""
+    L = _coll()
+    for attempt in range(2):
+        try:
+            old = L.find_one_and_update({"board": "all", "user_id": uid}, {"$inc": {"points": p, "attempts": a}},
+                                        projection={"points": 1}, upsert=True,
+                                        return_document=ReturnDocument.BEFORE, session=session)
+            break
+        except DuplicateKeyError:
+            # 같은 유저의 첫 기록이 동시에 upsert → 한 번 더 하면 갱신으로 들어감
+            if attempt or session is not None:
+                raise
+    was = int(old.get("points") or 0) if old else None
+    _move(moves, was, (was or 0) + p)
+
+
+def record(docs, session=None):
+    """
+    새로 기록된 포인트 문서들(user_id/gain_date/point/reason) → 점수판 $inc.
+    이미 있던(중복) 포인트는 넘기지 말 것.
+    """
+    ops, moves = [], {}
+    for (board, uid), (p, a) in _deltas(docs).items():
+        if board == "all":
+            _record_all(uid, p, a, moves, session)
+        else:
+            ops.append(_op(board, uid, {"$inc": {"points": p, "attempts": a}}))
+    if ops:
+        _coll().bulk_write(ops, ordered=False, session=session)
+    hops = _hist_ops(moves)
+    for attempt in range(2):
+        if not hops:
+            break
+        try:
+            _hist().bulk_write(hops, ordered=False, session=session)
+            break
+        except BulkWriteError as e:
+            # 같은 칸 문서를 두 요청이 동시에 처음 만들면 한쪽이 11000 → 실패한 것만 한 번 더
+            # (트랜잭션 안이면 이미 중단됐으므로 호출한 쪽이 처음부터 다시 시도)
+            errs = e.details.get("writeErrors", [])
+            if session is not None or attempt or any(err.get("code") != 11000 for err in errs):
+                raise
+            hops = [hops[err["index"]] for err in errs]
+
+
+# ---------- 읽기 ----------
+_ORDER = [("points", DESCENDING), ("attempts", DESCENDING), ("user_id", ASCENDING)]
+
+def _window_sums(period: str, now: datetime | None, match: dict | None = None) -> list:
+    """주간/월간: 날짜 board 들을 유저별로 합친 파이프라인 앞부분"""
+    return [
+        {"$match": {"board": {"$in": boards(period, now)}, **(match or {})}},
+        {"$group": {"_id": "$user_id", "points": {"$sum": "$points"}, "attempts": {"$sum": "$attempts"}}},
+        {"$project": {"_id": 0, "user_id": "$_id", "points": 1, "attempts": 1}},
+    ]
+
+
+def top(period: str, limit: int = 50, now: datetime | None = None) -> list:
+    """[{user_id, points, attempts}] 점수 순"""
+    if period not in WINDOW_DAYS:
+        # 인덱스 앞에서 limit 개만 읽음
+        return list(_coll().find({"board": "all"}, {"_id": 0, "user_id": 1, "points": 1, "attempts": 1})
+                    .sort(_ORDER).limit(int(limit)))
+    return list(_coll().aggregate(_window_sums(period, now) + [
+        {"$sort": dict(_ORDER)}, {"$limit": int(limit)},
+    ]))
+
+
+def window_dist(period: str, now: datetime | None = None) -> list:
+    """주간/월간 기간 합계의 점수 분포 — 높은 순 [[points, attempts, 여기까지 누적 인원], ...] (JSON 으로 캐시 가능)"""
+    out, cum = [], 0
+    for r in _coll().aggregate(_window_sums(period, now) + [
+        {"$group": {"_id": {"p": "$points", "a": "$attempts"}, "n": {"$sum": 1}}},
+        {"$sort": {"_id.p": -1, "_id.a": -1}},
+    ], allowDiskUse=True):
+        cum += int(r["n"])
+        out.append([int(r["_id"]["p"]), int(r["_id"]["a"]), cum])
+    return out
+
+
+def rank_of(period: str, user_id, now: datetime | None = None, dist: list | None = None) -> dict:
+    """
+    내 순위(1부터, 기록 없으면 None) / 점수 / 그 기간 참가자 수.
+    전체는 점수 분포(leaderboard_hist)로 세고, 주간/월간은 window_dist()(dist 로 캐시된 값을 넘길 수 있음)를
+    이분 탐색한다(모듈 주석 참고).
+    """
+    L = _coll()
+    if period not in WINDOW_DAYS:
+        me = L.find_one({"board": "all", "user_id": user_id}, {"points": 1, "attempts": 1}) or {}
+        p, a = int(me.get("points", 0)), int(me.get("attempts", 0))
+        c = p // HIST_WIDTH
+        res = next(_hist().aggregate([{"$facet": {
+            "total": [{"$match": {"level": "c"}}, {"$group": {"_id": None, "n": {"$sum": "$n"}}}],
+            "ahead": [{"$match": {"$or": [{"level": "c", "v": {"$gt": c}},
+                                          {"level": "p", "v": {"$gt": p, "$lt": (c + 1) * HIST_WIDTH}}]}},
+                      {"$group": {"_id": None, "n": {"$sum": "$n"}}}],
+        }}]), {})
+        total = int((res.get("total") or [{"n": 0}])[0]["n"])
+        if not me:
+            return {"rank": None, "points": 0, "attempts": 0, "total": total}
+        # 동점자 중 attempts 가 더 많은 사람 — (board, points, attempts) 인덱스의 한 구간
+        ties = L.count_documents({"board": "all", "points": p, "attempts": {"$gt": a}})
+        ahead = int((res.get("ahead") or [{"n": 0}])[0]["n"]) + ties
+        return {"rank": ahead + 1, "points": p, "attempts": a, "total": total}
+
+    me = next(L.aggregate(_window_sums(period, now, {"user_id": user_id})), None)
+    dist = window_dist(period, now) if dist is None else dist
+    total = dist[-1][2] if dist else 0
+    if not me:
+        return {"rank": None, "points": 0, "attempts": 0, "total": total}
+    p, a = int(me["points"]), int(me["attempts"])
+    # 나보다 (points, attempts) 가 큰 마지막 칸의 누적 인원 = 앞선 사람 수
+    i = bisect_left(dist, (-p, -a), key=lambda r: (-r[0], -r[1]))
+    ahead = dist[i - 1][2] if i else 0
+    # 캐시된 분포에 내 최근 점수가 아직 없을 수 있음
+    return {"rank": ahead + 1, "points": p, "attempts": a, "total": max(total, ahead + 1)}
+
+
+# ---------- 재계산 ----------
+def rebuild(quiet: bool = False) -> int:
+    """
+    points 전체로 점수판을 다시 계산(점수판을 비우고 채움). → 문서 수
+    Mongo 에서 (유저, KST 날짜) 단위로 모아 날짜 board 로 쓰고, 전체(all)는 그 합.
+    TTL 로 곧 지워질 오래된 날짜 board 는 만들지 않는다.
+    """
+    ensure_indexes()
+    pos = {"$cond": [{"$gt": ["$point", 0]}, "$point", 0]}
+    att = {"$cond": [{"$regexMatch": {"input": {"$ifNull": ["$reason", ""]}, "regex": f"^{ATTEND_PREFIX}"}}, 1, 0]}
+    oldest = day_board(datetime.now(KST) - timedelta(days=DAY_TTL_DAYS))
+    acc = {}
+    for d in _points().aggregate([
+        {"$match": {"gain_date": {"$type": "date"}}},
+        {"$group": {"_id": {"u": "$user_id",
+                            "d": {"$dateToString": {"date": "$gain_date", "format": "%Y-%m-%d", "timezone": "Asia/Seoul"}}},
+                    "points": {"$sum": pos}, "attempts": {"$sum": att}}},
+    ], allowDiskUse=True):
+        day = f"day:{d['_id']['d']}"
+        for board in ((day, "all") if day >= oldest else ("all",)):
+            a = acc.setdefault((board, d["_id"]["u"]), [0, 0])
+            a[0] += int(d["points"]); a[1] += int(d["attempts"])
+
+    L = _coll()
+    L.delete_many({})
+    ops = [_op(board, uid, {"$set": {"points": p, "attempts": a}})
+           for (board, uid), (p, a) in acc.items() if p > 0 or a > 0]
+    for i in range(0, len(ops), 1000):
+        L.bulk_write(ops[i:i + 1000], ordered=False)
+    n = rebuild_hist()
+    if not quiet:
+        print(f"✅ leaderboard: docs={len(ops)} hist={n}")
+    return len(ops)
+
+
+def rebuild_hist() -> int:
+    """전체 board 로 점수 분포(leaderboard_hist)를 다시 계산. → 분포 문서 수"""
+    moves = {}
+    for d in _coll().aggregate([{"$match": {"board": "all"}},
+                                {"$group": {"_id": "$points", "n": {"$sum": 1}}}], allowDiskUse=True):
+        p, n = int(d["_id"] or 0), int(d["n"])
+        for key in (("c", p // HIST_WIDTH), ("p", p)):
+            moves[key] = moves.get(key, 0) + n
+    H = _hist()
+    H.delete_many({})
+    docs = [{"level": lv, "v": v, "n": n} for (lv, v), n in moves.items()]
+    for i in range(0, len(docs), 1000):
+        H.insert_many(docs[i:i + 1000], ordered=False)
+    return len(docs)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="points 로 점수판 재계산")
+    args = ap.parse_args()
+    if args.rebuild:
+        rebuild()
+    else:
+        ensure_indexes()
+        print("✅ indexes ready")
@@ -0,0 +1,156 @@
+# server/load_test_events.py
+# 이벤트 대량 적재(/study/sessions/{id}/events/bulk) 부하 테스트 — 운영 DB 에 돌리지 말 것
+#
+#   docker run -d -p 27017:27017 mongo:7
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load uvicorn server.app:app --port 8080 --workers 4
+#   MONGODB_URI=mongodb://localhost:27017 MONGODB_DB=ttalk_load python -m server.load_test_events --sessions 50 --seconds 20
+#
+# 시뮬레이션 세션마다 스레드 1개가 batch 개씩 열 단위 이벤트를 계속 보내고,
+# --retry-ratio 비율만큼 같은 배치를 한 번 더 보내(업로더 재시도 흉내) 중복 저장이 없는지 확인한다.
+import argparse
+import random
+import threading
+import time
+import uuid
+
+import requests
+from bson import ObjectId
+
+try:
+    # 패키지로 실행: python -m server.load_test_events
+    from .server_db import db
+except Exception:
+    # 스크립트로 실행: cd server && python load_test_events.py
+    from server_db import db
+
+try:
+    from .event_store import _buckets
+except Exception:
+    from event_store import _buckets
+
+try:
+    from attention.journal import encode_body
+except Exception:
+    encode_body = None
+
+
+def make_batch(n: int, now: float) -> dict:
+    cols = {"event_id": [], "kind": [], "type": [], "ts": [], "attention": [], "yawn_weight": []}
+    for i in range(n):
+        kind = random.choice(("yawn", "sleep"))
+        typ = random.choice(("start", "yawn_end" if kind == "yawn" else "drowys_end"))
+        cols["event_id"].append(uuid.uuid4().hex)
+        cols["kind"].append(kind)
+        cols["type"].append(typ)
+        cols["ts"].append(now - (n - i) * 0.05)
+        cols["attention"].append(None if typ == "start" else float(random.randint(60, 100)))
+        cols["yawn_weight"].append(round(random.uniform(0.6, 2.0), 2) if typ == "yawn_end" else None)
+    return cols
+
+
+def _encode(cols: dict, use_msgpack: bool):
+    if encode_body is not None:
+        return encode_body(cols, use_msgpack=use_msgpack)
+    import json
+    return json.dumps(cols).encode("utf-8"), {"Content-Type": "application/json"}
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.client_ms, self.server_ms = [], []
+        self.sent = self.inserted = self.retries = self.retry_dups = self.errors = self.requests = 0
+
+    def add(self, client_ms, resp, retry=False):
+        with self.lock:
+            self.requests += 1
+            self.client_ms.append(client_ms)
+            self.server_ms.append(resp.get("latency_ms", 0.0))
+            if retry:
+                self.retries += 1
+                self.retry_dups += resp.get("duplicates", 0)
+            else:
+                self.sent += resp.get("received", 0)
+                self.inserted += resp.get("inserted", 0)
+
+
+def session_loop(base, sid, args, stats: Stats, stop: threading.Event):
+    http = requests.Session()
+    url = f"{base}/study/sessions/{sid}/events/bulk"
+    interval = 1.0 / args.rate if args.rate else 0.0
+    while not stop.is_set():
+        t_next = time.perf_counter() + interval
+        body, headers = _encode(make_batch(args.batch, time.time()), not args.json)
+        for retry in (False, True):
+            if retry and random.random() >= args.retry_ratio:
+                break
+            t0 = time.perf_counter()
+            try:
+                r = http.post(url, data=body, headers=headers, timeout=10)
+                r.raise_for_status()
+                stats.add((time.perf_counter() - t0) * 1000.0, r.json(), retry)
+            except requests.exceptions.RequestException:
+                with stats.lock:
+                    stats.errors += 1
+        if interval:
+            time.sleep(max(0.0, t_next - time.perf_counter()))
+
+
+def _pct(xs, q):
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q / 100.0 * (len(xs) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default="http://127.0.0.1:8080")
+    ap.add_argument("--sessions", type=int, default=50)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--batch", type=int, default=50, help="요청당 이벤트 수")
+    ap.add_argument("--rate", type=float, default=0.0, help="세션당 초당 배치 수(0 = 최대한 빨리)")
+    ap.add_argument("--retry-ratio", type=float, default=0.1, help="같은 배치를 다시 보내는 비율")
+    ap.add_argument("--json", action="store_true", help="msgpack 대신 JSON 본문")
+    ap.add_argument("--keep", action="store_true", help="테스트 데이터 남기기")
+    ap.add_argument("--force", action="store_true", help="DB 이름에 load/test 가 없어도 실행")
+    args = ap.parse_args()
+
+    if not args.force and not any(k in db.name for k in ("load", "test")):
+        raise SystemExit(f"DB '{db.name}' 는 테스트용이 아닌 것 같습니다. MONGODB_DB=ttalk_load 등으로 실행하거나 --force")
+
+    sids = [ObjectId() for _ in range(args.sessions)]
+    db.sessions.insert_many([{"_id": s, "user_id": ObjectId(), "study_date": None, "end_time": None,
+                              "load_test": True} for s in sids])
+    stats, stop = Stats(), threading.Event()
+    threads = [threading.Thread(target=session_loop, args=(args.base, str(s), args, stats, stop), daemon=True)
+               for s in sids]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    agg = list(_buckets().aggregate([{"$match": {"session_id": {"$in": sids}}},
+                                      {"$group": {"_id": None, "n": {"$sum": "$n"}, "docs": {"$sum": 1}}}]))
+    stored = agg[0]["n"] if agg else 0
+    bucket_docs = agg[0]["docs"] if agg else 0
+    print(f"sessions={args.sessions} batch={args.batch} body={'json' if args.json else 'msgpack'} wall={wall:.1f}s")
+    print(f"requests={stats.requests} ({stats.requests / wall:.0f}/s) errors={stats.errors}")
+    print(f"events sent={stats.sent} inserted={stats.inserted} → {stats.inserted / wall:,.0f} events/s")
+    print(f"client ms  p50={_pct(stats.client_ms, 50):.1f} p95={_pct(stats.client_ms, 95):.1f} p99={_pct(stats.client_ms, 99):.1f}")
+    print(f"server ms  p50={_pct(stats.server_ms, 50):.1f} p95={_pct(stats.server_ms, 95):.1f} p99={_pct(stats.server_ms, 99):.1f}")
+    print(f"retried batches={stats.retries} duplicates reported={stats.retry_dups} (expected {stats.retries * args.batch})")
+    print(f"stored={stored} in {bucket_docs} bucket docs, unique sent={stats.sent} → "
+          f"{'OK' if stored == stats.sent else 'MISMATCH'}")
+
+    if not args.keep:
+        _buckets().delete_many({"session_id": {"$in": sids}})
+        db.sessions.delete_many({"_id": {"$in": sids}})
+
+
+if __name__ == "__main__":
+    main()
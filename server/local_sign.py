@@ -3,6 +3,7 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
 from server.common_sign import db, hash_pw, verify_pw, now_kst, bump_streak_and_touch
+from server import user_alias
 
 router = APIRouter(prefix="/auth/local", tags=["local-auth"])
 
@@ -28,6 +29,7 @@ def local_signup(body: LocalSignupIn):
     if db.User.find_one({"nickname": nick}): return {"result": "error", "error": "nickname_exists"}
     doc = { "provider": "local", "provider_id": 0, "local_user_id": uid, "nickname": nick, "passwd": hash_pw(pw), "created_at": now_kst(), "points": 0, "continuous_count": 0, "last_login_log": now_kst() }
     db.User.insert_one(doc)
+    user_alias.register(doc)   # insert_one 이 doc 에 _id 를 채움
     return {"result": "ok", "user": {"provider": "local", "local_user_id": uid, "nickname": nick}}
 
 @router.post("/login")
@@ -37,6 +39,7 @@ def local_login(body: LocalLoginIn):
     if not user or not user.get("passwd"): return {"result": "error", "error": "not_found"}
     if not verify_pw(pw, user["passwd"]): return {"result": "error", "error": "wrong_password"}
     bump_streak_and_touch(user)
+    user_alias.register(user)  # 별칭 없는 기존 유저도 로그인 때 채움
     fresh = db.User.find_one({"_id": user["_id"]})
     return {
         "result": "ok",
@@ -0,0 +1,206 @@
+# server/points_engine.py
+# 세션 종료 포인트 규칙 엔진
+#
+# 예전 award_all_points_on_finish 는 규칙마다 그날 세션을 다시 찾고, 세션마다 breaks 를 따로 조회하고,
+# 포인트 1건마다 find_one → insert_one → users.$inc 를 했다. 여기서는
+#   1) load_day     : 일별 원장(daily_study) 한 건, 관련 포인트 사유 조회 한 번, 유저 문서 한 번
+#   2) compute      : 모든 규칙을 메모리에서 계산(순수 함수)
+#   3) apply        : points upsert 를 bulk_write 한 번 + users.$inc/$set 한 번 (가능하면 트랜잭션)
+#                     새로 들어간 포인트만 랭킹 점수판(leaderboard)에 반영
+# 규칙/사유 문자열은 예전과 동일.
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import pytz
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+try:
+    from . import daily_study, leaderboard
+except Exception:
+    import daily_study
+    import leaderboard
+
+KST = pytz.timezone("Asia/Seoul")
+
+ATTN_MINUTES_CUTOFF = 25     # 25분 이전 종료면 집중도 포인트 없음
+ATTN_THRESHOLD = 60          # 평균 집중도 60점 이상
+ATTN_POINTS = 2              # 집중도 포인트: 고정 2점
+HOUR_POINTS = 5              # 시간 포인트: 1시간당 5점
+ATTEND_DAILY_POINTS = 2     # 하루 출석 +2
+ATTEND_WEEK_BONUS   = 2     # 7일 채우면 +2
+ONE_HOUR_SECS       = 3600
+
+_TXN_SUPPORTED = None        # None: 아직 모름 / True / False(단일 서버 등)
+
+
+def kst_day_range(when: datetime):
+    """KST 기준 당일 [00:00:00, 24:00:00) 범위 (naive 는 Mongo 저장값 = UTC)"""
+    local = daily_study.to_kst(when)
+    start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=1)
+    return start, end
+
+
+def attn_reason(session_doc) -> str | None:
+    end = session_doc.get("end_time")
+    if not end:
+        return None
+    return f"ATTN_{daily_study.day_key(end)}_session:{session_doc['_id']}"
+
+
+@dataclass
+class DayState:
+    user_oid: ObjectId
+    day_start: datetime
+    day_end: datetime
+    total_secs: float = 0.0                         # 그날 누적 순공부 시간(원장)
+    target: dict | None = None                      # 방금 종료한 세션(+ "net")
+    reasons: set = field(default_factory=set)       # 이미 받은 포인트 사유
+    continuous_count: int = 0
+
+    @property
+    def day_str(self) -> str:
+        return self.day_start.strftime("%Y-%m-%d")
+
+
+@dataclass
+class Award:
+    value: int
+    reason: str
+    when: datetime
+
+
+def load_day(db, session_doc) -> DayState:
+    user_oid = session_doc["user_id"] if isinstance(session_doc["user_id"], ObjectId) else ObjectId(session_doc["user_id"])
+    end = session_doc.get("end_time") or datetime.now(KST)
+    day_start, day_end = kst_day_range(end)
+    st = DayState(user_oid, day_start, day_end)
+
+    # 1) 그날 누적 시간은 원장에서, 방금 종료한 세션의 순공부 시간은 원장 기여분(ledger)에서
+    ledger = session_doc.get("ledger") or daily_study.record_session(session_doc) or {}
+    st.target = {**session_doc, "net": float(ledger.get("net_seconds", 0.0))}
+    st.total_secs = float(daily_study.get_day(user_oid, st.day_str)["net_seconds"])
+
+    # 2) 그날 관련 포인트 사유 — 조회 1회
+    yday_str = (day_start - timedelta(days=1)).strftime("%Y-%m-%d")
+    by_reason = [f"ATTEND_{yday_str}", f"ATTEND_{st.day_str}", f"ATTEND_WEEK_{st.day_str}"]
+    if attn_reason(session_doc):
+        by_reason.append(attn_reason(session_doc))
+    for p in db.points.find(
+        {"user_id": user_oid, "$or": [
+            {"gain_date": {"$gte": day_start, "$lt": day_end}},
+            {"reason": {"$in": by_reason}},
+        ]},
+        {"reason": 1, "_id": 0},
+    ):
+        st.reasons.add(p.get("reason"))
+
+    # 3) 연속 출석 카운트
+    user = db.users.find_one({"_id": user_oid}, {"continuous_count": 1}) or {}
+    st.continuous_count = int(user.get("continuous_count") or 0)
+    return st
+
+
+def compute(st: DayState, when: datetime) -> tuple:
+    """→ (지급할 Award 목록, 새 continuous_count 또는 None)"""
+    awards: list[Award] = []
+    day = st.day_str
+
+    # 집중도: 25분 이상 + 평균 60점 이상 → +2 (세션당 1회)
+    t = st.target or {}
+    if t.get("end_time") and t["net"] / 60.0 >= ATTN_MINUTES_CUTOFF and (t.get("focus_score") or 0) >= ATTN_THRESHOLD:
+        reason = attn_reason(t)
+        if reason not in st.reasons:
+            awards.append(Award(ATTN_POINTS, reason, t["end_time"]))
+
+    # 시간: 당일 누적 1시간마다 +5
+    total_secs = st.total_secs
+    total_hours = int(total_secs // 3600)
+    given = sum(1 for r in st.reasons if r and r.startswith(f"HOUR_{day}_"))
+    for k in range(given + 1, total_hours + 1):
+        reason = f"HOUR_{day}_{k}"
+        if reason not in st.reasons:
+            awards.append(Award(HOUR_POINTS, reason, st.day_end - timedelta(seconds=1)))
+
+    # 출석: 당일 누적 1시간 → +2, 연속 7일마다 +2
+    new_cnt = None
+    if f"ATTEND_{day}" not in st.reasons and total_secs >= ONE_HOUR_SECS:
+        awards.append(Award(ATTEND_DAILY_POINTS, f"ATTEND_{day}", when))
+        yday_str = (st.day_start - timedelta(days=1)).strftime("%Y-%m-%d")
+        new_cnt = (st.continuous_count + 1) if f"ATTEND_{yday_str}" in st.reasons else 1
+        if new_cnt % 7 == 0 and f"ATTEND_WEEK_{day}" not in st.reasons:
+            awards.append(Award(ATTEND_WEEK_BONUS, f"ATTEND_WEEK_{day}", when))
+    return awards, new_cnt
+
+
+def _dup_only(e: BulkWriteError) -> bool:
+    errs = e.details.get("writeErrors", [])
+    return bool(errs) and all(err.get("code") == 11000 for err in errs)
+
+
+def _write(db, user_oid: ObjectId, awards: list, new_cnt, session=None) -> int:
+    gained = 0
+    if awards:
+        ops = [UpdateOne({"user_id": user_oid, "reason": a.reason},
+                         {"$setOnInsert": {"gain_date": a.when, "point": int(a.value)}}, upsert=True)
+               for a in awards]
+        try:
+            res = db.points.bulk_write(ops, ordered=False, session=session)
+            upserted = res.upserted_ids.keys()
+        except BulkWriteError as e:
+            # 동시에 끝난 다른 요청이 먼저 넣은 사유(유니크 인덱스) → 그 건만 제외.
+            # 트랜잭션 안에서는 쓰기 오류 하나로 트랜잭션 전체가 중단되므로 삼키지 않음(apply 가 다시 시도)
+            if session is not None or not _dup_only(e):
+                raise
+            upserted = [u["index"] for u in e.details.get("upserted", [])]
+        new = [awards[i] for i in upserted]
+        gained = sum(int(a.value) for a in new)
+        leaderboard.record([{"user_id": user_oid, "gain_date": a.when, "point": int(a.value), "reason": a.reason}
+                            for a in new], session=session)
+    update = {}
+    if gained:
+        update["$inc"] = {"points": gained}
+    if new_cnt is not None:
+        update["$set"] = {"continuous_count": new_cnt}
+    if update:
+        db.users.update_one({"_id": user_oid}, update, session=session)
+    return gained
+
+
+def apply(db, user_oid: ObjectId, awards: list, new_cnt) -> int:
+    """포인트 문서 + 유저 포인트/연속 출석을 한 번에 기록(레플리카셋이면 트랜잭션)."""
+    global _TXN_SUPPORTED
+    for attempt in range(3):
+        if _TXN_SUPPORTED is False:
+            break
+        try:
+            with db.client.start_session() as s:
+                gained = s.with_transaction(lambda sess: _write(db, user_oid, awards, new_cnt, sess))
+            _TXN_SUPPORTED = True
+            return gained
+        except BulkWriteError as e:
+            # 같은 사유를 다른 요청이 먼저 커밋(중복 키) → 트랜잭션은 이미 중단됨.
+            # 새 트랜잭션에서는 그 사유가 기존 문서로 매칭돼 upsert 되지 않으므로 처음부터 다시
+            if not _dup_only(e) or attempt == 2:
+                raise
+        except OperationFailure as e:
+            # 단일 서버(standalone)는 트랜잭션 불가(IllegalOperation 20) → 이후로는 바로 일반 쓰기
+            if e.code != 20 and "Transaction numbers" not in str(e):
+                raise
+            _TXN_SUPPORTED = False
+    return _write(db, user_oid, awards, new_cnt)
+
+
+def award_on_finish(db, session_doc) -> int:
+    """
+    세션 종료 직후 호출:
+      - 집중도 규칙 포인트
+      - 당일 누적시간 규칙 포인트
+      - 출석(1시간 달성) + 연속 7일 보너스
+    """
+    st = load_day(db, session_doc)
+    when = session_doc.get("end_time") or datetime.now(KST)
+    awards, new_cnt = compute(st, when)
+    return apply(db, st.user_oid, awards, new_cnt)
@@ -8,6 +8,7 @@ from pymongo import ReturnDocument
 import os
 
 from .server_db import db   # ✅ 상대 import (패키지 내부)
+from . import leaderboard, user_alias
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])  # ✅ prefix 부여
 KST = timezone(timedelta(hours=9))
@@ -32,40 +33,12 @@ def _get_points(uid: ObjectId) -> int:
     
 def _resolve_uid_for_lookup(user_key: str) -> ObjectId:
     """
-    조회용: ObjectId, local_user_id/localUserId, provider_id/providerId/provider,
-    id/user_id/userId (문자/숫자 모두) 중 아무거나 받아 유저의 ObjectId로 변환
+    조회용: ObjectId, local_user_id/localUserId, provider_id/providerId,
+    id/user_id/userId (문자/숫자 모두) 중 아무거나 받아 유저의 ObjectId로 변환 — 별칭 테이블(user_alias)
     """
-    Users = _users()
-
-    if ObjectId.is_valid(user_key):
-        doc = Users.find_one({"_id": ObjectId(user_key)}, {"_id": 1})
-        if doc:
-            return doc["_id"]
-
-    candidate_fields = [
-        # local id 계열
-        "local_user_id", "localUserId", "localId", "localid",
-        # provider id 계열
-        "provider_id", "providerId", "provider",
-        # 기타 흔한 식별자
-        "id", "user_id", "userId",
-        # (옵션) 필요하면 주석 해제
-        # "email", "username",
-    ]
-
-    ors = []
-    for f in candidate_fields:
-        ors.append({f: user_key})
-        try:
-            n = int(user_key)
-            ors.append({f: n})
-        except Exception:
-            pass
-
-    doc = Users.find_one({"$or": ors}, {"_id": 1})
-    if doc:
-        return doc["_id"]
-
+    uid = user_alias.resolve(user_key)
+    if uid is not None:
+        return uid
     raise HTTPException(404, "user not found")
 
 def _points_coll():
@@ -74,12 +47,14 @@ def _points_coll():
 POINTS_USER_FIELD = os.getenv("POINTS_USER_FIELD", "user_id")
 
 def _log_points(uid: ObjectId, delta: int, reason: str):
+    now = datetime.now(KST)
     _points_coll().insert_one({
         POINTS_USER_FIELD: uid,
-        "gain_date": datetime.now(KST),
+        "gain_date": now,
         "point": int(delta),           # +적립 / -차감
         "reason": str(reason),
     })
+    leaderboard.record([{"user_id": uid, "gain_date": now, "point": int(delta), "reason": str(reason)}])
 
 def _inc_points_and_log(uid: ObjectId, delta: int, reason: str):
     """User.points 증감 후 points(ledger)에 거래 기록 남김.
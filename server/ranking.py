@@ -5,6 +5,7 @@ from bson import ObjectId
 import os
 
 from .server_db import db
+from . import leaderboard, ranking_cache
 
 router = APIRouter(prefix="/ranking", tags=["Ranking"])
 KST = timezone(timedelta(hours=9))
@@ -12,50 +13,49 @@ KST = timezone(timedelta(hours=9))
 Users  = db[os.getenv("USER_COLL", "User")]
 Points = db[os.getenv("POINTS_COLL", "points")]
 
+leaderboard.ensure_indexes()
+
+# (period, limit) 별 응답 캐시 — 초 단위, 환경변수로 조정
+_cache = ranking_cache.RefreshCache(
+    ranking_cache.make_store(),
+    ttl=float(os.getenv("RANKING_CACHE_TTL", "5")),       # 이 안이면 그대로 반환
+    stale=float(os.getenv("RANKING_CACHE_STALE", "60")),  # TTL 이후 이만큼은 이전 값 반환 + 백그라운드 갱신
+    idle=float(os.getenv("RANKING_CACHE_IDLE", "300")),   # 이만큼 안 읽힌 키는 미리 갱신 중단
+)
+
 def _window(period: str):
-    now = datetime.now(KST)
-    if period == "weekly":
-        return now - timedelta(days=7), now
-    if period == "monthly":
-        return now - timedelta(days=30), now
-    # all-time
-    return datetime(1970,1,1,tzinfo=KST), now
+    # 점수판 기간 = 오늘(KST) 포함 최근 7일 / 최근 30일(롤링) / 전체
+    return leaderboard.window(period)
 
 @router.get("/top")
 def ranking_top(
     period: str = Query("weekly", pattern="^(weekly|monthly|all)$"),
     limit: int = Query(50, ge=1, le=200),
 ):
+    return _cache.get(f"top:{period}:{limit}", lambda: _load_top(period, limit))
+
+def _load_top(period: str, limit: int) -> dict:
     start, end = _window(period)
 
-    pipeline = [
-        {"$match": {"gain_date": {"$gte": start, "$lt": end}}},
-        {"$group": {
-            "_id": "$user_id",
-            # ATTENDANCE#YYYY-MM-DD 건수를 출석으로 카운트
-            "attempts": {"$sum": {
-                "$cond": [{"$regexMatch": {"input": "$reason", "regex": r"^ATTENDANCE#"}}, 1, 0]
-            }},
-            # 포인트는 보상(+만) 합산. (BET_START 등 음수 차감 제외)
-            "points": {"$sum": {"$cond": [{"$gt": ["$point", 0]}, "$point", 0]}},
-        }},
-        {"$sort": {"points": -1, "attempts": -1}},
-        {"$limit": limit},
-    ]
-    rows = list(Points.aggregate(pipeline))
+    # 점수판(leaderboard)에서 상위 limit 명만 — points 원장 크기와 무관
+    # attempts = ATTENDANCE#YYYY-MM-DD 건수, points = 보상(+만) 합산(BET_START 등 음수 차감 제외)
+    rows = leaderboard.top(period, limit)
 
-    # 유저 정보 합치기
+    # 유저 정보 합치기 — 닉네임/보유 포인트/캐릭터를 $in 조회 한 번으로
+    users = {u["_id"]: u for u in Users.find({"_id": {"$in": [r["user_id"] for r in rows]}},
+                                             {"nickname": 1, "points": 1, "active_char": 1})}
     out = []
     for r in rows:
-        uid = r["_id"]
-        u = Users.find_one({"_id": uid}, {"nickname": 1, "points": 1})
-        name = (u or {}).get("nickname") or f"user-{str(uid)[-6:]}"
+        uid = r["user_id"]
+        u = users.get(uid) or {}
+        name = u.get("nickname") or f"user-{str(uid)[-6:]}"
         out.append({
             "user_id": str(uid),
             "name": name,
             "attempts": int(r.get("attempts", 0)),
             "points": int(r.get("points", 0)),     # 기간 내 획득한(+만) 포인트 합
-            "balance": int((u or {}).get("points", 0)),  # 현재 보유 포인트(참고용)
+            "balance": int(u.get("points", 0)),  # 현재 보유 포인트(참고용)
+            "active_char": u.get("active_char") or "ddalkkak",
         })
 
     return {
@@ -64,3 +64,32 @@ def ranking_top(
         "end": end.isoformat(),
         "rows": out,
     }
+
+@router.get("/me/{user_id}")
+def ranking_me(
+    user_id: str,
+    period: str = Query("weekly", pattern="^(weekly|monthly|all)$"),
+):
+    """
+    내 순위 — 전체는 점수 분포(leaderboard_hist)로, 주간/월간은 캐시해 둔 기간 점수 분포
+    (leaderboard.window_dist, /top 과 같은 캐시·TTL)에서 내 합계 위치를 이분 탐색(leaderboard.rank_of)
+    """
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(400, "invalid user_id")
+    start, end = _window(period)
+    dist = None
+    if period in leaderboard.WINDOW_DAYS:
+        dist = _cache.get(f"dist:{period}", lambda: leaderboard.window_dist(period))
+    r = leaderboard.rank_of(period, ObjectId(user_id), dist=dist)
+    return {
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "user_id": user_id,
+        **r,
+    }
+
+@router.get("/cache/metrics")
+def ranking_cache_metrics():
+    """랭킹 캐시 hit/miss, 갱신 소요(ms)"""
+    return _cache.metrics()
@@ -0,0 +1,216 @@
+# server/ranking_cache.py
+# 랭킹 응답 캐시 — (period, limit) 별로 결과를 잠깐 들고 있다가 백그라운드에서 갱신
+#
+#   - TTL 안이면 그대로 반환(hit)
+#   - TTL 이 지났어도 STALE 초 안이면 이전 값을 반환하고 갱신은 백그라운드로(stale hit)
+#   - 없으면 그 자리에서 계산(miss). 같은 키를 동시에 여러 요청이 기다려도 계산은 한 번(single-flight)
+#   - 최근 IDLE 초 안에 읽힌 키만 백그라운드 스레드가 TTL 주기로 미리 갱신(슬라이딩 윈도우)
+#
+# 저장소는 프로세스 메모리(LocalStore)가 기본이고, REDIS_URL 이 있고 redis 패키지가 설치돼 있으면
+# 워커끼리 공유하는 RedisStore 를 쓴다(없으면 조용히 LocalStore).
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    import redis
+except Exception:
+    redis = None
+
+
+class LocalStore:
+    """프로세스 메모리 저장소 (외부 캐시 대용)"""
+    def __init__(self, max_keys: int = 256):
+        self._d: "OrderedDict[str, tuple]" = OrderedDict()     # key → (저장 시각, 값)
+        self._lock = threading.Lock()
+        self._max = max_keys
+
+    def get(self, key):
+        with self._lock:
+            return self._d.get(key)
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._d[key] = (time.time(), value)
+            self._d.move_to_end(key)
+            while len(self._d) > self._max:
+                self._d.popitem(last=False)
+
+    def acquire(self, key, ttl: float) -> bool:
+        return True          # 프로세스 안의 중복은 RefreshCache 가 막음
+
+    def release(self, key):
+        pass
+
+
+class RedisStore:
+    """여러 워커가 같은 캐시를 보도록 Redis 에 JSON 으로 저장"""
+    def __init__(self, url: str, prefix: str = "ranking:"):
+        self._r = redis.Redis.from_url(url)
+        self._p = prefix
+
+    def get(self, key):
+        raw = self._r.get(self._p + key)
+        if not raw:
+            return None
+        d = json.loads(raw)
+        return d["at"], d["value"]
+
+    def set(self, key, value, ttl: float):
+        self._r.set(self._p + key, json.dumps({"at": time.time(), "value": value}), ex=max(1, int(ttl)))
+
+    def acquire(self, key, ttl: float) -> bool:
+        # 다른 워커가 이미 계산 중이면 False
+        return bool(self._r.set(self._p + "lock:" + key, "1", nx=True, ex=max(1, int(ttl))))
+
+    def release(self, key):
+        self._r.delete(self._p + "lock:" + key)
+
+
+def make_store():
+    url = os.getenv("REDIS_URL")
+    if url and redis is not None:
+        try:
+            s = RedisStore(url)
+            s._r.ping()
+            return s
+        except Exception as e:
+            print(f"⚠️ ranking cache: Redis 연결 실패, 로컬 캐시 사용 - {e}")
+    return LocalStore()
+
+
+class RefreshCache:
+    def __init__(self, store=None, ttl: float = 5.0, stale: float = 60.0, idle: float = 300.0):
+        self.store = store or LocalStore()
+        self.ttl, self.stale, self.idle = ttl, stale, idle
+        self._loaders = {}                      # key → loader (백그라운드 갱신용)
+        self._last_read = {}                    # key → 마지막으로 읽힌 시각
+        self._inflight = {}                     # key → threading.Event (계산 중)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._m = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "refresh_errors": 0}
+        self._lat = deque(maxlen=200)           # 최근 갱신 소요(ms)
+
+    # ---------- 읽기 ----------
+    def get(self, key: str, loader):
+        now = time.time()
+        with self._lock:
+            self._loaders[key] = loader
+            self._last_read[key] = now
+        self._start()
+
+        hit = self.store.get(key)
+        if hit is not None:
+            age = now - hit[0]
+            if age < self.ttl:
+                self._count("hits")
+                return hit[1]
+            if age < self.ttl + self.stale:
+                self._count("stale_hits")
+                with self._lock:
+                    busy = key in self._inflight
+                if not busy:
+                    threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+                return hit[1]
+        self._count("misses")
+        return self._refresh(key, wait=True)
+
+    # ---------- 갱신(single-flight) ----------
+    def _refresh(self, key: str, wait: bool = False):
+        with self._lock:
+            ev = self._inflight.get(key)
+            leader = ev is None
+            if leader:
+                ev = self._inflight[key] = threading.Event()
+        if not leader:
+            if wait:
+                self._count("coalesced")        # 이미 계산 중인 요청에 합류
+                ev.wait(30)
+                hit = self.store.get(key)
+                if hit is not None:
+                    return hit[1]
+                return self._loaders[key]()     # 앞선 계산이 실패한 경우
+            return None
+
+        try:
+            if not self.store.acquire(key, self.ttl * 2):
+                # 다른 워커가 계산 중 → 잠깐 기다렸다가 그 결과를 사용(끝내 없으면 직접 계산)
+                if not wait:
+                    return None
+                for _ in range(50):
+                    time.sleep(0.05)
+                    hit = self.store.get(key)
+                    if hit is not None and time.time() - hit[0] < self.ttl:
+                        return hit[1]
+                return self._load(key, wait)
+            try:
+                return self._load(key, wait)
+            finally:
+                self.store.release(key)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            ev.set()
+
+    def _load(self, key: str, wait: bool):
+        try:
+            t0 = time.perf_counter()
+            value = self._loaders[key]()
+            self._lat.append((time.perf_counter() - t0) * 1000.0)
+            self.store.set(key, value, self.ttl + self.stale)
+            self._count("refreshes")
+            return value
+        except Exception:
+            self._count("refresh_errors")
+            if wait:
+                raise
+            return None
+
+    # ---------- 백그라운드 ----------
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="ranking-cache", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.ttl)
+            now = time.time()
+            with self._lock:
+                for k in [k for k, t in self._last_read.items() if now - t > self.idle]:
+                    self._last_read.pop(k, None)
+                    self._loaders.pop(k, None)
+                keys = list(self._last_read)
+            for k in keys:
+                try:
+                    hit = self.store.get(k)
+                    if hit is None or now - hit[0] >= self.ttl * 0.8:
+                        self._refresh(k)
+                except Exception as e:
+                    print(f"⚠️ ranking cache refresh 실패({k}): {e}")
+
+    # ---------- 지표 ----------
+    def _count(self, name: str):
+        with self._lock:
+            self._m[name] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            m = dict(self._m)
+            lat = sorted(self._lat)
+            keys = len(self._last_read)
+        reads = m["hits"] + m["stale_hits"] + m["misses"]
+        pct = lambda q: round(lat[min(len(lat) - 1, int(round(q / 100.0 * (len(lat) - 1))))], 2) if lat else None
+        return {
+            **m,
+            "hit_ratio": round((m["hits"] + m["stale_hits"]) / reads, 4) if reads else None,
+            "refresh_ms": {"last": round(self._lat[-1], 2) if self._lat else None, "p50": pct(50), "p95": pct(95)},
+            "active_keys": keys,
+            "store": type(self.store).__name__,
+            "ttl": self.ttl, "stale": self.stale, "idle": self.idle,
+        }
@@ -0,0 +1,160 @@
+# server/report_engine.py
+# 일별 리포트 계산 — 여러 유저를 aggregate 한 번으로
+#
+# 예전 daily_report 는 같은 유저/기간을 points 로 세 번(일자 합계, 사유별 합계, ATTEND 사유 날짜),
+# attendance 로 한 번, 일별 원장으로 한 번 따로 읽었다. 여기서는 points 파이프라인에
+#   $unionWith attendance, $unionWith daily_study(일별 원장)
+# 를 붙여 한 번에 흘려보내고 (출처, 유저, 날짜[, 사유]) 로 $group 한 행을 커서로 받아 유저별로 나눈다.
+# ($facet 은 결과 전체가 문서 하나라 16MB 에 걸림 — 여러 명 × 1년이면 넘을 수 있음)
+# user_id 를 $in 으로 받으므로 교사/관리자 화면처럼 여러 명을 한 번에 볼 때도 aggregate 는 1회.
+#
+# 날짜 키는 모두 KST "YYYY-MM-DD" 문자열($dateToString + Asia/Seoul, daily_study 와 같은 규칙).
+#
+# focus_histogram: 예전 focus_hist 는 세션마다 한 시간씩 while 로 잘라 24칸에 더했다(1년이면 수만 번).
+# 여기서는 세션 시작/끝/점수를 배열로 받아 '요일×시간'(168칸) 겹침을 누적 함수 차로 한 번에 구한다.
+from datetime import datetime, timedelta, timezone
+import os
+
+import numpy as np
+
+try:
+    from .server_db import db
+    from . import daily_study
+except Exception:
+    from server_db import db
+    import daily_study
+
+KST = timezone(timedelta(hours=9))
+TZ = "Asia/Seoul"
+
+def _points():  return db[os.getenv("POINTS_COLL", "points")]
+def _sess():  return db[os.getenv("SESSIONS_COLL", "sessions")]
+def _att_name():  return os.getenv("ATTENDANCE_COLL", "attendance")
+
+def ensure_indexes():
+    A = db[_att_name()]
+    A.create_index([("user_id", 1), ("date", 1)])
+    A.create_index([("user_id", 1), ("checked_at", 1)])
+
+
+def _kst_range(start: str, end: str) -> tuple:
+    t0 = datetime.strptime(start, "%Y-%m-%d").replace(tzinfo=KST)
+    t1 = datetime.strptime(end, "%Y-%m-%d").replace(tzinfo=KST) + timedelta(days=1)
+    return t0, t1
+
+
+def _day(expr) -> dict:
+    return {"$dateToString": {"date": expr, "format": "%Y-%m-%d", "timezone": TZ}}
+
+
+def pipeline(uids: list, start: str, end: str) -> list:
+    t0, t1 = _kst_range(start, end)
+    return [
+        # 1) points(양수만)
+        {"$match": {"user_id": {"$in": uids}, "gain_date": {"$gte": t0, "$lt": t1}, "point": {"$gt": 0}}},
+        {"$project": {"_id": 0, "src": "p", "u": "$user_id", "day": _day("$gain_date"),
+                      "reason": {"$ifNull": ["$reason", "UNKNOWN"]}, "point": 1}},
+        # 2) attendance — date(자정 기준) 또는 checked_at 이 기간에 있는 날
+        {"$unionWith": {"coll": _att_name(), "pipeline": [
+            {"$match": {"user_id": {"$in": uids},
+                        "$or": [{"date": {"$gte": t0, "$lt": t1}}, {"checked_at": {"$gte": t0, "$lt": t1}}]}},
+            {"$project": {"_id": 0, "src": "a", "u": "$user_id", "day": _day({"$ifNull": ["$date", "$checked_at"]})}},
+        ]}},
+        # 3) 일별 원장 — 학습시간은 예전 리포트처럼 세션 길이(휴식 포함). gross_seconds 가 없는
+        #    예전 원장 문서는 daily_study --rebuild 전까지 순공부 시간으로
+        {"$unionWith": {"coll": daily_study._coll().name, "pipeline": [
+            {"$match": {"user_id": {"$in": uids}, "day": {"$gte": start, "$lte": end}}},
+            {"$project": {"_id": 0, "src": "s", "u": "$user_id", "day": 1,
+                          "secs": {"$ifNull": ["$gross_seconds", "$net_seconds"]}}},
+        ]}},
+        # 포인트는 (유저, 날짜, 사유)별 합, 출석은 (유저, 날짜)마다 한 행, 원장은 문서 그대로(유저·날짜당 1개)
+        {"$group": {"_id": {"s": "$src", "u": "$u", "d": "$day", "r": "$reason"},
+                    "sum": {"$sum": {"$ifNull": ["$point", "$secs"]}}}},
+    ]
+
+
+def daily_reports(uids: list, start: str, end: str) -> dict:
+    """{uid: {"days": [...], "points_by_reason": {...}}} — uids 순서/중복과 무관하게 유저당 1개"""
+    uids = list(dict.fromkeys(uids))
+    out = {u: {"pts": {}, "reason": {}, "att": set(), "min": {}} for u in uids}
+    for d in _points().aggregate(pipeline(uids, start, end), allowDiskUse=True):
+        k, acc = d["_id"], out[d["_id"]["u"]]
+        if k["s"] == "p":
+            acc["pts"][k["d"]] = acc["pts"].get(k["d"], 0) + int(d["sum"])
+            acc["reason"][k["r"]] = acc["reason"].get(k["r"], 0) + int(d["sum"])
+            # 출석 보조 규칙: 그날 ATTEND 계열 포인트
+            if "ATTEND" in k["r"].upper():
+                acc["att"].add(k["d"])
+        elif k["s"] == "a":
+            acc["att"].add(k["d"])
+        else:
+            acc["min"][k["d"]] = float(d["sum"] or 0) / 60.0
+
+    # 날짜축 생성 & 병합
+    axis = []
+    cur, last = datetime.strptime(start, "%Y-%m-%d"), datetime.strptime(end, "%Y-%m-%d")
+    while cur <= last:
+        axis.append(cur.strftime("%Y-%m-%d"))
+        cur += timedelta(days=1)
+
+    reports = {}
+    for u, acc in out.items():
+        reports[u] = {
+            "days": [{
+                "date": iso,
+                "study_minutes": int(round(acc["min"].get(iso, 0.0))),
+                "points": acc["pts"].get(iso, 0),
+                "attendance": 1 if iso in acc["att"] else 0,
+            } for iso in axis],
+            "points_by_reason": acc["reason"],
+        }
+    return reports
+
+
+# ---------- 집중도 히스토그램(요일 × 시간) ----------
+WEEK = 7 * 24 * 3600
+_MONDAY0 = 4 * 86400 - 9 * 3600     # 1970-01-05(월) 00:00 KST 의 epoch 초
+
+def _covered(t: np.ndarray) -> np.ndarray:
+    """
+    t(월요일 0시 기준 초, n개) → (n, 168): [0, t) 중 각 '요일×시간' 칸에 들어간 초.
+    세션 [s, e) 가 칸에 걸친 시간 = _covered(e) - _covered(s)  (시간 단위로 쪼개는 루프 없음)
+    """
+    full, rem = np.divmod(t, WEEK)
+    edges = np.arange(168, dtype=np.float64) * 3600.0
+    return full[:, None] * 3600.0 + np.clip(rem[:, None] - edges[None, :], 0.0, 3600.0)
+
+def focus_histogram(uid, t0: datetime, t1: datetime) -> dict:
+    """
+    기간 [t0, t1) 에 걸친 세션의 집중도(분 가중 평균)를 요일(월=0) × 시간(KST) 칸으로.
+    → {"heatmap": 7×24 평균, "heatmap_minutes": 7×24 분, "hourly": 24 평균, "hourly_minutes": 24 분}
+    """
+    cur = _sess().find(
+        {"user_id": uid, "$or": [
+            {"start": {"$lt": t1}, "end": {"$gt": t0}},
+            {"study_date": {"$lt": t1}, "end_time": {"$gt": t0}},
+        ]},
+        {"_id": 0, "start": 1, "end": 1, "study_date": 1, "end_time": 1, "focus_score": 1},
+    )
+    lo, hi = t0.timestamp(), t1.timestamp()
+    ts = lambda dt: daily_study.to_kst(dt).timestamp() if dt else np.nan
+    rows = [(ts(it.get("start") or it.get("study_date")),
+             ts(it.get("end") or it.get("end_time")),
+             float(it.get("focus_score") or 0)) for it in cur]
+    if rows:
+        a = np.asarray(rows, dtype=np.float64)
+        s, e, fs = np.maximum(a[:, 0], lo), np.minimum(a[:, 1], hi), a[:, 2]
+        ok = ~np.isnan(s) & ~np.isnan(e) & (e > s)
+        s, e, fs = s[ok] - _MONDAY0, e[ok] - _MONDAY0, fs[ok]
+        mins = (_covered(e) - _covered(s)) / 60.0          # (n, 168)
+        wmin = mins.sum(axis=0)
+        wsum = fs @ mins
+    else:
+        wmin = wsum = np.zeros(168)
+
+    wmin, wsum = wmin.reshape(7, 24), wsum.reshape(7, 24)
+    heat = np.divide(wsum, wmin, out=np.zeros_like(wsum), where=wmin > 0)
+    hmin, hsum = wmin.sum(axis=0), wsum.sum(axis=0)
+    hourly = np.divide(hsum, hmin, out=np.zeros_like(hsum), where=hmin > 0)
+    return {"heatmap": heat.tolist(), "heatmap_minutes": wmin.tolist(),
+            "hourly": hourly.tolist(), "hourly_minutes": hmin.tolist()}
@@ -1,11 +1,14 @@
 # server/reports.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
 from typing import Optional, List, Dict, Any
+import hashlib
+import json
 import os
 
 from .server_db import db
+from . import daily_study, event_store, report_engine, study_stats, user_alias
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 KST = timezone(timedelta(hours=9))
@@ -16,25 +19,20 @@ def _sess():    return db[os.getenv("SESSIONS_COLL", "sessions")]
 def _att():     return db[os.getenv("ATTENDANCE_COLL", "attendance")]
 def _focus():   return db[os.getenv("FOCUS_COLL", "focus_events")]
 
+report_engine.ensure_indexes()
+
 def _oid(x: str) -> ObjectId:
     if not ObjectId.is_valid(x): raise HTTPException(400, "invalid ObjectId")
     return ObjectId(x)
 
 def _resolve_uid(user_key: str) -> ObjectId:
-    U = _users()
-    if ObjectId.is_valid(user_key):
-        f = U.find_one({"_id": ObjectId(user_key)}, {"_id": 1})
-        if f: return f["_id"]
-    ors = []
-    for f in ["local_user_id","localUserId","localId","localid",
-              "provider_id","providerId","provider",
-              "id","user_id","userId","email","username"]:
-        ors.append({f: user_key})
-        try: ors.append({f: int(user_key)})    # 숫자형 id 대응
-        except: pass
-    f = U.find_one({"$or": ors}, {"_id": 1})
-    if not f: raise HTTPException(404, "user not found")
-    return f["_id"]
+    uid = user_alias.resolve(user_key)     # 별칭 테이블 포인트 조회(+LRU)
+    if uid is None: raise HTTPException(404, "user not found")
+    return uid
+
+def _resolve_uids(user_keys: List[str]) -> Dict[str, ObjectId]:
+    """여러 키를 한 번에 {키: _id}. 못 찾은 키는 빠짐."""
+    return user_alias.resolve_many(user_keys)
 
 def _dt_kst(date_str: str, end=False) -> datetime:
     # 00:00(시작) 또는 다음날 00:00(끝 경계)
@@ -49,99 +47,34 @@ def daily_report(
     end: str   = Query(..., description="YYYY-MM-DD")
 ):
     uid = _resolve_uid(user_key)
-    t0 = _dt_kst(start, end=False)
-    t1 = _dt_kst(end,   end=True)
-
-    # ----- points(양수만) 일자 합계 + 사유별 합계 -----
-    pos_match = {"user_id": uid, "gain_date": {"$gte": t0, "$lt": t1}, "point": {"$gt": 0}}
-    pts_by_day = {
-        d["_id"].date().isoformat(): int(d["sum"])
-        for d in _points().aggregate([
-            {"$match": pos_match},
-            {"$group": {"_id": {"$dateTrunc": {"date": "$gain_date", "unit": "day", "timezone": "Asia/Seoul"}},
-                        "sum": {"$sum": "$point"}}}
-        ])
-    }
-    pts_by_reason = {
-        d["_id"] or "UNKNOWN": int(d["sum"])
-        for d in _points().aggregate([
-            {"$match": pos_match},
-            {"$group": {"_id": "$reason", "sum": {"$sum": "$point"}}}
-        ])
-    }
-
-    # ----- study sessions 일자 합계(분) -----
-    # minutes 필드가 있으면 사용, 없으면 end-start 계산
-    ses_by_day = {
-        d["_id"].date().isoformat(): float(d["min"])
-        for d in _sess().aggregate([
-            {"$match": {"user_id": uid,
-                        "$or": [
-                            {"start": {"$gte": t0, "$lt": t1}},
-                            {"study_date": {"$gte": t0, "$lt": t1}}
-                        ]}},
-            {"$project": {
-                # start/end 필드 혼재 대응
-                "startX": {"$ifNull": ["$start", "$study_date"]},
-                "endX":   {"$ifNull": ["$end", "$end_time"]},
-                "minutes": {"$ifNull": [
-                    "$minutes",
-                    {"$divide": [{"$subtract": [
-                        {"$ifNull": ["$end", "$end_time"]},
-                        {"$ifNull": ["$start", "$study_date"]}
-                    ]}, 60000]}
-                ]}
-            }},
-            {"$project": {
-                "day": {"$dateTrunc": {"date": "$startX", "unit": "day", "timezone": "Asia/Seoul"}},
-                "minutes": {"$ifNull": ["$minutes", 0]}
-            }},
-            {"$group": {"_id": "$day", "min": {"$sum": "$minutes"}}}
-        ])
-    }
-
-    # ----- attendance(출석) -----
-    # attendance.date(자정 기준) 또는 checked_at로 존재하는 날을 1로
-    att_days = set()
-    for d in _att().aggregate([
-        {"$match": {"user_id": uid,
-                    "$or": [{"date": {"$gte": t0, "$lt": t1}},
-                            {"checked_at": {"$gte": t0, "$lt": t1}}]}},
-        {"$project": {"day": {"$ifNull": ["$date", {"$dateTrunc": {"date": "$checked_at", "unit":"day", "timezone": "Asia/Seoul"}}]}}},
-        {"$group": {"_id": "$day"}}
-    ]):
-        att_days.add(d["_id"].date().isoformat())
-
-    # 보조 규칙: 해당 '날짜'에 ATTEND 계열 포인트가 있으면 그 날을 출석으로 인정
-    att_from_points_days = {
-        d["_id"].date().isoformat()
-        for d in _points().aggregate([
-            {"$match": {**pos_match, "reason": {"$regex": "ATTEND", "$options": "i"}}},
-            {"$group": {"_id": {
-                "$dateTrunc": {"date": "$gain_date", "unit": "day", "timezone": "Asia/Seoul"}
-            }}}
-        ])
+    # points 일자/사유별 합계, 출석, 일별 원장을 aggregate 한 번으로(report_engine)
+    rep = report_engine.daily_reports([uid], start, end)[uid]
+    return {
+        "user_id": str(uid),
+        "start": start, "end": end,
+        **rep,
     }
-    att_days |= att_from_points_days
 
-    # ----- 날짜축 생성 & 병합 -----
-    days = []
-    cur = t0
-    while cur < t1:
-        iso = cur.date().isoformat()
-        days.append({
-            "date": iso,
-            "study_minutes": int(round(ses_by_day.get(iso, 0.0))),
-            "points": int(pts_by_day.get(iso, 0)),
-            "attendance": 1 if iso in att_days else 0
-        })
-        cur += timedelta(days=1)
+MAX_REPORT_USERS = 500
 
+@router.get("/daily")
+def daily_report_many(
+    users: str = Query(..., description="쉼표로 구분한 user_key 목록"),
+    start: str = Query(..., description="YYYY-MM-DD"),
+    end: str   = Query(..., description="YYYY-MM-DD")
+):
+    """여러 유저의 일별 리포트(교사/관리자 화면용) — 유저 조회 1회 + aggregate 1회"""
+    keys = [k.strip() for k in users.split(",") if k.strip()]
+    if not keys:
+        raise HTTPException(400, "users is empty")
+    if len(keys) > MAX_REPORT_USERS:
+        raise HTTPException(400, f"too many users (max {MAX_REPORT_USERS})")
+    resolved = _resolve_uids(keys)
+    reps = report_engine.daily_reports(list(resolved.values()), start, end)
     return {
-        "user_id": str(uid),
         "start": start, "end": end,
-        "days": days,
-        "points_by_reason": pts_by_reason
+        "reports": [{"user_key": k, "user_id": str(uid), **reps[uid]} for k, uid in resolved.items()],
+        "not_found": [k for k in keys if k not in resolved],
     }
 
 @router.get("/focus/{user_key}")
@@ -160,124 +93,138 @@ def focus_of_day(user_key: str, day: str = Query(..., description="YYYY-MM-DD"))
 
 @router.get("/summary/{user_key}")
 def summary_all(user_key: str):
-    uid = _resolve_uid(user_key)
-    U = _users()
-    P = _points()
-    S = _sess()
-    A = _att()
+    return _summary(_resolve_uid(user_key))
 
-    u = U.find_one({"_id": uid}, {"created_at":1, "points":1})
+def _summary(uid: ObjectId) -> dict:
+    # 총 학습일/연속일은 세션 종료 때 User.study_stats 에 증분으로 쌓임 → 유저 문서 한 건
+    u = study_stats.get(uid)
     if not u:
         raise HTTPException(404, "user not found")
     created_at = u.get("created_at") or datetime(1970,1,1, tzinfo=KST)
-    now = datetime.now(tz=KST)
-
-    # 1) 총 학습일 = 출석한 일수(가입~현재)
-    att_days = set()
-    for d in A.aggregate([
-        {"$match": {"user_id": uid,
-                    "$or":[{"date":{"$gte":created_at, "$lt":now}},
-                           {"checked_at":{"$gte":created_at, "$lt":now}}]}},
-        {"$project":{"day":{"$ifNull":["$date", {"$dateTrunc":{"date":"$checked_at","unit":"day","timezone":"Asia/Seoul"}}]}}},
-        {"$group":{"_id":"$day"}}
-    ]):
-        att_days.add(d["_id"].date())
-
-    # 출석 기록이 없다면 세션이 있는 날을 보조로 포함
-    for d in S.aggregate([
-        {"$match": {"user_id": uid, "start": {"$gte": created_at, "$lt": now}}},
-        {"$project": {"day": {"$dateTrunc":{"date":"$start","unit":"day","timezone":"Asia/Seoul"}}}},
-        {"$group": {"_id":"$day"}}
-    ]):
-        att_days.add(d["_id"].date())
-
-    total_learning_days = len(att_days)
-
-    # 2) 연속 출석일(오늘부터 거꾸로, 하루 60분 이상 학습)
-    #    minutes 필드가 없으면 end-start로 대체
-    pipeline = [
-        {"$match": {"user_id": uid, "start": {"$type": "date"}}},  # start 가 날짜인 문서만
-        {"$project": {
-            "day": {"$dateTrunc": {"date": "$start", "unit": "day", "timezone": "Asia/Seoul"}},
-            # minutes 필드가 없으면 end-start, 그마저도 없으면 0
-            "minutes": {
-                "$ifNull": [
-                    "$minutes",
-                    {"$divide": [{"$subtract": ["$end", "$start"]}, 60000]}
-                ]
-            }
-        }},
-        {"$match": {"day": {"$ne": None}}},  # day 가 null 인 것 제거
-        {"$group": {
-            "_id": "$day",
-            "min": {"$sum": {"$ifNull": ["$minutes", 0]}}
-        }}
-    ]
-
-    minutes_by_day = {}
-    for d in S.aggregate(pipeline):
-        day = d.get("_id")
-        if isinstance(day, datetime):  # 혹시 모를 None 방어
-            minutes_by_day[day.date()] = float(d.get("min") or 0.0)
-    streak = 0
-    cur = datetime.now(tz=KST).date()
-    while True:
-        if minutes_by_day.get(cur, 0) >= 60:
-            streak += 1
-            cur -= timedelta(days=1)
-        else:
-            break
-
-    # 3) 총 포인트(가입~현재): 유저 문서의 보유 포인트가 있으면 그 값을 사용
-    total_points = int(u.get("points", 0))
 
     return {
-        "total_learning_days": total_learning_days,
-        "streak_days": streak,
-        "total_points": total_points,
-        "created_at": (created_at.astimezone(KST)).date().isoformat()
+        "total_learning_days": u["learning_days"],   # 출석했거나 세션이 있었던 날
+        "streak_days": u["streak_days"],             # 오늘부터 거꾸로, 하루 60분 이상
+        "longest_streak": u["longest_streak"],
+        "total_points": int(u.get("points", 0)),     # 유저 문서의 보유 포인트
+        "created_at": (daily_study.to_kst(created_at)).date().isoformat()
     }
 
 
-# === NEW: 기간별 집중도 히스토그램(시간대 24칸) ===
+# === NEW: 기간별 집중도 히스토그램(시간대 24칸 + 요일×시간 히트맵) ===
 @router.get("/focus_hist/{user_key}")
 def focus_hist(user_key: str, start: str = Query(...), end: str = Query(...)):
-    uid = _resolve_uid(user_key)
+    return _focus_hist(_resolve_uid(user_key), start, end)
+
+def _focus_hist(uid: ObjectId, start: str, end: str) -> dict:
     t0 = _dt_kst(start, end=False)
     t1 = _dt_kst(end,   end=True)
 
-    S = _sess()
-    items = list(S.find(
-        {"user_id": uid, "$or": [
-            {"start": {"$lt": t1}, "end": {"$gt": t0}},
-            {"study_date": {"$lt": t1}, "end_time": {"$gt": t0}}
-        ]},
-        {"start":1, "end":1, "study_date":1, "end_time":1, "focus_score":1, "minutes":1}
-    ))
-
-    def _as_kst(dt):
-        if not dt: return None
-        return dt.replace(tzinfo=KST) if dt.tzinfo is None else dt.astimezone(KST)
-
-    wsum = [0.0]*24; wmin = [0.0]*24
-    for it in items:
-        s = _as_kst(it.get("start") or it.get("study_date"))
-        e = _as_kst(it.get("end") or it.get("end_time") or s)
-        fs = float(it.get("focus_score") or 0)
-        if not s or not e: continue
-        s = max(s, t0); e = min(e, t1)
-        if e <= s: continue
-
-        cur = s
-        while cur < e:
-            h_end = datetime(cur.year, cur.month, cur.day, cur.hour, tzinfo=KST) + timedelta(hours=1)
-            seg_end = min(h_end, e)
-            mins = (seg_end - cur).total_seconds()/60.0
-            if mins > 0:
-                idx = cur.hour
-                wsum[idx] += fs * mins
-                wmin[idx] += mins
-            cur = seg_end
-
-    hourly = [(wsum[h]/wmin[h] if wmin[h] > 0 else 0.0) for h in range(24)]
-    return {"start": start, "end": end, "hourly": hourly}
+    # 세션 구간을 요일×시간 칸에 배열 연산으로 나눔(report_engine.focus_histogram)
+    fh = report_engine.focus_histogram(uid, t0, t1)
+    hourly = fh["hourly"]
+    # 하품/졸음 횟수는 이벤트 버킷 집계값으로 바로(원본 이벤트 스캔 없음)
+    ev_hours = event_store.hour_of_day(t0, t1, user_id=uid)
+    return {"start": start, "end": end, "hourly": hourly,
+            "yawns_hourly": [h["yawn_end"] for h in ev_hours],
+            "sleeps_hourly": [h["sleep_end"] for h in ev_hours],
+            "hourly_minutes": fh["hourly_minutes"],
+            "heatmap": fh["heatmap"],                  # [요일(월=0)][시] 평균 집중도
+            "heatmap_minutes": fh["heatmap_minutes"]}
+
+
+# === 리포트 페이지 묶음(요약 + 선택 기간 + 가입 이후 전체 + 집중도) — 한 번 왕복, ETag ===
+@router.get("/dashboard/{user_key}")
+def dashboard(
+    user_key: str,
+    request: Request,
+    start: str = Query(..., description="YYYY-MM-DD"),
+    end: str   = Query(..., description="YYYY-MM-DD")
+):
+    """
+    pages/report.py 가 첫 화면에 쓰는 값 전부. 계산 전에 원본의 변경 표시만 읽어 만든 약한 ETag 를 주고,
+    If-None-Match 가 같으면 리포트를 계산하지 않고 304(본문 없음) — 페이지는 들고 있던 값을 그대로 씀.
+    """
+    uid = _resolve_uid(user_key)
+    today = datetime.now(KST).strftime("%Y-%m-%d")
+    etag = _dashboard_etag(uid, start, end, today)
+    if etag is None:
+        _summary(uid)           # 통계 첫 계산(User 가 바뀜) 뒤에 다시
+        etag = _dashboard_etag(uid, start, end, today)
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag:
+        headers["ETag"] = etag
+        sent = [t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")]
+        if etag.removeprefix("W/") in sent:
+            return Response(status_code=304, headers=headers)
+    summary = _summary(uid)     # ETag 를 먼저 읽었으므로 그 사이 바뀐 값은 다음 요청에서 다른 ETag
+    g0 = summary["created_at"]
+    if g0 <= start and end <= today:
+        # 선택 기간이 가입~오늘 안이면 전체 기간 한 번 계산해서 잘라 씀
+        all_rep = report_engine.daily_reports([uid], g0, today)[uid]
+        daily = {"days": [d for d in all_rep["days"] if start <= d["date"] <= end]}
+    else:
+        reps = report_engine.daily_reports([uid], start, end), report_engine.daily_reports([uid], g0, today)
+        daily, all_rep = reps[0][uid], reps[1][uid]
+    body = {
+        "user_id": str(uid),
+        "start": start, "end": end,
+        "summary": summary,
+        "daily": {"start": start, "end": end, "days": daily["days"]},
+        "daily_all": {"start": g0, "end": today, **all_rep},
+        "focus_hist": _focus_hist(uid, start, end),
+    }
+    raw = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Response(raw, media_type="application/json", headers=headers)
+
+
+DASHBOARD_VERSION = "2"     # 응답 모양/계산 규칙을 바꾸면 올려서 예전 ETag 를 무효화
+
+def _dashboard_etag(uid: ObjectId, start: str, end: str, today: str) -> str | None:
+    """
+    대시보드 본문을 만드는 원본의 변경 표시만 모은 약한 ETag (인덱스 범위 조회 몇 번).
+      - User: points, study_stats, created_at               → summary
+      - 일별 원장: 기간 문서 수 / gen 합 / updated_at 최대  → 학습시간, 세션 종료(집중도), 하품/졸음
+      - points / attendance: 유저 문서 수(둘 다 추가만 됨)  → 일별 포인트, 출석
+      - 오늘 날짜(연속일, 가입 이후 범위), 요청 기간
+    유저가 없거나 통계가 아직 없으면(첫 계산에서 User 가 바뀜) None.
+    """
+    u = _users().find_one({"_id": uid}, {"points": 1, "study_stats": 1, "created_at": 1})
+    if not u or not (u.get("study_stats") or {}).get("built"):
+        return None
+    g0 = daily_study.day_key(u["created_at"]) if u.get("created_at") else "1970-01-01"
+    led = next(daily_study._coll().aggregate([
+        {"$match": {"user_id": uid, "day": {"$gte": min(start, g0), "$lte": max(end, today)}}},
+        {"$group": {"_id": None, "n": {"$sum": 1}, "gen": {"$sum": {"$ifNull": ["$gen", 0]}},
+                    "at": {"$max": "$updated_at"}}},
+    ]), {})
+    parts = [DASHBOARD_VERSION, str(uid), start, end, today, u.get("points"), u.get("study_stats"),
+             u.get("created_at"), led.get("n"), led.get("gen"), led.get("at"),
+             _points().count_documents({"user_id": uid}), _att().count_documents({"user_id": uid})]
+    raw = json.dumps(parts, default=str, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return 'W/"' + hashlib.sha1(raw).hexdigest() + '"'
+
+
+# === 하품/졸음 이벤트(세션 × 1분 버킷) ===
+@router.get("/events/{user_key}")
+def events_raw(user_key: str, start: str = Query(...), end: str = Query(...)):
+    """기간 내 원본 이벤트(버킷에서 복원)"""
+    uid = _resolve_uid(user_key)
+    items = event_store.raw_events(_dt_kst(start), _dt_kst(end, end=True), user_id=uid)
+    return {"start": start, "end": end, "events": [
+        {"session_id": str(e["session_id"]), "timestamp": e["timestamp"].isoformat(),
+         "event_type": e["event_type"], "attention": e["attention"], "yawn_weight": e["yawn_weight"]}
+        for e in items
+    ]}
+
+@router.get("/event_series/{user_key}")
+def events_series(user_key: str, start: str = Query(...), end: str = Query(...),
+                  unit: str = Query("hour", description="minute | hour | day")):
+    """기간 내 이벤트 집계 시계열(버킷 개수/집중도 min·max·avg)"""
+    if unit not in ("minute", "hour", "day"):
+        raise HTTPException(400, "unit must be minute/hour/day")
+    uid = _resolve_uid(user_key)
+    rows = event_store.series(_dt_kst(start), _dt_kst(end, end=True), unit=unit, user_id=uid)
+    for r in rows:
+        r["t"] = r["t"].isoformat()
+    return {"start": start, "end": end, "unit": unit, "series": rows}
@@ -131,3 +131,4 @@ for uid, delta in balance_delta.items():
         Users.update_one({"_id": uid}, {"$inc": {"points": delta}})
 
 print(f"✅ seeded users={len(user_ids)}, ops={len(ops)}")
+print("ℹ️ 랭킹 점수판 갱신: python -m server.leaderboard --rebuild")
@@ -1,5 +1,13 @@
 # server/study_sessions.py
-from fastapi import APIRouter, HTTPException
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from pydantic import BaseModel, Field
 from typing import List, Optional, Literal
 from bson import ObjectId
@@ -9,8 +17,29 @@ from datetime import datetime, timedelta, timezone
 from bson import ObjectId
 
 from .server_db import db
+from . import daily_study, event_store, points_engine, study_stats
 
-router = APIRouter(prefix="/study", tags=["Study Sessions"])
+class GzipRequest(Request):
+    """Content-Encoding: gzip 요청 본문 해제 (클라이언트 업로더가 큰 이벤트 배치를 압축해서 보냄)"""
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                body = gzip.decompress(body)
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    def get_route_handler(self):
+        original = super().get_route_handler()
+
+        async def handler(request: Request):
+            return await original(GzipRequest(request.scope, request.receive))
+        return handler
+
+
+router = APIRouter(prefix="/study", tags=["Study Sessions"], route_class=GzipRoute)
 KST = pytz.timezone("Asia/Seoul")
 
 
@@ -26,15 +55,18 @@ class SessionFinishBody(BaseModel):
     yawn_count: Optional[int] = None            # 하품 횟수(=yawn_end 개수)
     avg_yawn: Optional[float] = None            # 하품 인식 가중치 평균
     sum_study_time: Optional[float] = None      # 누적 공부 시간(초)
+    operating_point: Optional[dict] = None      # 추론 운영점(입력 크기/스킵/감지 fps 등)
 
 class YawnEvent(BaseModel):
     type: Literal["start", "yawn_end"]
+    event_id: Optional[str] = None               # 클라이언트 저널이 부여한 id(재전송 중복 제거용)
     timestamp: str                               # "YYYY-MM-DD HH:MM:SS" (로컬/KST)
     avg_yawn_duration: Optional[float] = None    # yawn_end일 때만
     attention_score: Optional[float] = None      # yawn_end일 때만
 
 class SleepEvent(BaseModel):
     type: Literal["start", "drowys_end"]         # 타이포 포함 그대로 반영
+    event_id: Optional[str] = None
     timestamp: str
     attention_score: Optional[float] = None      # end일 때만
 
@@ -42,6 +74,18 @@ class EventBatchBody(BaseModel):
     yawn_events: List[YawnEvent] = Field(default_factory=list)
     sleep_events: List[SleepEvent] = Field(default_factory=list)
 
+class EventColumnsBody(BaseModel):
+    """
+    열 단위(평행 배열) 이벤트 묶음 — /events/bulk 용. i 번째 원소끼리 이벤트 1건.
+    ts 는 epoch 초(문자열 파싱 없음). attention / yawn_weight 는 생략 가능(전부 None).
+    """
+    event_id: List[str]
+    kind: List[Literal["yawn", "sleep"]]
+    type: List[Literal["start", "yawn_end", "drowys_end"]]
+    ts: List[float]
+    attention: List[Optional[float]] = Field(default_factory=list)
+    yawn_weight: List[Optional[float]] = Field(default_factory=list)
+
 class BreakStartBody(BaseModel):
     reason: Literal["focus_drop", "manual", "pomodoro"] = "manual"
     focus_score: Optional[float] = None
@@ -53,6 +97,9 @@ class BreakEndBody(BaseModel):
     break_id: Optional[str] = None               # 없으면 "미종료인 최신 break" 자동 종료
     focus_score: Optional[float] = None          # 휴식 평균 집중도(있으면 업데이트)
 
+class HeartbeatBody(BaseModel):
+    active: bool = True                          # 공부 중(카메라 켜짐·휴식 아님)이면 True
+
 
 # ---------------------------
 # Helpers
@@ -63,9 +110,11 @@ def _oid(s: str) -> ObjectId:
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid ObjectId")
 
+@lru_cache(maxsize=4096)
 def _parse_kst(ts_str: str) -> datetime:
     """
     "YYYY-MM-DD HH:MM:SS" 포맷 문자열을 KST aware datetime으로 변환
+    (한 배치 안에서 같은 초가 반복되므로 캐시)
     """
     try:
         dt = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
@@ -73,15 +122,128 @@ def _parse_kst(ts_str: str) -> datetime:
     except Exception:
         raise HTTPException(status_code=400, detail=f"Invalid timestamp: {ts_str}")
 
+# 세션 → 사용자 캐시: 업로더가 같은 세션으로 계속 보내므로 매 배치 find_one 을 피함
+_SESSION_TTL_S = 300.0
+_SESSION_CACHE_MAX = 10000
+_session_cache: "OrderedDict[ObjectId, tuple]" = OrderedDict()   # sess_obj → (확인 시각, user_id)
+_session_cache_lock = threading.Lock()
+_NO_SESSION = object()
+
+def _session_owner(sess_obj: ObjectId):
+    """세션의 user_id. 세션이 없으면 _NO_SESSION."""
+    now = time.monotonic()
+    with _session_cache_lock:
+        hit = _session_cache.get(sess_obj)
+        if hit is not None and now - hit[0] < _SESSION_TTL_S:
+            _session_cache.move_to_end(sess_obj)
+            return hit[1]
+    ses = db.sessions.find_one({"_id": sess_obj}, {"user_id": 1})
+    if not ses:
+        return _NO_SESSION      # 없는 세션은 캐시하지 않음(곧 생성될 수 있음)
+    with _session_cache_lock:
+        _session_cache[sess_obj] = (now, ses.get("user_id"))
+        _session_cache.move_to_end(sess_obj)
+        while len(_session_cache) > _SESSION_CACHE_MAX:
+            _session_cache.popitem(last=False)
+    return ses.get("user_id")
+
+def _write_events(sess_obj: ObjectId, user_id, docs: list) -> tuple:
+    """세션 × 1분 버킷에 기록(event_id 기준 중복 제거) + 일별 원장 하품/졸음 수 → (새로 저장된 수, 이미 있던 수)"""
+    if user_id is None:
+        return event_store.write_events(sess_obj, user_id, docs)
+    # 버킷에 쓰기 전에 그날 원장을 pending 으로(그 사이 rebuild 가 같은 이벤트를 두 번 세지 않게)
+    days = daily_study.begin(user_id, daily_study.event_days(docs))
+    new = []
+    try:
+        return event_store.write_events(sess_obj, user_id, docs, on_inserted=new.extend)
+    finally:
+        daily_study.add_events(user_id, new, days)
+
+# ---------------------------
+# Heartbeat (서버 공부 시간)
+# ---------------------------
+# 페이지가 HEARTBEAT 마다 active 여부를 보내면 세션 문서에 "활동 구간"을 기록한다.
+#   active_from   : 열린 구간 시작(epoch 초, 없으면 None)
+#   hb_last       : 마지막으로 기록한 하트비트(epoch 초)
+#   active_seconds: 닫힌 구간 합계(초)
+# 열린 구간을 이어 가는 하트비트는 HB_WRITE_S 마다 한 번만 DB 에 쓴다(나머지는 프로세스 캐시에서 바로 반환).
+# hb_last 이후 HB_GAP_S 넘게 소식이 없으면 그 구간은 hb_last 에서 닫힌 것으로 본다(탭 닫힘/네트워크 끊김).
+HB_WRITE_S = 30.0
+HB_GAP_S = 90.0
+_HB_CACHE_MAX = 10000
+_hb_cache: "OrderedDict[ObjectId, tuple]" = OrderedDict()     # sess_obj → (기록한 hb_last, active)
+_hb_cache_lock = threading.Lock()
+_HB_FIELDS = {"end_time": 1, "active_from": 1, "hb_last": 1, "active_seconds": 1}
+
+def _hb_next(ses: dict, now: float, active: bool) -> dict:
+    """세션의 하트비트 상태 + 이번 하트비트 → 새 상태(active_from/hb_last/active_seconds)"""
+    af, last = ses.get("active_from"), ses.get("hb_last")
+    total = float(ses.get("active_seconds") or 0.0)
+    if af is not None and last is not None and now - last > HB_GAP_S:
+        total += max(0.0, last - af)        # 끊겼던 구간은 마지막 하트비트에서 닫음
+        af = None
+    if active:
+        if af is None:
+            af = now
+    elif af is not None:
+        total += max(0.0, now - af)
+        af = None
+    return {"active_from": af, "hb_last": now, "active_seconds": total}
+
+def _hb_seconds(ses: dict, now: float) -> float:
+    """지금 닫는다고 했을 때의 서버 공부 시간(초)"""
+    st = _hb_next(ses, now, False) if ses.get("hb_last") is not None else ses
+    return float(st.get("active_seconds") or 0.0)
+
+def _heartbeat(sess_obj: ObjectId, active: bool, now: float | None = None, tracked_only: bool = False) -> bool:
+    """
+    하트비트 반영. 실제로 DB 에 썼으면 True (합쳐져서 건너뛰면 False).
+    tracked_only: 하트비트를 한 번도 안 받은 세션은 건드리지 않음(예전 클라이언트 세션 보호).
+    """
+    now = time.time() if now is None else now
+    with _hb_cache_lock:
+        hit = _hb_cache.get(sess_obj)
+    if hit is not None and active and hit[1] and now - hit[0] < HB_WRITE_S:
+        return False
+    for _ in range(3):
+        ses = db.sessions.find_one({"_id": sess_obj}, _HB_FIELDS)
+        if not ses:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if ses.get("end_time") is not None or (tracked_only and ses.get("hb_last") is None):
+            return False
+        nxt = _hb_next(ses, now, active)
+        # 다른 워커가 그 사이에 썼으면(낙관적 동시성) 다시 읽어서 계산
+        r = db.sessions.update_one(
+            {"_id": sess_obj, "end_time": None,
+             "hb_last": ses.get("hb_last"), "active_from": ses.get("active_from")},
+            {"$set": nxt})
+        if r.matched_count:
+            with _hb_cache_lock:
+                _hb_cache[sess_obj] = (now, nxt["active_from"] is not None)
+                _hb_cache.move_to_end(sess_obj)
+                while len(_hb_cache) > _HB_CACHE_MAX:
+                    _hb_cache.popitem(last=False)
+            return True
+    return False
+
+def _hb_finish(ses: dict, now: float) -> Optional[float]:
+    """세션 종료 시 서버 공부 시간. 하트비트를 한 번도 안 받은 세션(예전 클라이언트)이면 None."""
+    with _hb_cache_lock:
+        _hb_cache.pop(ses["_id"], None)
+    if ses.get("hb_last") is None:
+        return None
+    return _hb_seconds(ses, now)
+
 def _ensure_indexes():
     db.sessions.create_index([("user_id", 1), ("study_date", 1)])
     db.breaks.create_index([("session_id", 1), ("start_time", 1)])
-    db.session_events.create_index([("session_id", 1), ("timestamp", 1)])
     db.points.create_index([("user_id", 1), ("gain_date", 1)])
     try:
         db.points.create_index([("user_id", 1), ("reason", 1)], unique=True)
     except Exception:
         pass
+    event_store.ensure_indexes()
+    daily_study.ensure_indexes()
 _ensure_indexes()
 
 
@@ -96,12 +258,21 @@ def start_session(user_id: str):
     user_obj = _oid(user_id)
     now = datetime.now(KST)
 
-    open_sessions = list(db.sessions.find({"user_id": user_obj, "end_time": None}, {"_id": 1}))
+    open_sessions = list(db.sessions.find({"user_id": user_obj, "end_time": None}, {"_id": 1, **_HB_FIELDS}))
     if open_sessions:
         open_ids = [s["_id"] for s in open_sessions]
         db.sessions.update_many({"_id": {"$in": open_ids}}, {"$set": {"end_time": now}})
-        # 1-1) 해당 세션들의 미종료 휴식도 함께 종료
-        db.breaks.update_many({"session_id": {"$in": open_ids}, "end_time": None}, {"$set": {"end_time": now}})
+        # 종료 안 하고 떠난 세션도 하트비트가 있으면 서버가 센 시간으로 채움
+        for s in open_sessions:
+            hb_secs = _hb_finish(s, now.timestamp())
+            if hb_secs is not None:
+                db.sessions.update_one({"_id": s["_id"]}, {"$set": {"sum_study_time": hb_secs, "active_from": None}})
+        # 1-1) 해당 세션들의 미종료 휴식도 함께 종료(휴식 길이는 세션 break_seconds 에 누적)
+        for br in db.breaks.find({"session_id": {"$in": open_ids}, "end_time": None}, {"_id": 1}):
+            daily_study.close_break({"_id": br["_id"]}, now)
+        # 1-2) 종료 처리된 세션도 일별 원장에 반영
+        for s in db.sessions.find({"_id": {"$in": open_ids}}, daily_study.SESSION_FIELDS):
+            study_stats.on_session({"user_id": s["user_id"], "ledger": daily_study.record_session(s)})
 
     doc = {
         "user_id": user_obj,
@@ -111,6 +282,7 @@ def start_session(user_id: str):
         "yawn_count": None,
         "avg_yawn": None,
         "sum_study_time": 0.0,
+        "break_seconds": 0.0,      # 종료된 휴식 합계(초) — end_break 가 누적
     }
     inserted = db.sessions.insert_one(doc)
     return {"session_id": str(inserted.inserted_id)}
@@ -132,13 +304,22 @@ def finish_session(user_id: str, session_id: str, body: SessionFinishBody):
         "end_time": datetime.now(KST),
     }
     # 전달된 값만 반영 (None은 무시)
-    for k in ["focus_score", "yawn_count", "avg_yawn", "sum_study_time"]:
+    for k in ["focus_score", "yawn_count", "avg_yawn", "sum_study_time", "operating_point"]:
         v = getattr(body, k)
         if v is not None:
             update[k] = v
+    # 하트비트를 받은 세션은 서버가 센 공부 시간이 기준(브라우저 값은 참고용으로만 보관)
+    hb_secs = _hb_finish(ses, time.time())
+    if hb_secs is not None:
+        if body.sum_study_time is not None:
+            update["client_sum_study_time"] = body.sum_study_time
+        update["sum_study_time"] = hb_secs
+        update["active_from"] = None
 
     db.sessions.update_one({"_id": sess_obj}, {"$set": update})
     ses = db.sessions.find_one({"_id": sess_obj})
+    ses["ledger"] = daily_study.record_session(ses)
+    study_stats.on_session(ses)
     added = award_all_points_on_finish(db, ses)
 
     return {"status": "success", "points_added": int(added)}
@@ -150,11 +331,14 @@ def finish_session(user_id: str, session_id: str, body: SessionFinishBody):
 @router.post("/sessions/{session_id}/events/batch")
 def save_event_batch(session_id: str, body: EventBatchBody):
     """
-    현재 로컬 JSON에 쌓아둔 하품/졸음 이벤트들을 한꺼번에 DB에 적재
+    클라이언트 저널에 쌓아둔 하품/졸음 이벤트들을 한꺼번에 DB에 적재.
+    event_id 가 이미 저장된 이벤트는 건너뜀(업로더 재전송에도 한 번만 저장).
     """
+    t0 = time.perf_counter()
     sess_obj = _oid(session_id)
     # 세션 존재 체크 (없으면 404)
-    if not db.sessions.find_one({"_id": sess_obj}):
+    owner = _session_owner(sess_obj)
+    if owner is _NO_SESSION:
         raise HTTPException(status_code=404, detail="Session not found")
 
     docs = []
@@ -167,6 +351,8 @@ def save_event_batch(session_id: str, body: EventBatchBody):
             "attention": ev.attention_score if ev.type == "yawn_end" else None,
             "yawn_weight": ev.avg_yawn_duration if ev.type == "yawn_end" else None,
         })
+        if ev.event_id:
+            docs[-1]["event_id"] = ev.event_id
     # sleep events
     for ev in body.sleep_events:
         docs.append({
@@ -176,11 +362,92 @@ def save_event_batch(session_id: str, body: EventBatchBody):
             "attention": ev.attention_score if ev.type != "start" else None,
             "yawn_weight": None,
         })
+        if ev.event_id:
+            docs[-1]["event_id"] = ev.event_id
+
+    inserted, duplicates = _write_events(sess_obj, owner, docs)
+    return {"status": "success", "inserted": inserted, "duplicates": duplicates,
+            "latency_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
+
+
+_EVENT_TYPE = {
+    ("yawn", "start"): "yawn_start", ("yawn", "yawn_end"): "yawn_end",
+    ("sleep", "start"): "sleep_start", ("sleep", "drowys_end"): "sleep_end",
+}
+
+def _decode_bulk_body(raw: bytes, content_type: str) -> EventColumnsBody:
+    if "msgpack" in content_type:
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(status_code=415, detail="msgpack not installed on server")
+        try:
+            data = msgpack.unpackb(raw, raw=False)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid msgpack body")
+    else:
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+    try:
+        body = EventColumnsBody(**data)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    n = len(body.event_id)
+    if any(len(col) != n for col in (body.kind, body.type, body.ts)) or \
+            any(col and len(col) != n for col in (body.attention, body.yawn_weight)):
+        raise HTTPException(status_code=422, detail="column length mismatch")
+    return body
+
+def _ingest_columns(sess_obj: ObjectId, owner, body: EventColumnsBody) -> tuple:
+    n = len(body.event_id)
+    att = body.attention or [None] * n
+    yw = body.yawn_weight or [None] * n
+    docs = []
+    for i in range(n):
+        et = _EVENT_TYPE.get((body.kind[i], body.type[i]))
+        if et is None:
+            raise HTTPException(status_code=422, detail=f"invalid kind/type at {i}")
+        is_start = body.type[i] == "start"
+        docs.append({
+            "session_id": sess_obj,
+            "timestamp": datetime.fromtimestamp(body.ts[i], KST),
+            "event_type": et,
+            "attention": None if is_start else att[i],
+            "yawn_weight": yw[i] if et == "yawn_end" else None,
+            "event_id": body.event_id[i],
+        })
+    return _write_events(sess_obj, owner, docs)
 
-    if docs:
-        db.session_events.insert_many(docs)
 
-    return {"status": "success", "inserted": len(docs)}
+@router.post("/sessions/{session_id}/events/bulk")
+async def ingest_event_columns(session_id: str, request: Request):
+    """
+    대량 이벤트 적재(업로더/부하 테스트용).
+    본문: EventColumnsBody 를 JSON 또는 msgpack(Content-Type: application/x-msgpack)으로.
+    event_id 기준 unordered upsert → 같은 배치를 다시 보내도 안전. 처리 시간(ms) 반환.
+    """
+    t0 = time.perf_counter()
+    sess_obj = _oid(session_id)
+    raw = await request.body()
+    body = _decode_bulk_body(raw, request.headers.get("content-type", ""))
+    owner = await run_in_threadpool(_session_owner, sess_obj)
+    if owner is _NO_SESSION:
+        raise HTTPException(status_code=404, detail="Session not found")
+    inserted, duplicates = await run_in_threadpool(_ingest_columns, sess_obj, owner, body)
+    return {"status": "success", "received": len(body.event_id), "inserted": inserted,
+            "duplicates": duplicates, "latency_ms": round((time.perf_counter() - t0) * 1000.0, 2)}
+
+
+@router.post("/sessions/{session_id}/heartbeat")
+def heartbeat(session_id: str, body: HeartbeatBody):
+    """
+    공부 페이지가 주기적으로 호출. active=True 인 동안의 시간이 서버 공부 시간으로 쌓인다.
+    같은 구간을 이어 가는 하트비트는 HB_WRITE_S 마다 한 번만 기록.
+    """
+    written = _heartbeat(_oid(session_id), body.active)
+    return {"status": "success", "written": written}
 
 
 # ---------------------------
@@ -192,6 +459,8 @@ def start_break(session_id: str, body: BreakStartBody):
     휴식 시작. 미종료 break가 이미 있으면 409 반환.
     """
     sess_obj = _oid(session_id)
+    # 휴식 중에는 공부 시간이 늘지 않도록 열린 활동 구간을 닫음(하트비트 쓰는 세션만)
+    _heartbeat(sess_obj, active=False, tracked_only=True)
 
     # 미종료 break가 존재하는지 방어
     open_break = db.breaks.find_one({"session_id": sess_obj, "end_time": None})
@@ -221,15 +490,17 @@ def end_break(session_id: str, body: BreakEndBody):
         q = {"_id": br_obj, "session_id": sess_obj, "end_time": None}
     else:
         q = {"session_id": sess_obj, "end_time": None}
-    br = db.breaks.find_one(q)
+    extra = {"focus_score": body.focus_score} if body.focus_score is not None else None
+    # 종료 + 세션 break_seconds 누적(같은 휴식을 두 번 닫아도 한 번만)
+    br = daily_study.close_break(q, datetime.now(KST), extra)
     if not br:
         raise HTTPException(status_code=404, detail="Open break not found")
 
-    update = {"end_time": datetime.now(KST)}
-    if body.focus_score is not None:
-        update["focus_score"] = body.focus_score
-
-    db.breaks.update_one({"_id": br["_id"]}, {"$set": update})
+    # 이미 종료된 세션의 휴식이면 순공부 시간이 바뀜 → 원장 갱신
+    ses = db.sessions.find_one({"_id": sess_obj, "end_time": {"$ne": None}}, daily_study.SESSION_FIELDS)
+    if ses:
+        ses["ledger"] = daily_study.record_session(ses)
+        study_stats.on_session(ses)
     return {"status": "success"}
 
 @router.get("/users/{user_id}/yawn-weight")
@@ -245,159 +516,12 @@ def get_user_yawn_weight(user_id: str):
     )
     return {"avg_yawn": float(doc["avg_yawn"]) if doc and "avg_yawn" in doc else None}
 
-ATTN_MINUTES_CUTOFF = 25     # 25분 이전 종료면 집중도 포인트 없음
-ATTN_THRESHOLD = 60          # 평균 집중도 60점 이상
-ATTN_POINTS = 2              # 집중도 포인트: 고정 2점
-HOUR_POINTS = 5              # 시간 포인트: 1시간당 5점
-ATTEND_DAILY_POINTS = 2     # 하루 출석 +2
-ATTEND_WEEK_BONUS   = 2     # 7일 채우면 +2
-ONE_HOUR_SECS       = 3600
-
-def _kst_day_range(when: datetime):
-    """KST 기준 당일 [00:00:00, 24:00:00) 범위"""
-    if when.tzinfo is None:
-        when = KST.localize(when)
-    local = when.astimezone(KST)
-    start = local.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timedelta(days=1)
-    return start, end
-
-def _session_net_seconds(db, ses) -> float:
-    """
-    세션의 실제 공부 시간(초).
-    우선순위:
-      1) 프론트가 준 sum_study_time (초)
-      2) (end - start) - sum(break)
-    """
-    sst = ses.get("sum_study_time")
-    if sst is not None:
-        try:
-            return float(sst)
-        except Exception:
-            pass
-    start = ses.get("study_date"); end = ses.get("end_time")
-    if not start or not end:
-        return 0.0
-    total = (end - start).total_seconds()
-    br_secs = 0.0
-    for br in db.breaks.find({"session_id": ses["_id"], "end_time": {"$ne": None}}, {"start_time":1,"end_time":1}):
-        st = br.get("start_time"); ed = br.get("end_time")
-        if st and ed:
-            br_secs += max(0.0, (ed - st).total_seconds())
-    return max(0.0, total - br_secs)
-
-def _award_point(db, user_oid: ObjectId, value: int, reason: str, when: datetime) -> int:
-    # 중복 방지(유니크 인덱스와 중복 체크 이중 방어)
-    if db.points.find_one({"user_id": user_oid, "reason": reason}):
-        return 0
-    db.points.insert_one({
-        "user_id": user_oid,
-        "gain_date": when,
-        "point": int(value),
-        "reason": reason,
-    })
-    # 유저 보유 포인트도 함께 반영
-    db.users.update_one({"_id": user_oid}, {"$inc": {"points": int(value)}})
-    return int(value)
-
-# --- 집중도 규칙: 25분 이전 종료면 0점, 그 외 평균 집중도 >= 60이면 +2점 ---
-def _award_attention_points(db, session_doc) -> int:
-    end = session_doc.get("end_time")
-    if not end:
-        return 0
-    dur_min = _session_net_seconds(db, session_doc) / 60.0
-    if dur_min < ATTN_MINUTES_CUTOFF:
-        return 0
-    avg = session_doc.get("focus_score") or 0
-    if avg >= ATTN_THRESHOLD:
-        sid = str(session_doc.get("_id"))
-        day_str = end.astimezone(KST).strftime("%Y-%m-%d")
-        reason = f"ATTN_{day_str}_session:{sid}"
-        user_oid = session_doc["user_id"] if isinstance(session_doc["user_id"], ObjectId) else ObjectId(session_doc["user_id"])
-        return _award_point(db, user_oid, ATTN_POINTS, reason, when=end)
-    return 0
-
-# --- 시간 규칙: 당일 누적 공부시간 1시간마다 +5점(중복 방지) ---
-def _award_hourly_points(db, user_id, when: datetime) -> int:
-    user_oid = ObjectId(user_id) if isinstance(user_id, str) else user_id
-    day_start, day_end = _kst_day_range(when)
-
-    total_secs = 0.0
-    cur = db.sessions.find(
-        {"user_id": user_oid, "study_date": {"$gte": day_start, "$lt": day_end}, "end_time": {"$ne": None}},
-        {"_id": 1, "study_date": 1, "end_time": 1, "sum_study_time": 1}
-    )
-    for ses in cur:
-        total_secs += _session_net_seconds(db, ses)
-    total_hours = int(total_secs // 3600)
-
-    day_str = day_start.strftime("%Y-%m-%d")
-    given = db.points.count_documents({
-        "user_id": user_oid,
-        "gain_date": {"$gte": day_start, "$lt": day_end},
-        "reason": {"$regex": f"^HOUR_{day_str}_"}
-    })
-
-    to_give = max(0, total_hours - given)
-    gained = 0
-    for k in range(given + 1, given + to_give + 1):
-        reason = f"HOUR_{day_str}_{k}"
-        gained += _award_point(db, user_oid, HOUR_POINTS, reason, when=day_end - timedelta(seconds=1))
-    return gained
-
-# --- 출석 규칙: 당일 누적 1시간 달성 시 +2, 연속 7일마다 추가 +2, streak 갱신 ---
-def _award_attendance_for_day(db, user_oid: ObjectId, day_start: datetime, when: datetime) -> int:
-    day_str = day_start.strftime("%Y-%m-%d")
-    # 이미 일일 출석 지급했으면 종료
-    if db.points.find_one({"user_id": user_oid, "reason": f"ATTEND_{day_str}"}):
-        return 0
-
-    # 당일 누적 공부시간 체크
-    day_end = day_start + timedelta(days=1)
-    total_secs = 0.0
-    for ses in db.sessions.find(
-        {"user_id": user_oid, "study_date": {"$gte": day_start, "$lt": day_end}, "end_time": {"$ne": None}},
-        {"_id":1, "study_date":1, "end_time":1, "sum_study_time":1}
-    ):
-        total_secs += _session_net_seconds(db, ses)
-
-    if total_secs < ONE_HOUR_SECS:
-        return 0
-
-    gained = 0
-    # 1) 일일 출석 +2
-    gained += _award_point(db, user_oid, ATTEND_DAILY_POINTS, f"ATTEND_{day_str}", when=when)
-
-    # 2) 연속 출석일(streak) 갱신
-    user = db.users.find_one({"_id": user_oid}, {"continuous_count":1}) or {}
-    prev_cnt = int(user.get("continuous_count") or 0)
-    yday_str = (day_start - timedelta(days=1)).strftime("%Y-%m-%d")
-    had_yday = db.points.find_one({"user_id": user_oid, "reason": f"ATTEND_{yday_str}"}) is not None
-    new_cnt = (prev_cnt + 1) if had_yday else 1
-    db.users.update_one({"_id": user_oid}, {"$set": {"continuous_count": new_cnt}})
-
-    # 3) 7일 보너스
-    if new_cnt % 7 == 0:
-        bonus_reason = f"ATTEND_WEEK_{day_str}"
-        gained += _award_point(db, user_oid, ATTEND_WEEK_BONUS, bonus_reason, when=when)
-
-    return gained
-
 def award_all_points_on_finish(db, session_doc) -> int:
     """
     세션 종료 직후 호출:
       - 집중도 규칙 포인트
       - 당일 누적시간 규칙 포인트
       - 출석(1시간 달성) + 연속 7일 보너스
+    그날 세션/휴식/포인트를 한 번에 읽고 계산해서 한 번에 기록(points_engine).
     """
-    gained = 0
-    # 1) 집중도 규칙
-    gained += _award_attention_points(db, session_doc)
-    # 2) 시간 누적 규칙
-    end = session_doc.get("end_time") or datetime.now(KST)
-    gained += _award_hourly_points(db, session_doc["user_id"], end)
-    # 3) 출석/보너스
-    day_start, _ = _kst_day_range(end)
-    user_oid = session_doc["user_id"] if isinstance(session_doc["user_id"], ObjectId) else ObjectId(session_doc["user_id"])
-    gained += _award_attendance_for_day(db, user_oid, day_start, when=end)
-    return gained
\ No newline at end of file
+    return points_engine.award_on_finish(db, session_doc)
\ No newline at end of file
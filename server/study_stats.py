@@ -0,0 +1,216 @@
+# server/study_stats.py
+# 유저별 누적 학습 통계(총 학습일 / 연속 학습일 / 최장 연속) — 세션 종료 때 증분 갱신
+#
+# 예전 summary_all 은 가입일부터 attendance 전체와 일별 원장을 모아 학습일을 세고,
+# 오늘부터 하루씩 거꾸로 걸으며 연속일을 셌다. 여기서는 User 문서의 study_stats 에
+#   learning_days  : 출석했거나 세션이 있었던 날 수
+#   streak         : streak_end 로 끝나는 '하루 60분 이상' 연속 일수
+#                    (예전 summary_all 처럼 세션 길이 기준 — 원장 gross_seconds, 휴식 포함)
+#   streak_end     : 그 연속 구간의 마지막 날(YYYY-MM-DD, KST)
+#   longest_streak : 지금까지 가장 긴 연속 일수
+# 를 두고, 원장(daily_study) 문서의 counted / streak_ok 플래그로 같은 날을 두 번 세지 않는다.
+#
+# counted 는 '그날을 learning_days 에 이미 셌다'는 표시. rebuild 가 출석했거나 세션이 있던 날 모두에
+# 켜 두고(세션 없는 출석일은 원장에 counted 만 있는 문서를 만듦), 그 뒤 세션이 처음 생긴 날은 on_day 가
+# 켜면서 +1 한다. 이 트리에는 출석을 기록하는 곳이 없어서, 마지막 rebuild 뒤 세션 없이 출석만 한 날은
+# 다음 --rebuild 때 반영된다.
+#
+# 재계산/검증:  python -m server.study_stats --rebuild [--user <id>]   /   --verify
+from datetime import datetime, timedelta, timezone
+import os
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+try:
+    # 패키지로 실행: python -m server.study_stats
+    from .server_db import db
+    from . import daily_study
+except Exception:
+    # 스크립트로 실행: cd server && python study_stats.py
+    from server_db import db
+    import daily_study
+
+KST = timezone(timedelta(hours=9))
+STREAK_SECS = 3600          # 하루 60분 이상이면 연속일로 인정
+# gross_seconds 가 없는 예전 원장 문서는 daily_study --rebuild 전까지 순공부 시간으로
+_STREAK_OK = {"$or": [{"gross_seconds": {"$gte": STREAK_SECS}},
+                      {"gross_seconds": {"$exists": False}, "net_seconds": {"$gte": STREAK_SECS}}]}
+
+def _users():  return db[os.getenv("USER_COLL", "User")]
+def _att():  return db[os.getenv("ATTENDANCE_COLL", "attendance")]
+
+
+def _prev(day: str) -> str:
+    return (daily_study.day_start(day) - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+# ---------- 증분 갱신 ----------
+def on_day(user_id, day: str):
+    """
+    그날 원장이 바뀐 뒤 호출(세션 종료/휴식 종료). 원장 문서의 플래그를 조건부로 켜서
+    처음 넘는 순간에만 카운터를 올린다 → 여러 번 불러도 한 번만 반영.
+    """
+    L = daily_study._coll()
+    # 1) 그날 첫 세션 → 학습일 +1 (rebuild 가 출석일로 이미 센 날은 counted 가 켜져 있어 제외)
+    r = L.update_one({"user_id": user_id, "day": day, "sessions": {"$gte": 1}, "counted": {"$ne": True}},
+                     {"$set": {"counted": True}})
+    if r.modified_count:
+        r = _users().update_one({"_id": user_id, "study_stats.built": True},
+                                {"$inc": {"study_stats.learning_days": 1}})
+        if not r.matched_count:
+            rebuild(user_id=user_id, quiet=True)     # 통계가 아직 없음 → 원본으로 한 번 계산
+
+    # 2) 그날 60분 달성 → 연속일 갱신
+    r = L.update_one({"user_id": user_id, "day": day, **_STREAK_OK, "streak_ok": {"$ne": True}},
+                     {"$set": {"streak_ok": True}})
+    if r.modified_count:
+        _extend_streak(user_id, day)
+
+
+def _extend_streak(user_id, day: str):
+    U = _users()
+    for _ in range(3):
+        st = (U.find_one({"_id": user_id}, {"study_stats": 1}) or {}).get("study_stats") or {}
+        if not st.get("built"):
+            rebuild(user_id=user_id, quiet=True)
+            return
+        end = st.get("streak_end")
+        if end == day:
+            return
+        if end and day < end:
+            # 지난 날이 뒤늦게 60분을 넘김 → 구간이 이어질 수 있으니 그 유저만 다시 계산
+            rebuild(user_id=user_id, quiet=True)
+            return
+        new = int(st.get("streak") or 0) + 1 if end == _prev(day) else 1
+        r = U.update_one({"_id": user_id, "study_stats.streak_end": end},
+                         {"$set": {"study_stats.streak": new, "study_stats.streak_end": day},
+                          "$max": {"study_stats.longest_streak": new}})
+        if r.modified_count:
+            return
+    rebuild(user_id=user_id, quiet=True)       # 동시에 다른 요청이 계속 바꾸는 경우
+
+
+def on_session(ses: dict):
+    """세션의 원장 기여분(ledger)이 있는 날을 갱신."""
+    led = ses.get("ledger")
+    if led:
+        on_day(ses["user_id"], led["day"])
+
+
+# ---------- 읽기 ----------
+def get(user_id, today: str | None = None) -> dict | None:
+    """
+    요약용 User 문서(created_at, points, study_stats) 한 건. 통계가 아직 없으면 한 번 계산.
+    streak_days 는 예전처럼 '오늘부터 거꾸로' — 오늘 60분을 못 채웠으면 0.
+    """
+    fields = {"created_at": 1, "points": 1, "study_stats": 1}
+    u = _users().find_one({"_id": user_id}, fields)
+    if not u:
+        return None
+    if not (u.get("study_stats") or {}).get("built"):
+        rebuild(user_id=user_id, quiet=True)
+        u = _users().find_one({"_id": user_id}, fields)
+    st = u.get("study_stats") or {}
+    today = today or datetime.now(KST).strftime("%Y-%m-%d")
+    return {**u, "learning_days": int(st.get("learning_days", 0)),
+            "streak_days": int(st.get("streak", 0)) if st.get("streak_end") == today else 0,
+            "longest_streak": int(st.get("longest_streak", 0))}
+
+
+# ---------- 재계산 ----------
+def compute(user_id, created_at: datetime | None) -> tuple:
+    """원본(attendance + 일별 원장)으로 통계 계산 → (stats, 학습일(출석 ∪ 세션), 60분 넘은 날)"""
+    now = datetime.now(KST)
+    since = created_at or datetime(1970, 1, 1, tzinfo=KST)
+    att = set()
+    for d in _att().find({"user_id": user_id, "$or": [{"date": {"$gte": since, "$lt": now}},
+                                                      {"checked_at": {"$gte": since, "$lt": now}}]},
+                         {"date": 1, "checked_at": 1}):
+        att.add(daily_study.day_key(d.get("date") or d["checked_at"]))
+    ses_days, ok_days = set(), []
+    for d in daily_study._coll().find({"user_id": user_id, "day": {"$gte": daily_study.day_key(since),
+                                                                   "$lte": now.strftime("%Y-%m-%d")}},
+                                      {"day": 1, "sessions": 1, "net_seconds": 1, "gross_seconds": 1}):
+        if d.get("sessions"):
+            ses_days.add(d["day"])
+        if float(d.get("gross_seconds", d.get("net_seconds")) or 0) >= STREAK_SECS:
+            ok_days.append(d["day"])
+
+    streak = longest = 0
+    end = None
+    for day in sorted(ok_days):
+        streak = streak + 1 if end == _prev(day) else 1
+        end = day
+        longest = max(longest, streak)
+    stats = {"learning_days": len(att | ses_days), "streak": streak, "streak_end": end,
+             "longest_streak": longest, "built": True}
+    return stats, att | ses_days, ok_days
+
+
+def rebuild(user_id=None, quiet: bool = False, verify: bool = False) -> int:
+    """
+    User.study_stats 를 원본으로 다시 계산(user_id 없으면 전체). 원장 플래그도 맞춘다.
+    verify=True 면 쓰지 않고 저장된 값과 다른 유저만 출력. → 갱신(또는 불일치) 유저 수
+    """
+    q = {"_id": user_id} if user_id is not None else {}
+    n = 0
+    ops = []
+    for u in _users().find(q, {"created_at": 1, "study_stats": 1}):
+        stats, days, ok_days = compute(u["_id"], u.get("created_at"))
+        old = u.get("study_stats") or {}
+        if verify:
+            keys = ("learning_days", "streak", "streak_end", "longest_streak")
+            if any(old.get(k) != stats[k] for k in keys):
+                n += 1
+                print(f"❌ {u['_id']}: stored={ {k: old.get(k) for k in keys} } actual={ {k: stats[k] for k in keys} }")
+            continue
+        L = daily_study._coll()
+        _mark_counted(u["_id"], days)
+        L.update_many({"user_id": u["_id"], "day": {"$in": ok_days}}, {"$set": {"streak_ok": True}})
+        L.update_many({"user_id": u["_id"], "day": {"$nin": ok_days}, "streak_ok": True}, {"$unset": {"streak_ok": ""}})
+        ops.append(UpdateOne({"_id": u["_id"]}, {"$set": {"study_stats": stats}}))
+        n += 1
+        if len(ops) >= 500:
+            _users().bulk_write(ops, ordered=False); ops = []
+    if ops:
+        _users().bulk_write(ops, ordered=False)
+    if not quiet:
+        print(f"{('❌' if n else '✅') + ' mismatched' if verify else '✅ rebuilt'} users={n}")
+    return n
+
+
+def _mark_counted(user_id, days):
+    """센 날마다 원장에 counted — 원장 문서가 없는 출석일은 counted 만 있는 문서로(built 없음)"""
+    ops = [UpdateOne({"user_id": user_id, "day": d}, {"$set": {"counted": True},
+                                                       "$setOnInsert": {"date": daily_study.day_start(d)}},
+                     upsert=True) for d in sorted(days)]
+    for attempt in range(2):
+        if not ops:
+            return
+        try:
+            daily_study._coll().bulk_write(ops, ordered=False)
+            return
+        except BulkWriteError as e:
+            # 같은 날 원장이 동시에 처음 생긴 경우 → 실패한 것만 한 번 더(이번엔 갱신으로 들어감)
+            errs = e.details.get("writeErrors", [])
+            if attempt or any(err.get("code") != 11000 for err in errs):
+                raise
+            ops = [ops[err["index"]] for err in errs]
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="study_stats 재계산")
+    ap.add_argument("--verify", action="store_true", help="저장된 study_stats 와 원본 비교(쓰기 없음)")
+    ap.add_argument("--user", help="User _id 하나만")
+    args = ap.parse_args()
+    uid = ObjectId(args.user) if args.user else None
+    if args.verify:
+        rebuild(user_id=uid, verify=True)
+    elif args.rebuild:
+        rebuild(user_id=uid)
+    else:
+        ap.print_help()
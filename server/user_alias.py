@@ -0,0 +1,247 @@
+# server/user_alias.py
+# 외부 식별자 → User._id 별칭 테이블
+#
+# 예전 _resolve_uid(reports) / _resolve_uid_for_lookup(quizzes) 는 local_user_id, provider_id, id, email …
+# 12개 필드를 문자/숫자 두 형태로 $or 해서 찾았다(인덱스 하나로 못 받는 쿼리).
+# 여기서는 user_alias 컬렉션에 (필드, 값) 하나당 {_id: "필드:값", f, v, user_id} 를 두고
+# 필드 수만큼의 _id 를 $in 포인트 조회 한 번으로 찾는다(+ 프로세스 LRU). 별칭은 가입/로그인 때
+# register() 로 채우고, 기존 유저는  python -m server.user_alias --backfill  로 한 번에 채운다.
+#
+# 같은 값이 유저 A 의 email, 유저 B 의 username 처럼 다른 필드에 있으면 ALIAS_FIELDS 순서가 앞선
+# 필드가 이긴다(누가 먼저 등록했는지와 무관). 같은 필드에 같은 값이면 먼저 등록된 쪽($setOnInsert).
+# register() 는 그 유저에게서 없어진 별칭을 지우고 이 프로세스 캐시에서도 뺀다. 다른 프로세스
+# 캐시는 _CACHE_TTL 뒤에 바뀐다. 유저를 지우거나 합칠 때는 forget().
+# 못 찾은 키도 _MISS_TTL 동안 캐시해서, 없는 키를 반복해 물어도 $in(+ FALLBACK 의 $or) 조회는 그동안 한 번.
+# (다른 프로세스에서 방금 가입한 유저는 그 키가 최대 _MISS_TTL 동안 안 보일 수 있음)
+# provider("local"/"kakao")나 provider_id=0 처럼 여러 유저가 공유하는 값은 별칭으로 쓰지 않는다.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+try:
+    # 패키지로 실행: python -m server.user_alias
+    from .server_db import db
+except Exception:
+    # 스크립트로 실행: cd server && python user_alias.py
+    from server_db import db
+
+ALIAS_FIELDS = ("local_user_id", "localUserId", "localId", "localid",
+                "provider_id", "providerId",
+                "id", "user_id", "userId", "email", "username")
+# 별칭이 아직 없는 키는 예전 $or 조회로 한 번 찾아보고 그 유저의 별칭을 채움(backfill 끝나면 0 으로).
+# 여기서도 못 찾으면 빈 결과로 캐시되므로 같은 키로는 _MISS_TTL 에 한 번만 $or 를 돈다.
+FALLBACK = os.getenv("USER_ALIAS_FALLBACK", "1") == "1"
+
+def _coll():  return db[os.getenv("USER_ALIAS_COLL", "user_alias")]
+def _users():  return db[os.getenv("USER_COLL", "User")]
+
+def ensure_indexes():
+    _coll().create_index("user_id")     # register/forget 에서 그 유저의 별칭 찾기
+
+
+# ---------- 프로세스 캐시 ----------
+_CACHE_MAX = 50000
+_CACHE_TTL = 600.0
+_MISS_TTL = 10.0
+_MISS = object()                                      # 못 찾은 키의 캐시 값
+_cache: "OrderedDict[str, tuple]" = OrderedDict()    # 키 → (확인 시각, ObjectId 또는 _MISS)
+_cache_keys: dict = {}                                # ObjectId → 그 유저로 캐시된 키들(무효화용)
+_cache_lock = threading.Lock()
+
+def _cache_pop(key: str):
+    hit = _cache.pop(key, None)
+    if hit and hit[1] is not _MISS:
+        keys = _cache_keys.get(hit[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _cache_keys[hit[1]]
+
+def _cache_get(key: str):
+    """ObjectId / _MISS(없다고 확인됨) / None(캐시에 없음)"""
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and time.time() - hit[0] < (_MISS_TTL if hit[1] is _MISS else _CACHE_TTL):
+            _cache.move_to_end(key)
+            return hit[1]
+    return None
+
+def _cache_put(key: str, oid: ObjectId):
+    with _cache_lock:
+        _cache_pop(key)
+        _cache[key] = (time.time(), oid)
+        if oid is not _MISS:
+            _cache_keys.setdefault(oid, set()).add(key)
+        while len(_cache) > _CACHE_MAX:
+            _cache_pop(next(iter(_cache)))
+
+def _cache_drop(oid=None, keys=()):
+    """그 유저로 풀린 키 + 주어진 키들(못 찾은 키로 캐시된 것 포함)을 캐시에서 뺌"""
+    with _cache_lock:
+        for k in list(_cache_keys.get(oid, ())) + list(keys):
+            _cache_pop(k)
+
+
+# ---------- 등록 ----------
+def _norm(v) -> str | None:
+    if v is None or isinstance(v, bool):
+        return None
+    s = str(v).strip()
+    return s if s and s != "0" else None
+
+def _aid(field: str, v: str) -> str:
+    return f"{field}:{v}"
+
+def aliases_of(user_doc: dict) -> set:
+    """{(필드, 값)}"""
+    return {(f, v) for f, v in ((f, _norm(user_doc.get(f))) for f in ALIAS_FIELDS) if v}
+
+def _op(field: str, v: str, oid) -> UpdateOne:
+    return UpdateOne({"_id": _aid(field, v)}, {"$setOnInsert": {"f": field, "v": v, "user_id": oid}}, upsert=True)
+
+def register(user_doc: dict, session=None):
+    """
+    유저 문서의 식별자들을 별칭으로 등록(이미 있으면 그대로)하고, 문서에서 없어진 그 유저의 별칭은 지운다.
+    user_doc 에는 ALIAS_FIELDS 가 모두 들어 있어야 함(일부만 projection 하면 나머지가 지워짐).
+    """
+    oid = user_doc["_id"]
+    pairs = aliases_of(user_doc)
+    ids = [_aid(f, v) for f, v in pairs]
+    C = _coll()
+    if pairs:
+        try:
+            C.bulk_write([_op(f, v, oid) for f, v in pairs], ordered=False, session=session)
+        except BulkWriteError as e:
+            # 동시에 같은 키를 넣은 경우(중복 키)만 무시
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+    stale = [a["v"] for a in C.find({"user_id": oid, "_id": {"$nin": ids}}, {"v": 1}, session=session)]
+    if stale:
+        C.delete_many({"user_id": oid, "_id": {"$nin": ids}}, session=session)
+    _cache_drop(oid, stale + [v for _, v in pairs])
+
+def forget(user_id, session=None):
+    """유저 삭제/병합 때 그 유저의 별칭을 모두 지움"""
+    C = _coll()
+    vals = [a["v"] for a in C.find({"user_id": user_id}, {"v": 1}, session=session)]
+    C.delete_many({"user_id": user_id}, session=session)
+    _cache_drop(user_id, vals)
+
+
+# ---------- 조회 ----------
+def _legacy_find(key: str):
+    ors = [{f: key} for f in ALIAS_FIELDS]
+    try:
+        ors += [{f: int(key)} for f in ALIAS_FIELDS]
+    except ValueError:
+        pass
+    return _users().find_one({"$or": ors}, {f: 1 for f in ALIAS_FIELDS})
+
+def _lookup(keys: list) -> dict:
+    """{키: User._id} — 여러 필드에 걸리면 ALIAS_FIELDS 순서가 앞선 필드"""
+    rank = {f: i for i, f in enumerate(ALIAS_FIELDS)}
+    best = {}
+    for a in _coll().find({"_id": {"$in": [_aid(f, k) for k in keys for f in ALIAS_FIELDS]}},
+                          {"f": 1, "v": 1, "user_id": 1}):
+        r = rank.get(a["f"], len(rank))
+        if a["v"] not in best or r < best[a["v"]][0]:
+            best[a["v"]] = (r, a["user_id"])
+    return {k: oid for k, (_, oid) in best.items()}
+
+def resolve(user_key) -> ObjectId | None:
+    """ObjectId 문자열 또는 외부 식별자 → User._id (없으면 None)"""
+    key = str(user_key or "").strip()
+    if not key:
+        return None
+    hit = _cache_get(key)
+    if hit is not None:
+        return None if hit is _MISS else hit
+
+    oid = None
+    if ObjectId.is_valid(key):
+        u = _users().find_one({"_id": ObjectId(key)}, {"_id": 1})
+        oid = u and u["_id"]
+    if oid is None:
+        oid = _lookup([key]).get(key)
+    if oid is None and FALLBACK:
+        u = _legacy_find(key)
+        if u:
+            register(u)
+            oid = u["_id"]
+    _cache_put(key, _MISS if oid is None else oid)
+    return oid
+
+def resolve_many(user_keys) -> dict:
+    """{키: User._id} — 못 찾은 키는 빠짐. 캐시에 없는 키만 모아 조회."""
+    out, todo = {}, []
+    for k in dict.fromkeys(str(k).strip() for k in user_keys if str(k).strip()):
+        hit = _cache_get(k)
+        if hit is _MISS:
+            continue
+        if hit is not None:
+            out[k] = hit
+        else:
+            todo.append(k)
+    if todo:
+        oids = [ObjectId(k) for k in todo if ObjectId.is_valid(k)]
+        if oids:
+            found = {u["_id"] for u in _users().find({"_id": {"$in": oids}}, {"_id": 1})}
+            for k in todo:
+                if ObjectId.is_valid(k) and ObjectId(k) in found:
+                    out[k] = ObjectId(k)
+        rest = [k for k in todo if k not in out]
+        if rest:
+            out.update(_lookup(rest))
+        for k in todo:
+            if k not in out and FALLBACK:
+                oid = resolve(k)        # 찾든 못 찾든 resolve 가 캐시
+                if oid is not None:
+                    out[k] = oid
+            else:
+                _cache_put(k, out.get(k, _MISS))
+    return out
+
+
+# ---------- 백필 ----------
+def backfill(batch: int = 1000, quiet: bool = False) -> int:
+    """
+    기존 User 전체의 별칭 등록. → 등록 시도한 별칭 수
+    예전 형식({_id: 값, user_id}, f 없음) 문서는 먼저 지운다.
+    """
+    ensure_indexes()
+    old = _coll().delete_many({"f": {"$exists": False}}).deleted_count
+    if old and not quiet:
+        print(f"🧹 user_alias: old-format={old}")
+    ops, n = [], 0
+    for u in _users().find({}, {f: 1 for f in ALIAS_FIELDS}):
+        ops += [_op(f, v, u["_id"]) for f, v in aliases_of(u)]
+        if len(ops) >= batch:
+            _bulk(ops); n += len(ops); ops = []
+    if ops:
+        _bulk(ops); n += len(ops)
+    if not quiet:
+        print(f"✅ user_alias: aliases={n} (total docs={_coll().estimated_document_count()})")
+    return n
+
+def _bulk(ops):
+    try:
+        _coll().bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backfill", action="store_true", help="기존 User 별칭 채우기")
+    args = ap.parse_args()
+    if args.backfill:
+        backfill()
+    else:
+        print(f"aliases={_coll().estimated_document_count()}")
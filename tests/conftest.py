@@ -0,0 +1,43 @@
+# tests/conftest.py
+# server 모듈 테스트 공통 — 실제 Mongo 대신 mongomock
+#
+# server_db 는 import 때 실제 Mongo 에 접속하므로 server 모듈을 import 하기 전에 mongomock 으로 바꿔 둔다.
+# mongomock 이 아직 못 하는 $dateToString 의 timezone 은 여기서 채운다(daily_study.rebuild 가 씀).
+import sys
+import types
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+try:
+    import mongomock
+    from mongomock import aggregate as _mm_agg
+except ImportError:          # mongomock 이 없으면 각 테스트 파일의 importorskip 이 건너뜀
+    mongomock = None
+
+if mongomock is not None and "server.server_db" not in sys.modules:
+    _client = mongomock.MongoClient(tz_aware=True)
+    _stub = types.ModuleType("server.server_db")
+    _stub.client, _stub.db = _client, _client["ttalk_test"]
+    sys.modules["server.server_db"] = _stub
+
+    _date_op = _mm_agg._Parser._handle_date_operator
+
+    def _date_with_tz(self, operator, values):
+        if operator == "$dateToString" and isinstance(values, dict) and values.get("timezone"):
+            v = self.parse(values["date"])
+            v = v.replace(tzinfo=timezone.utc) if v.tzinfo is None else v
+            return v.astimezone(ZoneInfo(values["timezone"])).strftime(values["format"])
+        return _date_op(self, operator, values)
+
+    _mm_agg._Parser._handle_date_operator = _date_with_tz
+
+
+@pytest.fixture
+def db():
+    pytest.importorskip("mongomock")
+    from server.server_db import db as _db
+    for name in _db.list_collection_names():
+        _db.drop_collection(name)
+    return _db
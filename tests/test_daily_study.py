@@ -0,0 +1,146 @@
+# tests/test_daily_study.py
+# 일별 원장(daily_study)의 증분 쓰기(begin/_inc/add_events)와 rebuild 가 겹쳐도 한 번씩만 세는지 — mongomock
+#
+#   python -m pytest -q tests
+from datetime import timedelta, timezone
+
+import pytest
+
+pytest.importorskip("mongomock")      # mongomock 연결은 conftest.py
+
+from bson import ObjectId  # noqa: E402
+
+from server import daily_study, event_store  # noqa: E402
+
+DAY = "2026-03-10"
+
+
+@pytest.fixture(autouse=True)
+def _clean(db):
+    daily_study.ensure_indexes()
+    event_store.ensure_indexes()
+
+
+def _ended(uid, day: str, hour: int, minutes: int, break_seconds: float = 0.0, focus: float = 70.0) -> dict:
+    t0 = daily_study.day_start(day) + timedelta(hours=hour)
+    ses = {"_id": ObjectId(), "user_id": uid, "study_date": t0, "end_time": t0 + timedelta(minutes=minutes),
+           "break_seconds": break_seconds, "focus_score": focus}
+    daily_study.db.sessions.insert_one(dict(ses))
+    return ses
+
+
+def _reload(ses: dict) -> dict:
+    return daily_study.db.sessions.find_one({"_id": ses["_id"]})
+
+
+def _doc(uid, day: str) -> dict:
+    return daily_study._coll().find_one({"user_id": uid, "day": day}) or {}
+
+
+def _expected(uid, day: str) -> dict:
+    """원본에서 직접 — 세션 기여분 합(순공부/세션 길이/세션 수)"""
+    acc = {"net_seconds": 0.0, "gross_seconds": 0.0, "sessions": 0}
+    for s in daily_study.db.sessions.find({"user_id": uid}):
+        c = daily_study.contribution(s)
+        if c and c["day"] == day:
+            for k in acc:
+                acc[k] += c[k]
+    return acc
+
+
+def _assert_ledger(uid, day: str):
+    row = daily_study.get_day(uid, day)
+    assert {k: row[k] for k in ("net_seconds", "gross_seconds", "sessions")} == _expected(uid, day)
+    d = _doc(uid, day)
+    assert d.get("built") is True and (d.get("pending") or 0) == 0
+
+
+def test_record_session_twice_is_idempotent():
+    uid = ObjectId()
+    ses = _ended(uid, DAY, 9, 50, break_seconds=600)
+    first = daily_study.record_session(ses)          # 처음 보는 날 → rebuild
+    daily_study.record_session(_reload(ses))         # 같은 세션 다시(재시도/휴식 종료 후)
+    ses2 = _ended(uid, DAY, 13, 30)
+    daily_study.record_session(ses2)                 # 이미 있는 날 → $inc
+    daily_study.record_session(_reload(ses2))
+    assert first["net_seconds"] == 50 * 60 - 600 and first["gross_seconds"] == 50 * 60
+    _assert_ledger(uid, DAY)
+    assert _doc(uid, DAY)["sessions"] == 2
+
+
+def test_day_move_between_dates():
+    uid = ObjectId()
+    other = "2026-03-11"
+    ses = _ended(uid, DAY, 23, 40)
+    daily_study.record_session(ses)
+    daily_study.record_session(_ended(uid, other, 10, 20))
+    # 시작 시각을 다음 날로 고침 → 이전 날 기여분은 빠지고 새 날에 더해짐
+    start = daily_study.day_start(other) + timedelta(hours=1)
+    daily_study.db.sessions.update_one({"_id": ses["_id"]},
+                                       {"$set": {"study_date": start, "end_time": start + timedelta(minutes=40)}})
+    daily_study.record_session(_reload(ses))
+    _assert_ledger(uid, DAY)
+    _assert_ledger(uid, other)
+    assert _doc(uid, DAY)["sessions"] == 0 and _doc(uid, other)["sessions"] == 2
+
+
+def test_rebuild_between_begin_and_inc(monkeypatch):
+    uid = ObjectId()
+    daily_study.record_session(_ended(uid, DAY, 9, 30))
+    real_inc = daily_study._inc
+
+    def racing_inc(user_id, day, delta):
+        # ledger 를 바꿔 끼운 뒤 $inc 전에 rebuild 가 끼어듦 → pending 이라 그날은 덮어쓰지 않고 built=False
+        daily_study.rebuild(user_id=user_id, start=day, end=day, quiet=True)
+        assert _doc(user_id, day).get("built") is False
+        real_inc(user_id, day, delta)
+
+    monkeypatch.setattr(daily_study, "_inc", racing_inc)
+    daily_study.record_session(_ended(uid, DAY, 11, 45))
+    monkeypatch.setattr(daily_study, "_inc", real_inc)
+    _assert_ledger(uid, DAY)
+    assert _doc(uid, DAY)["sessions"] == 2
+
+
+def test_record_while_rebuild_reads(monkeypatch):
+    uid = ObjectId()
+    daily_study.record_session(_ended(uid, DAY, 9, 30))
+    late = _ended(uid, DAY, 11, 45)
+    real = daily_study._sessions_with_breaks
+
+    def racing(match, batch=1000):
+        # rebuild 가 원본을 다 읽은 뒤, 쓰기 전에 세션 하나가 끝남 → rebuild 는 그날을 덮어쓰지 않음
+        yield from list(real(match, batch))
+        daily_study.record_session(late)
+
+    monkeypatch.setattr(daily_study, "_sessions_with_breaks", racing)
+    daily_study.rebuild(user_id=uid, start=DAY, end=DAY, quiet=True)
+    monkeypatch.setattr(daily_study, "_sessions_with_breaks", real)
+    _assert_ledger(uid, DAY)
+    assert _doc(uid, DAY)["sessions"] == 2
+
+
+def test_add_events_on_day_not_built_yet():
+    uid, sid = ObjectId(), ObjectId()
+    t = daily_study.day_start(DAY) + timedelta(hours=10)
+    docs = [{"session_id": sid, "timestamp": (t + timedelta(seconds=i * 20)).astimezone(timezone.utc),
+             "event_type": et, "event_id": f"e{i}"}
+            for i, et in enumerate(["yawn_start", "yawn_end", "yawn_end", "sleep_end"])]
+
+    # study_sessions._write_events 와 같은 순서: begin → 버킷 → add_events
+    days = daily_study.begin(uid, daily_study.event_days(docs))
+    new = []
+    event_store.write_events(sid, uid, docs, on_inserted=new.extend)
+    daily_study.add_events(uid, new, days)
+    d = _doc(uid, DAY)
+    assert not d.get("built") and d["pending"] == 0
+
+    # 같은 이벤트 다시 → 버킷에서 중복으로 걸러져 원장도 그대로
+    days = daily_study.begin(uid, daily_study.event_days(docs))
+    new = []
+    event_store.write_events(sid, uid, docs, on_inserted=new.extend)
+    daily_study.add_events(uid, new, days)
+
+    row = daily_study.get_day(uid, DAY)              # 아직 계산 안 된 날 → 원본(버킷)에서 다시
+    assert (row["yawns"], row["sleeps"]) == (2, 1)
+    assert _doc(uid, DAY)["built"] is True and _doc(uid, DAY)["pending"] == 0
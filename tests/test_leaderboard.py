@@ -0,0 +1,47 @@
+# tests/test_leaderboard.py
+# 점수판 순위(rank_of)가 기간 합계를 직접 정렬한 순위와 같은지 — mongomock
+#
+#   python -m pytest -q tests
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("mongomock")      # mongomock 연결은 conftest.py
+
+from bson import ObjectId  # noqa: E402
+
+from server import leaderboard  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clean(db):
+    leaderboard.ensure_indexes()
+
+
+def _expected(period: str, now: datetime) -> dict:
+    """기간 합계를 (points, attempts) 높은 순으로 — 앞선 사람 수 + 1"""
+    sums = {r["user_id"]: (r["points"], r["attempts"])
+            for r in leaderboard._coll().aggregate(leaderboard._window_sums(period, now))}
+    return {u: 1 + sum(o > s for o in sums.values()) for u, s in sums.items()}
+
+
+@pytest.mark.parametrize("period", ["weekly", "monthly", "all"])
+def test_rank_matches_sorted_totals(period):
+    rnd = random.Random(7)
+    now = datetime.now(leaderboard.KST)
+    users = [ObjectId() for _ in range(40)]
+    docs = [{"user_id": rnd.choice(users), "gain_date": now - timedelta(days=rnd.randint(0, 40)),
+             "point": rnd.choice([0, 5, 10, 10, 20]),
+             "reason": rnd.choice([leaderboard.ATTEND_PREFIX + "daily", "quiz"])}
+            for _ in range(300)]
+    leaderboard.record(docs)
+
+    want = _expected(period, now)
+    # /ranking/me 처럼 캐시(JSON)를 거친 분포를 넘겨도 같아야 함
+    dist = json.loads(json.dumps(leaderboard.window_dist(period, now))) if period != "all" else None
+    for u in users:
+        r = leaderboard.rank_of(period, u, now, dist=dist)
+        assert r["rank"] == want.get(u)
+        assert r["total"] == len(want)
@@ -0,0 +1,91 @@
+# tests/test_study_stats.py
+# study_stats 증분 갱신(on_day)이 원본 재계산(compute)과 같은 값을 내는지 — Mongo 대신 mongomock
+#
+#   python -m pytest -q tests
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("mongomock")      # mongomock 연결은 conftest.py
+
+from bson import ObjectId  # noqa: E402
+
+from server import daily_study, study_stats  # noqa: E402
+
+KEYS = ("learning_days", "streak", "streak_end", "longest_streak")
+
+
+@pytest.fixture(autouse=True)
+def _clean(db):
+    daily_study.ensure_indexes()
+
+
+def _day(n: int) -> str:
+    """오늘(KST)에서 n 일 전"""
+    return (datetime.now(study_stats.KST) - timedelta(days=n)).strftime("%Y-%m-%d")
+
+
+def _user() -> ObjectId:
+    uid = ObjectId()
+    study_stats._users().insert_one({"_id": uid, "created_at": datetime.now(study_stats.KST) - timedelta(days=60)})
+    return uid
+
+
+def _attend(uid, day: str):
+    study_stats._att().insert_one({"user_id": uid, "date": daily_study.day_start(day)})
+
+
+def _session(uid, day: str, secs: float, breaks: float = 0.0):
+    """세션 종료 때처럼 원장에 더하고 on_day (secs 는 휴식 포함 세션 길이)"""
+    daily_study._coll().update_one({"user_id": uid, "day": day},
+                                   {"$inc": {"sessions": 1, "net_seconds": secs - breaks, "gross_seconds": secs},
+                                    "$set": {"built": True}}, upsert=True)
+    study_stats.on_day(uid, day)
+
+
+def _stored(uid) -> dict:
+    st = study_stats._users().find_one({"_id": uid})["study_stats"]
+    return {k: st.get(k) for k in KEYS}
+
+
+def _actual(uid) -> dict:
+    u = study_stats._users().find_one({"_id": uid})
+    stats, _, _ = study_stats.compute(uid, u["created_at"])
+    return {k: stats[k] for k in KEYS}
+
+
+def test_incremental_matches_compute():
+    uid = _user()
+    _attend(uid, _day(10))
+    _attend(uid, _day(8))
+    _session(uid, _day(9), 4000)
+    study_stats.rebuild(user_id=uid, quiet=True)
+    assert _stored(uid) == _actual(uid)
+    assert _stored(uid)["learning_days"] == 3
+
+    # 마지막 rebuild 뒤에 출석하고 그날 세션 → 그날 처음 세는 것이므로 +1
+    _attend(uid, _day(5))
+    _session(uid, _day(5), 1200)
+    assert _stored(uid) == _actual(uid)
+
+    # rebuild 가 출석일로 이미 센 날의 세션 → 그대로
+    _session(uid, _day(8), 3700)
+    assert _stored(uid) == _actual(uid)
+
+    # 출석 없는 날의 세션, 같은 날 두 번째 세션, 연속 60분(휴식 포함 세션 길이 기준)
+    _session(uid, _day(2), 3600, breaks=600)
+    _session(uid, _day(1), 1800)
+    _session(uid, _day(1), 1800)
+    _session(uid, _day(0), 3600)
+    assert _stored(uid) == _actual(uid)
+    assert _stored(uid)["learning_days"] == 7
+    assert _stored(uid)["streak"] == 3
+
+
+def test_first_session_without_stats_builds():
+    uid = _user()
+    _attend(uid, _day(3))
+    _session(uid, _day(3), 600)
+    _session(uid, _day(1), 600)
+    assert _stored(uid) == _actual(uid)
+    assert _stored(uid)["learning_days"] == 2